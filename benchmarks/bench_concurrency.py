@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Load test: throughput of a server endpoint at increasing concurrency.
+
+    python3 benchmarks/bench_concurrency.py [--path /ref/list] [--requests 200] [--concurrency 1,8,32]
+
+Uses the server configured with `anc server auth` (~/.anchors/server/info.json)
+unless --url/--token are given. If the handlers block the event loop, req/s
+stays flat as concurrency grows; with the data access in the threadpool it
+should scale until the threadpool or the Mongo pool is saturated.
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def load_info(args):
+    info = {}
+    path = Path.home() / ".anchors" / "server" / "info.json"
+    if path.exists():
+        info = json.loads(path.read_text())
+    return args.url or info.get("url"), args.token or info.get("token")
+
+
+def run_level(url, token, concurrency, total):
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_maxsize=concurrency))
+    session.mount("https://", HTTPAdapter(pool_maxsize=concurrency))
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def one(_):
+        start = time.perf_counter()
+        response = session.get(url, headers=headers, timeout=60)
+        return time.perf_counter() - start, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(r[0] for r in results)
+    errors = sum(1 for r in results if r[1] >= 400)
+    return {
+        "rps": total / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Server URL (default: configured server)")
+    parser.add_argument("--token", help="Bearer token (default: configured token)")
+    parser.add_argument("--path", default="/ref/list")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", default="1,8,32")
+    args = parser.parse_args()
+
+    url, token = load_info(args)
+    if not url or not token:
+        sys.exit("No server configured. Use `anc server auth` or --url/--token.")
+
+    levels = [int(c) for c in args.concurrency.split(",")]
+    print(f"GET {url}{args.path}, {args.requests} requests per level")
+    base = None
+    for concurrency in levels:
+        r = run_level(url + args.path, token, concurrency, args.requests)
+        base = base or r["rps"]
+        print(
+            f"  c={concurrency:<4} {r['rps']:8.1f} req/s  x{r['rps'] / base:5.1f}  "
+            f"p50 {r['p50']:7.1f} ms  p95 {r['p95']:7.1f} ms  errors {r['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark: `anc cr` snapshot of a synthetic tree, legacy os.walk builder vs
+the scandir walker + thread pool (core/commands/cr.py).
+
+    python3 benchmarks/bench_cr.py [--files 40000] [--depth 3] [--fanout 8] [--size 2048] [--jobs 1,8,32]
+
+The tree mixes text and binary files (every 5th one) and a few empty
+directories. It is generated once in a temporary directory; the page cache
+is warm for every run after the first, so the first (legacy) timing also
+includes the cold reads. Both builders must produce the same entries.
+"""
+import argparse
+import base64
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.commands import cr
+
+
+# --- Implementación anterior (core/commands/cr.py), solo para comparar ---
+
+def _legacy_encode_file(filepath):
+    with open(filepath, "rb") as f:
+        raw = f.read()
+        try:
+            raw.decode()
+            return raw.decode(), "plain"
+        except UnicodeDecodeError:
+            return base64.b64encode(raw).decode(), "base64"
+
+
+def legacy_build(top, mode="replace"):
+    files_dict = {}
+    upath = top
+    for root, dirs, files in os.walk(top):
+        rel_root = os.path.relpath(root, top)
+        key_root = os.path.normpath(os.path.join(upath.rstrip("/"), rel_root)).rstrip("/") + "/"
+        if not files and not dirs:
+            files_dict[key_root] = {
+                "type": "directory",
+                "mode": "ensure",
+                "become": cr.should_become(key_root),
+                "perm": format(os.stat(root).st_mode & 0o7777, "04o"),
+            }
+        for name in files:
+            full_path = os.path.join(root, name)
+            key = os.path.normpath(os.path.join(upath.rstrip("/"), os.path.relpath(full_path, top)))
+            content, encoding = _legacy_encode_file(full_path)
+            files_dict[key] = {
+                "mode": mode,
+                "become": cr.should_become(key),
+                "encoding": encoding,
+                "content": content,
+                "perm": format(os.stat(full_path).st_mode & 0o7777, "04o"),
+            }
+    return files_dict
+
+
+def make_tree(top, files, depth, fanout, size, seed=42):
+    rnd = random.Random(seed)
+    dirs = [top]
+    for _ in range(depth):
+        dirs = [os.path.join(d, f"d{i}") for d in dirs for i in range(fanout)]
+    for d in dirs:
+        os.makedirs(d, exist_ok=True)
+    for d in rnd.sample(dirs, min(len(dirs), 5)):
+        os.makedirs(os.path.join(d, "empty"), exist_ok=True)
+    text = ("key = value\n" * (size // 12 + 1))[:size].encode()
+    for i in range(files):
+        data = rnd.randbytes(size) if i % 5 == 0 else text
+        with open(os.path.join(dirs[i % len(dirs)], f"f{i}.conf"), "wb") as f:
+            f.write(data)
+
+
+def bench(label, fn, n_files):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.2f} s  {n_files / elapsed:10.0f} files/s  entries={len(result)}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=40_000)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=8)
+    parser.add_argument("--size", type=int, default=2048, help="Bytes per file")
+    parser.add_argument("--jobs", default=f"1,8,{cr.default_jobs()}")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_cr_")
+    top = os.path.join(tmp, "tree")
+    try:
+        make_tree(top, args.files, args.depth, args.fanout, args.size)
+        print(f"{args.files} files x {args.size} B, depth {args.depth}, fanout {args.fanout}\n")
+
+        legacy = bench("legacy (os.walk, serial)", lambda: legacy_build(top), args.files)
+        for jobs in [int(j) for j in args.jobs.split(",")]:
+            result = bench(f"scandir + pool (jobs={jobs})",
+                           lambda: cr.build_files_dict_from_paths([(top, "replace", False)], base_root=None, jobs=jobs),
+                           args.files)
+            # Las claves van relativas a $HOME en cr; se comparan las entradas
+            if sorted(result.values(), key=repr) != sorted(legacy.values(), key=repr):
+                print(f"\n⚠️  Result mismatch with jobs={jobs}")
+            if list(result) != list(cr.build_files_dict_from_paths([(top, "replace", False)], jobs=jobs)):
+                print(f"\n⚠️  Non-deterministic order with jobs={jobs}")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark: legacy eval()-based filter vs compiled filterlang closures.
+
+    python3 benchmarks/bench_filter.py [--n 100000] [--expr "env=prod AND project~web"]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.shared.filterlang import compile_filter
+
+
+# --- Implementación anterior (core/utils/filter.py), solo para comparar ---
+
+def _legacy_get_nested(d, key):
+    for part in key.split("."):
+        if not isinstance(d, dict) or part not in d:
+            return None
+        d = d[part]
+    return d
+
+
+def _legacy_normalize(value):
+    if isinstance(value, str):
+        v = value.lower()
+        if v == "true":
+            return True
+        if v == "false":
+            return False
+    return value
+
+
+def legacy_expr_to_lambda(expr_str):
+    expr_str = re.sub(r"\s+(AND|and)\s+", " and ", expr_str, flags=re.IGNORECASE)
+    expr_str = re.sub(r"\s+(OR|or)\s+", " or ", expr_str, flags=re.IGNORECASE)
+    pattern = re.compile(r'([a-zA-Z0-9_.]+)\s*(!=|=|~|!~)\s*("[^"]+"|\'[^\']+\'|[^\s()]+)')
+    var_map = {}
+    parts = []
+    last = 0
+    for i, match in enumerate(pattern.finditer(expr_str)):
+        key, op, val = match.groups()
+        var_name = f"_v{i}"
+        parts.append(expr_str[last:match.start()])
+        parts.append(var_name)
+        last = match.end()
+        var_map[var_name] = (key, op, _legacy_normalize(val.strip('"').strip("'")))
+    parts.append(expr_str[last:])
+    expr_final = "".join(parts)
+
+    def matcher(data):
+        env = {}
+        for var_name, (key, op, expected) in var_map.items():
+            actual = _legacy_get_nested(data, key)
+            if op == "=":
+                env[var_name] = expected in actual if isinstance(actual, list) else actual == expected
+            elif op == "!=":
+                env[var_name] = expected not in actual if isinstance(actual, list) else actual != expected
+            elif op == "~":
+                env[var_name] = expected in str(actual) if actual is not None else False
+            elif op == "!~":
+                env[var_name] = expected not in str(actual) if actual is not None else True
+        try:
+            return eval(expr_final, {}, env)
+        except Exception:
+            return False
+    return matcher
+
+
+def legacy_matches_filter(data, filter_str):
+    # Como antes: se re-parsea la expresión en cada llamada
+    try:
+        return legacy_expr_to_lambda(filter_str)(data)
+    except Exception:
+        return False
+
+
+def make_docs(n, seed=42):
+    rnd = random.Random(seed)
+    envs = ["prod", "dev", "staging"]
+    projects = ["web", "api", "infra", "data"]
+    types = ["local", "ssh", "url", "files"]
+    return [{
+        "name": f"anchor{i}",
+        "type": rnd.choice(types),
+        "env": rnd.choice(envs),
+        "project": f"{rnd.choice(projects)}-{i % 50}",
+        "groups": rnd.sample(["devops", "infra", "qa", "all"], 2),
+        "meta": {"owner": f"user{i % 20}", "tier": str(i % 3)},
+    } for i in range(n)]
+
+
+def bench(label, fn, docs):
+    start = time.perf_counter()
+    hits = sum(1 for d in docs if fn(d))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed * 1000:10.1f} ms  {elapsed / len(docs) * 1e6:8.2f} µs/doc  hits={hits}")
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--expr", default="env=prod AND project~web OR groups=qa AND meta.tier!=2")
+    args = parser.parse_args()
+
+    docs = make_docs(args.n)
+    print(f"{args.n} docs, expr: {args.expr}\n")
+
+    legacy_hits = bench("legacy (re-parse + eval)", lambda d: legacy_matches_filter(d, args.expr), docs)
+    legacy = legacy_expr_to_lambda(args.expr)
+    bench("legacy (parse once + eval)", legacy, docs)
+    compiled = compile_filter(args.expr)
+    new_hits = bench("filterlang (compiled closure)", compiled, docs)
+
+    if legacy_hits != new_hits:
+        print(f"\n⚠️  Result mismatch: legacy={legacy_hits} filterlang={new_hits}")
+
+
+if __name__ == "__main__":
+    main()
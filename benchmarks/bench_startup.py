@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark: wall time of short CLI commands (startup dominated).
+
+    python3 benchmarks/bench_startup.py [--runs 20] [--anchors 200] [-- ls -f "env=prod"]
+
+Creates a temporary ANCHOR_DIR with N anchors and runs `main.py <cmd>`
+repeatedly. The first run builds the metadata index and is reported apart.
+Use `anc --startup-profile <cmd>` to see which imports dominate.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MAIN = os.path.join(ROOT, "core", "main.py")
+
+
+def make_anchors(anchor_dir, n):
+    for i in range(n):
+        data = {
+            "type": "local" if i % 3 else "docker",
+            "path": f"/srv/app{i}",
+            "env": "prod" if i % 2 else "dev",
+            "project": f"web{i % 10}",
+        }
+        with open(os.path.join(anchor_dir, f"a{i}.json"), "w") as f:
+            json.dump(data, f)
+
+
+def run_once(cmd, env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, MAIN, *cmd], env=env,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def run_once_interpreter(env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], env=env, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--anchors", type=int, default=200)
+    parser.add_argument("cmd", nargs="*", default=["ls"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as anchor_dir:
+        make_anchors(anchor_dir, args.anchors)
+        env = {**os.environ, "ANCHOR_DIR": anchor_dir}
+
+        baseline = statistics.median(
+            run_once_interpreter(env) for _ in range(args.runs)
+        )
+        cold = run_once(args.cmd, env)
+        times = [run_once(args.cmd, env) for _ in range(args.runs)]
+
+    print(f"command            : anc {' '.join(args.cmd)}  ({args.anchors} anchors)")
+    print(f"python -c pass     : {baseline * 1000:8.1f} ms (median)")
+    print(f"first run (index)  : {cold * 1000:8.1f} ms")
+    print(f"median             : {statistics.median(times) * 1000:8.1f} ms")
+    print(f"min / max          : {min(times) * 1000:8.1f} / {max(times) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,19 @@
 import os
-import json
 import base64
+import stat
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from core.utils.colors import red, green, bold, cyan
 from core.utils.path import resolve_path, as_relative_to_home
+from core.utils.json_stream import write_json_streaming
+from core.utils import blob_store
 
 
-def get_file_perm(path):
+def get_file_perm(path, st=None):
     try:
-        return format(os.stat(path).st_mode & 0o7777, "04o")
+        st = st or os.stat(path)
+        return format(st.st_mode & 0o7777, "04o")
     except Exception as e:
         print(red(f"❌ Error getting permissions for {path}: {e}"))
         return "0000"
@@ -16,24 +21,39 @@ def get_file_perm(path):
 
 
 
-def encode_file(filepath):
+def encode_file(filepath, need_content=True):
+    """(contenido, encoding); se lee y se decodifica una sola vez."""
     try:
         with open(filepath, "rb") as f:
             raw = f.read()
-            try:
-                raw.decode()
-                return raw.decode(), "plain"
-            except UnicodeDecodeError:
-                return base64.b64encode(raw).decode(), "base64"
     except Exception as e:
         print(red(f"❌ Failed to read {filepath}: {e}"))
         return None, None
+    try:
+        text = raw.decode()
+    except UnicodeDecodeError:
+        return (base64.b64encode(raw).decode() if need_content else ""), "base64"
+    return text, "plain"
 
 
 def should_become(path):
     return path.startswith("/etc") or path.startswith("/usr") or path.startswith("/var") or path.startswith("/opt") or path.startswith("/root")
 
 
+def pop_option(raw_args, *names):
+    """Saca `--opción valor` de los argumentos de rutas (argparse.REMAINDER se lo traga)."""
+    raw_args = list(raw_args)
+    value = None
+    for name in names:
+        while name in raw_args:
+            i = raw_args.index(name)
+            if i + 1 >= len(raw_args):
+                raise ValueError(f"❌ Missing value after {name}")
+            value = raw_args[i + 1]
+            del raw_args[i:i + 2]
+    return value, raw_args
+
+
 def parse_paths_modes_and_flags(raw_args, default_mode="replace"):
     result = []
     current_path = None
@@ -68,78 +88,247 @@ def parse_paths_modes_and_flags(raw_args, default_mode="replace"):
     return result
 
 
-def build_files_dict_from_paths(triplets, base_root=None):
-    files_dict = {}
+CHUNK_FILES = 64
+# Tope de bytes por tanda y en vuelo (contenido leído aún sin escribir): con
+# ficheros grandes la ventana se estrecha en vez de tener jobs*2 tandas llenas
+CHUNK_BYTES = 4 * 1024 * 1024
+MAX_INFLIGHT_BYTES = 32 * 1024 * 1024
+
+
+def default_jobs():
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+def _walk(top, top_stat):
+    """
+    Recorre `top` con os.scandir, en orden determinista (nombres ordenados,
+    ficheros de cada directorio antes que sus subdirectorios, como os.walk).
+    Por cada directorio devuelve (ruta, ruta relativa a top, stat, ficheros,
+    vacío); ficheros = [(nombre, ruta, stat)] con el stat del propio DirEntry.
+    """
+    stack = [(top, ".", top_stat)]
+    while stack:
+        root, rel_root, root_stat = stack.pop()
+        try:
+            with os.scandir(root) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            print(red(f"❌ Cannot read directory {root}: {e}"))
+            continue
+
+        files, dirs, linked_dirs = [], [], 0
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if not is_dir:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    st = None  # enlace roto: la lectura dará el error
+                files.append((entry.name, entry.path, st))
+            elif entry.is_symlink():
+                linked_dirs += 1  # como os.walk(followlinks=False): cuenta, pero no se recorre
+            else:
+                dirs.append(entry)
+
+        yield root, rel_root, root_stat, files, not files and not dirs and not linked_dirs
+
+        for entry in reversed(dirs):
+            try:
+                rel = entry.name if rel_root == "." else f"{rel_root}/{entry.name}"
+                stack.append((entry.path, rel, entry.stat()))
+            except OSError as e:
+                print(red(f"❌ Cannot read directory {entry.path}: {e}"))
+
+
+def _external_entry(path, st, key, mode):
+    """Fichero grande: el contenido va al almacén local (~/.anchors/blobs), no al anchor."""
+    try:
+        sha256, size = blob_store.store_file(path)
+    except Exception as e:
+        print(red(f"❌ Failed to read {path}: {e}"))
+        return None
+    return {
+        "mode": mode,
+        "become": should_become(key),
+        "external": True,
+        "size": size,
+        "sha256": sha256,
+        "ref": None,
+        "path": blob_store.blob_url_path(sha256),
+        "perm": get_file_perm(path, st)
+    }
+
+
+def _file_entry(path, st, key, mode, blank, max_inline=None):
+    if st is not None and not stat.S_ISREG(st.st_mode):
+        print(red(f"❌ Skipping special file {path}"))
+        return None
+    # Solo "replace" sin --blank: append/prepend/regex necesitan el contenido en el anchor
+    if max_inline is not None and st is not None and st.st_size > max_inline and mode == "replace" and not blank:
+        return _external_entry(path, st, key, mode)
+    content, encoding = encode_file(path, need_content=not (blank or mode == "regex"))
+    if encoding is None:
+        return None
+    entry = {
+        "mode": mode
+    }
+    if mode == "regex":
+        entry["submode"] = "replace"
+    entry.update({
+        "become": should_become(key),
+        "encoding": encoding,
+        "regex": "" if mode == "regex" else None,
+        "content": "" if blank or mode == "regex" else content
+    })
+    entry["perm"] = get_file_perm(path, st)
+    if mode != "regex":
+        entry.pop("regex", None)
+    return entry
+
+
+def _dir_entry(path, st, key_root):
+    return {
+        "type": "directory",
+        "mode": "ensure",
+        "become": should_become(key_root),
+        "perm": get_file_perm(path, st)
+    }
+
+
+def _input_key(upath_raw, base_root=None):
+    """(ruta resuelta, clave en el anchor) de una ruta de la línea de comandos."""
+    resolved = resolve_path(upath_raw)
+    if base_root:
+        return resolved, os.path.relpath(resolved, start=base_root)
+    return resolved, as_relative_to_home(upath_raw)
+
+
+def _covered_by(key, later_keys):
+    """¿Alguna de las rutas posteriores vuelve a generar `key`?"""
+    key = key.rstrip("/")
+    for k in later_keys:
+        if k == ".":
+            # Sus claves son relativas ("a", "sub/b"), sin ~ ni /
+            if not key.startswith(("/", "~")):
+                return True
+        elif key == k or key.startswith(k + "/"):
+            return True
+    return False
+
+
+def _snapshot_tasks(triplets, base_root=None):
+    """
+    (clave, ruta, stat, mode, blank) por cada entrada del anchor, en el orden
+    en que se guardan; mode None = directorio vacío.
 
-    for upath_raw, mode, blank in triplets:
-        resolved = resolve_path(upath_raw)
-        if base_root:
-            upath = os.path.relpath(resolved, start=base_root)
+    Rutas solapadas (`anc cr x dir dir/f --mode append`): gana la última que
+    incluye la entrada, con su mode/--blank, como con el dict de antes; la
+    entrada sale en la posición de esa ruta. Cada clave se escribe una vez.
+    """
+    inputs = [(*_input_key(upath_raw, base_root), mode, blank) for upath_raw, mode, blank in triplets]
+    seen = set()
+    for i, (resolved, upath, mode, blank) in enumerate(inputs):
+        later_keys = [os.path.normpath(later[1]).rstrip("/") for later in inputs[i + 1:]]
+        for task in _input_tasks(resolved, upath, mode, blank, base_root):
+            key = task[0]
+            if key in seen or (later_keys and _covered_by(key, later_keys)):
+                continue
+            seen.add(key)
+            yield task
+
+
+def _input_tasks(resolved, upath, mode, blank, base_root=None):
+    top_stat = os.stat(resolved)
+    if stat.S_ISREG(top_stat.st_mode):
+        yield os.path.normpath(upath), resolved, top_stat, mode, blank
+
+    elif stat.S_ISDIR(top_stat.st_mode):
+        for root, rel_root, root_stat, files, empty in _walk(resolved, top_stat):
+            if base_root:
+                rel_root = os.path.relpath(root, base_root)
+            key_dir = os.path.normpath(os.path.join(upath.rstrip("/"), rel_root))
+            if empty:
+                key_root = key_dir.rstrip("/") + "/"
+                yield key_root, root, root_stat, None, False
+            prefix = "" if key_dir == "." else key_dir.rstrip("/") + "/"
+            for name, path, st in files:
+                yield prefix + name, path, st, mode, blank
+
+
+def _make_entries(tasks, max_inline=None):
+    result = []
+    for key, path, st, mode, blank in tasks:
+        if mode is None:
+            entry = _dir_entry(path, st, key)
         else:
-            upath = as_relative_to_home(upath_raw)
+            entry = _file_entry(path, st, key, mode, blank, max_inline)
+        if entry is not None:
+            result.append((key, entry))
+    return result
+
+
+def _task_bytes(task, max_inline=None) -> int:
+    """Bytes que la entrada tendrá en memoria hasta escribirse (aprox., por st_size)."""
+    _, _, st, mode, blank = task
+    if mode is None or st is None or blank or mode == "regex":
+        return 0
+    if max_inline is not None and st.st_size > max_inline and mode == "replace":
+        return 0  # va al almacén de blobs, no al anchor
+    return st.st_size
+
+
+def _chunks(tasks, max_inline=None):
+    """Tandas de hasta CHUNK_FILES entradas o CHUNK_BYTES: (tanda, bytes)."""
+    chunk, nbytes = [], 0
+    for task in tasks:
+        chunk.append(task)
+        nbytes += _task_bytes(task, max_inline)
+        if len(chunk) >= CHUNK_FILES or nbytes >= CHUNK_BYTES:
+            yield chunk, nbytes
+            chunk, nbytes = [], 0
+    if chunk:
+        yield chunk, nbytes
 
-        if not os.path.exists(resolved):
+
+def iter_files_entries(triplets, base_root=None, jobs=None, max_inline=None):
+    """
+    Genera (clave, entrada) del anchor en orden determinista. La lectura y
+    codificación de los ficheros va en un pool de hilos, por tandas de
+    CHUNK_FILES/CHUNK_BYTES y con como mucho jobs*2 tandas o
+    MAX_INFLIGHT_BYTES en vuelo (memoria acotada aunque el árbol sea enorme;
+    un fichero mayor que el tope va solo). Con `max_inline` (bytes), los
+    ficheros mayores van al almacén local de blobs como entradas externas.
+    """
+    jobs = jobs or default_jobs()
+    chunks = _chunks(_snapshot_tasks(triplets, base_root), max_inline)
+    if jobs <= 1:
+        for chunk, _ in chunks:
+            yield from _make_entries(chunk, max_inline)
+        return
+
+    pending = deque()
+    inflight = 0
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        for chunk, nbytes in chunks:
+            pending.append((pool.submit(_make_entries, chunk, max_inline), nbytes))
+            inflight += nbytes
+            while pending and (len(pending) > jobs * 2 or inflight > MAX_INFLIGHT_BYTES):
+                future, done_bytes = pending.popleft()
+                yield from future.result()
+                inflight -= done_bytes
+        while pending:
+            yield from pending.popleft()[0].result()
+
+
+def build_files_dict_from_paths(triplets, base_root=None, jobs=None, max_inline=None):
+    for upath_raw, _, _ in triplets:
+        if not os.path.exists(resolve_path(upath_raw)):
             print(red(f"❌ Not found: {upath_raw}"))
             return {}
-
-        if os.path.isfile(resolved):
-            key = os.path.normpath(upath)
-            content, encoding = encode_file(resolved)
-            if encoding is not None:
-                entry = {
-                    "mode": mode
-                }
-                if mode == "regex":
-                    entry["submode"] = "replace"
-                entry.update({
-                    "become": should_become(key),
-                    "encoding": encoding,
-                    "regex": "" if mode == "regex" else None,
-                    "content": "" if blank or mode == "regex" else content
-                })
-                entry["perm"] = get_file_perm(resolved)
-
-                if mode != "regex":
-                    entry.pop("regex", None)
-                files_dict[key] = entry
-
-        elif os.path.isdir(resolved):
-            for root, dirs, files in os.walk(resolved):
-                rel_root = os.path.relpath(root, base_root or resolved)
-                key_root = os.path.normpath(os.path.join(upath.rstrip("/"), rel_root)).rstrip("/") + "/"
-
-                # Añadir solo si es un directorio vacío
-                if not files and not dirs:
-                    files_dict[key_root] = {
-                        "type": "directory",
-                        "mode": "ensure",
-                        "become": should_become(key_root),
-                        "perm": get_file_perm(root)
-                    }
-
-                for name in files:
-                    full_path = os.path.join(root, name)
-                    rel_inside = os.path.relpath(full_path, base_root or resolved)
-                    key = os.path.normpath(os.path.join(upath.rstrip("/"), rel_inside))
-                    content, encoding = encode_file(full_path)
-                    if encoding is not None:
-                        entry = {
-                            "mode": mode
-                        }
-                        if mode == "regex":
-                            entry["submode"] = "replace"
-                        entry.update({
-                            "become": should_become(key),
-                            "encoding": encoding,
-                            "regex": "" if mode == "regex" else None,
-                            "content": "" if blank or mode == "regex" else content
-                        })
-                        entry["perm"] = get_file_perm(full_path)
-                        if mode != "regex":
-                            entry.pop("regex", None)
-                        files_dict[key] = entry
-
-    return files_dict
+    return dict(iter_files_entries(triplets, base_root, jobs, max_inline))
 
 
 def handle_cr(args):
@@ -149,7 +338,12 @@ def handle_cr(args):
     anchor_name = args.name
 
     try:
-        parsed_inputs = parse_paths_modes_and_flags(args.paths or [], default_mode=args.mode or "replace")
+        jobs, raw_paths = pop_option(args.paths or [], "-j", "--jobs")
+        jobs = int(jobs) if jobs is not None else getattr(args, "jobs", None)
+        max_inline, raw_paths = pop_option(raw_paths, "--max-inline")
+        max_inline = max_inline if max_inline is not None else getattr(args, "max_inline", None)
+        max_inline = blob_store.parse_size(max_inline) if max_inline is not None else None
+        parsed_inputs = parse_paths_modes_and_flags(raw_paths, default_mode=args.mode or "replace")
     except ValueError as e:
         print(red(str(e)))
         return
@@ -176,14 +370,13 @@ def handle_cr(args):
     if any(mode == "regex" for _, mode, _ in parsed_inputs):
         print(cyan("📌 Hint: don't forget to manually define 'regex' patterns in the anchor JSON."))
 
-    files_dict = build_files_dict_from_paths(parsed_inputs)
     paths = [as_relative_to_home(p) for p, _, _ in parsed_inputs]
 
     anchor_data = {
     "type": "files",
     "name": anchor_name,
     "path": "." if show_dot_as_root else (paths if len(paths) > 1 else paths[0]),
-    "files": files_dict,
+    "files": None,  # se escribe en streaming (iter_files_entries)
     "scripts": {
         "_comment": "You can use simple strings or objects like {'run': 'command', 'scope': 'path', 'become': 'true'}",
         "preload": [],
@@ -199,7 +392,13 @@ def handle_cr(args):
     os.makedirs(anchor_dir, exist_ok=True)
     output_file = os.path.join(anchor_dir, f"{anchor_name}.json")
 
-    with open(output_file, "w") as f:
-        json.dump(anchor_data, f, indent=2)
+    # Cada entrada se escribe según se genera (memoria acotada) en un
+    # temporal que solo sustituye al anchor si la captura termina bien
+    try:
+        count = write_json_streaming(output_file, anchor_data, "files",
+                                     iter_files_entries(parsed_inputs, jobs=jobs, max_inline=max_inline))
+    except KeyboardInterrupt:
+        print(red(f"\n❌ Capture interrupted; {output_file} was not modified"))
+        return
 
-    print(green(f"✅ Anchor {bold(anchor_name)} created at {bold(output_file)}"))
+    print(green(f"✅ Anchor {bold(anchor_name)} created at {bold(output_file)} ({count} entries)"))
@@ -0,0 +1,334 @@
+import contextlib
+import io
+import os
+import signal
+import socket
+import socketserver
+import subprocess
+import sys
+import time
+import traceback
+from pathlib import Path
+
+from core.utils.colors import red, green, yellow, blue, dim
+
+# `anc daemon`: proceso de larga duración detrás de un socket Unix.
+# Mantiene caliente lo que cada `anc ...` de la capa bash volvería a pagar:
+# intérprete e imports, índice de anchors, filtros compilados y la sesión
+# HTTP (keep-alive) con el servidor.
+#
+# Petición (campos terminados en NUL):
+#     ANC1 \0 <cwd> \0 <ANCHOR_DIR> \0 <argc> \0 <arg1> \0 ... <argN> \0
+# Respuesta:
+#     ANC1 <rc>\n<salida>
+# Si el comando no se puede servir desde el daemon la respuesta es
+# "ANC1 fallback\n" y el cliente ejecuta el camino normal (one-shot).
+
+PROTOCOL = "ANC1"
+MAX_REQUEST = 1024 * 1024
+
+# Comandos sin prompts que se ejecutan dentro del daemon
+# (functions/anchors.sh::_anc_servable repite esta lista: mantenerlas iguales)
+DAEMON_COMMANDS = {"ls", "meta", "doc"}
+DAEMON_SUBCOMMANDS = {
+    "server": {"ls", "status"},
+    "secret": {"ls", "get"},
+}
+# Operaciones propias para functions/*.sh (sustituyen filter.py y jq)
+DAEMON_OPS = {"filter", "path", "ping"}
+
+
+def run_dir() -> Path:
+    return Path.home() / ".anchors" / "run"
+
+
+def socket_path() -> str:
+    return os.environ.get("ANC_DAEMON_SOCK") or str(run_dir() / "ancd.sock")
+
+
+def pid_path() -> Path:
+    return Path(socket_path()).with_suffix(".pid")
+
+
+def servable(argv) -> bool:
+    if not argv:
+        return False
+    cmd = argv[0]
+    if cmd in DAEMON_OPS or cmd in DAEMON_COMMANDS:
+        return True
+    subcommands = DAEMON_SUBCOMMANDS.get(cmd)
+    return bool(subcommands) and len(argv) > 1 and argv[1] in subcommands
+
+
+# --- Protocolo ---
+
+def encode_request(argv, cwd=None, anchor_dir=None) -> bytes:
+    fields = [
+        PROTOCOL,
+        cwd or os.getcwd(),
+        anchor_dir if anchor_dir is not None else os.environ.get("ANCHOR_DIR", ""),
+        str(len(argv)),
+        *argv,
+    ]
+    return b"".join(f.encode() + b"\0" for f in fields)
+
+
+def read_request(sock):
+    """Lee una petición completa; devuelve (cwd, anchor_dir, argv)."""
+    data = b""
+    while True:
+        parts = data.split(b"\0")
+        # parts[-1] es el trozo incompleto tras el último NUL
+        if len(parts) > 4:
+            argc = int(parts[3])
+            if len(parts) - 1 >= 4 + argc:
+                break
+        chunk = sock.recv(65536)
+        if not chunk:
+            raise ValueError("incomplete request")
+        data += chunk
+        if len(data) > MAX_REQUEST:
+            raise ValueError("request too large")
+
+    fields = [p.decode() for p in parts[:4 + argc]]
+    if fields[0] != PROTOCOL:
+        raise ValueError(f"unknown protocol {fields[0]!r}")
+    return fields[1], fields[2], fields[4:]
+
+
+def call(argv, timeout=30):
+    """Cliente Python: devuelve (rc, salida) o None si no hay daemon."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.settimeout(timeout)
+            s.connect(socket_path())
+            s.sendall(encode_request(argv))
+            chunks = []
+            while True:
+                chunk = s.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+    except OSError:
+        return None
+
+    header, _, body = b"".join(chunks).partition(b"\n")
+    proto, _, rc = header.decode().partition(" ")
+    if proto != PROTOCOL or not rc.isdigit():
+        return None
+    return int(rc), body.decode()
+
+
+# --- Servidor ---
+
+@contextlib.contextmanager
+def _request_context(cwd, anchor_dir):
+    """Entorno del cliente (cwd, ANCHOR_DIR) y stdio capturado."""
+    old_cwd = os.getcwd()
+    old_anchor_dir = os.environ.get("ANCHOR_DIR")
+    old_stdin = sys.stdin
+    out = io.StringIO()
+    try:
+        if anchor_dir:
+            os.environ["ANCHOR_DIR"] = anchor_dir
+        else:
+            os.environ.pop("ANCHOR_DIR", None)
+        try:
+            os.chdir(cwd)
+        except OSError:
+            pass
+        # Sin terminal: un input() inesperado falla en vez de colgar el daemon
+        sys.stdin = io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(out):
+            yield out
+    finally:
+        sys.stdin = old_stdin
+        os.chdir(old_cwd)
+        if old_anchor_dir is None:
+            os.environ.pop("ANCHOR_DIR", None)
+        else:
+            os.environ["ANCHOR_DIR"] = old_anchor_dir
+
+
+def _op_filter(args, anchor_dir):
+    from core.utils.filter import filter_anchor_names
+    for name in filter_anchor_names(args[0] if args else None, anchor_dir):
+        print(name)
+    return 0
+
+
+def _op_path(args, anchor_dir):
+    """<name>\t<path> por anchor: `path` o la entrada por defecto de `paths`."""
+    from core.utils.index import load_anchor
+    for name in args:
+        data = load_anchor(anchor_dir, name) or {}
+        path = data.get("path")
+        paths = [p for p in data.get("paths") or [] if isinstance(p, dict)]
+        if not path and paths:
+            path = next((p.get("path") for p in paths if p.get("default")), paths[0].get("path"))
+        print(f"{name}\t{path or ''}")
+    return 0
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        try:
+            cwd, anchor_dir, argv = read_request(self.request)
+        except (ValueError, OSError) as e:
+            self._reply(f"{PROTOCOL} 2\n{red(f'daemon: {e}')}\n")
+            return
+
+        if not servable(argv):
+            self._reply(f"{PROTOCOL} fallback\n")
+            return
+
+        rc, output = self.server.execute(argv, cwd, anchor_dir)
+        self.server.served += 1
+        self._reply(f"{PROTOCOL} {rc}\n{output}")
+
+    def _reply(self, text):
+        try:
+            self.request.sendall(text.encode())
+        except OSError:
+            pass
+
+
+class AnchorDaemon(socketserver.UnixStreamServer):
+    # Peticiones en serie: cada una cambia cwd/entorno/stdout del proceso
+    def __init__(self, path):
+        self.started = time.time()
+        self.served = 0
+        super().__init__(path, _Handler)
+
+    def execute(self, argv, cwd, anchor_dir):
+        from core import main as anc_main
+
+        anchor_dir = anchor_dir or os.path.expanduser("~/.anchors/data")
+        with _request_context(cwd, anchor_dir) as out:
+            try:
+                if argv[0] == "ping":
+                    print(f"pid={os.getpid()} uptime={int(time.time() - self.started)}s served={self.served}")
+                    rc = 0
+                elif argv[0] == "filter":
+                    rc = _op_filter(argv[1:], anchor_dir)
+                elif argv[0] == "path":
+                    rc = _op_path(argv[1:], anchor_dir)
+                else:
+                    rc = anc_main.main(argv) or 0
+            except SystemExit as e:
+                if isinstance(e.code, int):
+                    rc = e.code
+                elif e.code is None:
+                    rc = 0
+                else:
+                    print(e.code)
+                    rc = 1
+            except Exception:
+                traceback.print_exc()
+                rc = 1
+        return rc, out.getvalue()
+
+
+def _alive() -> bool:
+    return call(["ping"], timeout=2) is not None
+
+
+def serve():
+    path = socket_path()
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+
+    if os.path.exists(path):
+        if _alive():
+            print(yellow(f"⚠️ Daemon already running on {path}"))
+            return 1
+        os.unlink(path)  # socket huérfano
+
+    old_umask = os.umask(0o077)
+    try:
+        server = AnchorDaemon(path)
+    finally:
+        os.umask(old_umask)
+
+    pid_path().write_text(str(os.getpid()))
+
+    def _stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _stop)
+    print(green(f"⚓ anc daemon listening on {path} (pid {os.getpid()})"), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for leftover in (path, pid_path()):
+            try:
+                os.unlink(leftover)
+            except OSError:
+                pass
+    return 0
+
+
+def start():
+    if _alive():
+        print(yellow(f"⚠️ Daemon already running on {socket_path()}"))
+        return 0
+
+    os.makedirs(os.path.dirname(socket_path()), mode=0o700, exist_ok=True)
+    log_file = Path(socket_path()).with_suffix(".log")
+    main_py = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "main.py"))
+
+    with open(log_file, "a") as log:
+        subprocess.Popen(
+            [sys.executable, main_py, "daemon", "run"],
+            stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+            start_new_session=True,
+        )
+
+    for _ in range(50):
+        if _alive():
+            print(green(f"✅ anc daemon started on {socket_path()}"))
+            return 0
+        time.sleep(0.1)
+
+    print(red(f"❌ Daemon did not start, see {log_file}"))
+    return 1
+
+
+def stop():
+    try:
+        pid = int(pid_path().read_text())
+    except (OSError, ValueError):
+        print(yellow("⚠️ Daemon is not running"))
+        return 0
+
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pid_path().unlink(missing_ok=True)
+        print(yellow("⚠️ Daemon is not running (stale pid file removed)"))
+        return 0
+
+    for _ in range(50):
+        if not os.path.exists(socket_path()):
+            break
+        time.sleep(0.1)
+    print(blue(f"🛑 anc daemon stopped (pid {pid})"))
+    return 0
+
+
+def status():
+    result = call(["ping"], timeout=2)
+    if result is None:
+        print(yellow("⚠️ Daemon is not running"))
+        print(dim("   Start it with: anc daemon start"))
+        return 1
+    print(green(f"✅ anc daemon running on {socket_path()}"))
+    print(dim(f"   {result[1].strip()}"))
+    return 0
+
+
+def run(args):
+    actions = {"start": start, "stop": stop, "status": status, "run": serve}
+    sys.exit(actions[args.action]())
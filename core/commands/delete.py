@@ -1,6 +1,5 @@
 import os
-import json
-from core.utils.filter import matches_filter
+from core.utils.filter import filter_anchor_names
 
 def color(text, code): return f"\033[{code}m{text}\033[0m"
 def bold(text): return color(text, "1")
@@ -22,21 +21,12 @@ def run(args):
     # 🔍 Modo filtrado
     if args.filter:
         deleted = 0
-        for filename in os.listdir(anchor_dir):
-            full_path = os.path.join(anchor_dir, filename)
-            if not filename.endswith(".json") or not os.path.isfile(full_path):
-                continue
-            try:
-                with open(full_path) as f:
-                    data = json.load(f)
-                if matches_filter(data, args.filter):
-                    name = os.path.splitext(filename)[0]
-                    confirm = input(yellow(f"⚠️ Delete anchor '{name}'? [y/N]: ")).strip().lower()
-                    if confirm in ("y", "yes"):
-                        if delete_anchor(full_path):
-                            deleted += 1
-            except Exception as e:
-                print(red(f"❌ Error reading {filename}: {e}"))
+        for name in filter_anchor_names(args.filter, anchor_dir):
+            full_path = os.path.join(anchor_dir, f"{name}.json")
+            confirm = input(yellow(f"⚠️ Delete anchor '{name}'? [y/N]: ")).strip().lower()
+            if confirm in ("y", "yes"):
+                if delete_anchor(full_path):
+                    deleted += 1
         if deleted > 0:
             print(green(f"✅ Deleted {deleted} anchor(s)."))
         else:
@@ -1,7 +1,7 @@
 import os
 import json
 
-from core.utils.filter import filter_anchors
+from core.utils.filter import filter_anchor_summaries
 from core.utils.colors import cyan, blue, green, red, yellow, magenta, gray, dim
 
 def basename_no_ext(filename):
@@ -16,7 +16,7 @@ def run(args):
     filter_str = args.filter
     filter_type = "url" if args.url else "env" if args.env else None
 
-    all_filtered = filter_anchors(filter_str)
+    all_filtered = filter_anchor_summaries(filter_str, folder)
     found = False
 
     print(blue("Anchors:"))
@@ -2,7 +2,7 @@ import os
 import json
 from pathlib import Path
 
-from core.utils.filter import filter_anchors
+from core.utils.filter import filter_anchor_names
 from core.utils.colors import red, green, yellow, bold  # ✅ estilo directo
 
 def set_nested(data, dotted_key, value):
@@ -70,11 +70,10 @@ def run(args):
             anchor = entry
 
     if filter_str:
-        anchors = filter_anchors(filter_str)
-        if not anchors:
+        names = filter_anchor_names(filter_str, anchor_dir)
+        if not names:
             print(yellow("⚠️ No anchors matched the filter"))
             return
-        names = list(anchors.keys())
     else:
         if not anchor or (not updates and not deletions):
             print(yellow("Usage: anc meta <anchor> key=value [...] [--del key [...]]"))
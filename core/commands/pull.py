@@ -1,11 +1,38 @@
 import json
 import requests
 import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from pathlib import Path
 from core.utils.colors import red, green, blue, yellow, gray
-from core.utils.server_utils import load_server_info
+from core.utils.server_utils import load_server_info, get_session, iter_pages
 
 ANCHOR_DIR = os.environ.get("ANCHOR_DIR", os.path.expanduser("~/.anchors/data"))
+DEFAULT_JOBS = 8
+
+
+def fetch_anchor(name: str, info: dict):
+    """Descarga un anchor. Devuelve (data, None) o (None, mensaje de error)."""
+    try:
+        response = get_session().get(
+            f"{info['url']}/db/pull/{name}",
+            headers={"Authorization": f"Bearer {info['token']}"},
+            timeout=10
+        )
+    except requests.exceptions.RequestException as e:
+        return None, f"Error connecting to server: {e}"
+
+    if response.status_code != 200:
+        return None, f"HTTP {response.status_code}: {response.text}"
+    return response.json(), None
+
+
+def write_anchor(name: str, data: dict):
+    output_path = Path(ANCHOR_DIR) / f"{name}.json"
+    tmp = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, output_path)
 
 
 def pull_single(name: str, info: dict, yes: bool = False) -> int:
@@ -29,30 +56,100 @@ def pull_single(name: str, info: dict, yes: bool = False) -> int:
 
     print(blue(f"⬇️  Downloading '{name}'..."))
 
-    try:
-        response = requests.get(
-            f"{server_url}/db/pull/{name}",
-            headers={"Authorization": f"Bearer {token}"},
-            timeout=5
-        )
-    except Exception as e:
-        print(red(f"❌ Error connecting to server: {e}"))
+    data, error = fetch_anchor(name, info)
+    if error:
+        print(red(f"❌ Failed to pull '{name}'"))
+        print(gray(error))
         return 1
 
-    if response.status_code != 200:
-        print(red(f"❌ Failed to pull '{name}' ({response.status_code})"))
-        print(gray(response.text))
-        return 1
-
-    data = response.json()
-    with open(output_path, "w") as f:
-        json.dump(data, f, indent=2)
-
+    write_anchor(name, data)
     print(green(f"✅ '{name}' pulled successfully"))
     return 0
 
 
-def run(anchor: str = None, filter_str: str = None, all_flag: bool = False, yes: bool = False):
+def pull_many(names, info: dict, jobs: int = DEFAULT_JOBS) -> int:
+    """
+    Descarga varios anchors en paralelo (máx. `jobs` a la vez) sobre una
+    sola sesión keep-alive. `names` puede ser un iterable que se va
+    produciendo (p. ej. páginas del listado): las descargas empiezan sin
+    esperar al final. No pregunta nada: la selección ya viene resuelta.
+    Devuelve el número de fallos.
+    """
+    total = len(names) if isinstance(names, (list, tuple)) else None
+    if total == 0:
+        return 0
+
+    jobs = max(1, min(jobs, total or jobs))
+    get_session(pool_size=jobs)
+    done = failures = 0
+    start = time.monotonic()
+
+    def task(name):
+        data, error = fetch_anchor(name, info)
+        if error is None:
+            write_anchor(name, data)
+        return error
+
+    def report(future, name):
+        nonlocal done, failures
+        done += 1
+        try:
+            error = future.result()
+        except Exception as e:
+            error = str(e)
+        progress = gray(f"[{done}/{total or '?'}]")
+        if error:
+            failures += 1
+            print(f"{progress} {red(f'❌ {name}')} {gray(error)}")
+        else:
+            print(f"{progress} {green(f'✅ {name}')}")
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        pending = {}
+        for name in names:
+            # Como mucho 2*jobs en vuelo: no se encola todo el listado
+            while len(pending) >= jobs * 2:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    report(future, pending.pop(future))
+            pending[pool.submit(task, name)] = name
+        for future in as_completed(pending):
+            report(future, pending[future])
+
+    elapsed = time.monotonic() - start
+    print(blue(f"📊 {done - failures} pulled, {failures} failed in {elapsed:.1f}s ({jobs} jobs)"))
+    return failures
+
+
+def resolve_overwrites(names: list, yes: bool = False) -> list:
+    """
+    Pregunta antes de empezar qué anchors existentes se sobrescriben,
+    para que los prompts no bloqueen las descargas.
+    """
+    existing = [n for n in names if (Path(ANCHOR_DIR) / f"{n}.json").exists()]
+    if yes or not existing:
+        return names
+
+    print(yellow(f"⚠️  {len(existing)} anchor(s) already exist locally."))
+    choice = input(yellow("   → Overwrite [a]ll, [n]one, or [c]hoose one by one? [a/n/c]: ")).strip().lower()
+
+    if choice in ("a", "all", "y", "yes"):
+        return names
+
+    skip = set(existing)
+    if choice in ("c", "choose"):
+        for name in existing:
+            answer = input(yellow("   → Overwrite ") + green(f"{name}.json") + yellow("? [y/N]: "))
+            if answer.lower() in ("y", "yes"):
+                skip.discard(name)
+
+    for name in existing:
+        if name in skip:
+            print(gray(f"⏭️  Skipping '{name}'"))
+    return [n for n in names if n not in skip]
+
+
+def run(anchor: str = None, filter_str: str = None, all_flag: bool = False, yes: bool = False, jobs: int = DEFAULT_JOBS):
     info = load_server_info()
     if not info:
         print(red("❌ Server not configured. Use `anc server auth`."))
@@ -65,46 +162,52 @@ def run(anchor: str = None, filter_str: str = None, all_flag: bool = False, yes:
         print(yellow("Usage: anc pull <anchor> OR anc pull -f ... OR anc pull --all"))
         return 1
 
-    # Obtener lista de anchors desde /db/list
+    # Listado paginado de /db/list: cada página se muestra (y con --yes
+    # se empieza a descargar) según llega
+    params = {"filter": filter_str} if filter_str else {}
+    pages = iter_pages(
+        f"{info['url']}/db/list",
+        headers={"Authorization": f"Bearer {info['token']}"},
+        params=params
+    )
+
+    listed = []
+
+    def matched_names():
+        try:
+            for page in pages:
+                for anchor_obj in page:
+                    name = anchor_obj.get("name")
+                    print(f"  ⚓ {green(name or '(unknown)')}")
+                    if name:
+                        listed.append(name)
+                        yield name
+        except requests.exceptions.RequestException as e:
+            print(red(f"❌ Failed to list anchors: {e}"))
+            raise
+
+    print(blue("📥 Matching anchors:"))
     try:
-        params = {}
-        if filter_str:
-            params["filter"] = filter_str
-
-        response = requests.get(
-            f"{info['url']}/db/list",
-            headers={"Authorization": f"Bearer {info['token']}"},
-            params=params,
-            timeout=5
-        )
-        response.raise_for_status()
-        anchors = response.json()
-    except Exception as e:
-        print(red(f"❌ Failed to list anchors: {e}"))
+        if yes:
+            failures = pull_many(matched_names(), info, jobs)
+        else:
+            names = list(matched_names())
+    except requests.exceptions.RequestException:
         return 1
 
-    if not anchors:
+    if not listed:
         print(yellow("⚠️  No anchors found matching criteria."))
         return 0
 
-    print(blue(f"📥 {len(anchors)} anchor(s) matched:"))
-    for anchor_obj in anchors:
-        print(f"  ⚓ {green(anchor_obj.get('name', '(unknown)'))}")
-
     if not yes:
+        print(blue(f"📥 {len(names)} anchor(s) matched"))
         confirm = input(yellow("❓ Do you want to pull these anchors? [y/N]: "))
         if confirm.lower() not in ["y", "yes"]:
             print(gray("⏭️  Operation cancelled."))
             return 0
 
-    failures = 0
-    for anchor_obj in anchors:
-        name = anchor_obj.get("name")
-        if not name:
-            continue
-        result = pull_single(name, info)
-        if result != 0:
-            failures += 1
+        names = resolve_overwrites(names, yes)
+        failures = pull_many(names, info, jobs)
 
     if failures == 0:
         print(green("✅ All anchors pulled successfully"))
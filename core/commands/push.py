@@ -1,12 +1,14 @@
 import os
 import json
 import requests
-from core.utils.server_utils import load_server_info
+from core.utils.server_utils import load_server_info, get_session
 from core.utils.path import resolve_path
 from core.utils.colors import green, red, yellow, blue
 from core.utils import filter as anchor_filter
+from core.utils import blob_store
 
 ANCHOR_DIR = os.environ.get("ANCHOR_DIR", os.path.expanduser("~/.anchors/data"))
+BULK_CHUNK = int(os.environ.get("ANC_PUSH_CHUNK", "200"))
 
 def push_anchor(name: str, info: dict):
     if not name.endswith(".json"):
@@ -34,10 +36,13 @@ def push_anchor(name: str, info: dict):
         "Content-Type": "application/json"
     }
 
+    if not push_blobs(data, info):
+        return 1
+
     upload_url = f"{server_url}/db/upload/{filename}"
 
     try:
-        response = requests.post(upload_url, headers=headers, json=data)
+        response = get_session().post(upload_url, headers=headers, json=data)
     except Exception as e:
         print(red(f"❌ Error connecting to server: {e}"))
         return 1
@@ -50,6 +55,18 @@ def push_anchor(name: str, info: dict):
         print(yellow("Server response:"), response.text)
         return 1
 
+def push_blobs(data: dict, info: dict) -> bool:
+    """Sube los blobs locales (cr --max-inline) que referencia el anchor antes de subirlo."""
+    try:
+        uploaded = blob_store.upload_local_blobs(data, info["url"], {"Authorization": f"Bearer {info['token']}"})
+    except Exception as e:
+        print(red(f"❌ Failed to upload external files of '{data.get('name')}': {e}"))
+        return False
+    if uploaded:
+        print(blue(f"📦 {uploaded} external file(s) uploaded for '{data.get('name')}'"))
+    return True
+
+
 def push_command(name: str = None, filter_str: str = None):
     info = load_server_info()
     if not info:
@@ -59,7 +76,7 @@ def push_command(name: str = None, filter_str: str = None):
     if name:
         return push_anchor(name, info)
 
-    matched = anchor_filter.filter_anchors(filter_str)
+    matched = anchor_filter.filter_anchor_names(filter_str, ANCHOR_DIR)
     if not matched:
         print(yellow("⚠️  No anchors matched the filter."))
         return 1
@@ -77,15 +94,77 @@ def push_command(name: str = None, filter_str: str = None):
 
     print(blue("\nStarting upload...\n"))
 
-
     failures = 0
-    for anchor_name in matched:
-        result = push_anchor(anchor_name, info)
-        if result != 0:
-            failures += 1
+    for start in range(0, len(matched), BULK_CHUNK):
+        failures += push_bulk(matched[start:start + BULK_CHUNK], info)
 
     if failures == 0:
         print(green("✅ All anchors pushed successfully"))
     else:
         print(red(f"❌ {failures} anchor(s) failed to push"))
     return failures
+
+
+def push_bulk(names: list, info: dict) -> int:
+    """
+    Sube un lote de anchors en una sola petición a /db/upload_bulk (NDJSON).
+    Servidores sin ese endpoint: se cae al envío anchor por anchor.
+    Devuelve el número de fallos.
+    """
+    server_url = info.get("url")
+    token = info.get("token")
+    if not token or not server_url:
+        print(red("❌ Missing server config. Run `anc server auth`."))
+        return len(names)
+
+    lines, sent, failures = [], [], 0
+    for name in names:
+        try:
+            with open(os.path.join(ANCHOR_DIR, f"{name}.json"), "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(red(f"❌ Could not read '{name}.json': {e}"))
+            failures += 1
+            continue
+        if not isinstance(data, dict):
+            print(red(f"❌ '{name}.json' is not a JSON object"))
+            failures += 1
+            continue
+        if not data.get("name"):
+            data["name"] = name
+        if not push_blobs(data, info):
+            failures += 1
+            continue
+        lines.append(json.dumps(data, separators=(",", ":")))
+        sent.append(name)
+
+    if not sent:
+        return failures
+
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/x-ndjson"
+    }
+    try:
+        response = get_session().post(f"{server_url}/db/upload_bulk", headers=headers, data="\n".join(lines).encode())
+    except requests.exceptions.RequestException as e:
+        print(red(f"❌ Error connecting to server: {e}"))
+        return failures + len(sent)
+
+    if response.status_code in (404, 405):
+        return failures + sum(1 for name in sent if push_anchor(name, info) != 0)
+
+    if response.status_code not in (200, 201):
+        print(red(f"❌ Bulk upload failed ({response.status_code})"))
+        print(yellow("Server response:"), response.text)
+        return failures + len(sent)
+
+    for name, result in zip(sent, response.json().get("results", [])):
+        if result.get("status") == "ok":
+            print(green(f"✅ '{name}.json' pushed successfully"))
+        elif result.get("status") == "skipped":
+            print(yellow(f"⚠️  '{name}.json' skipped: {result.get('error')}"))
+        else:
+            print(red(f"❌ '{name}.json' failed: {result.get('error')}"))
+            failures += 1
+    return failures
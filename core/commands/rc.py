@@ -4,12 +4,12 @@ import os
 import sys
 import json
 import base64
-import urllib.request
 import re
 import hashlib
 import subprocess
 from core.utils.colors import red, green, cyan, bold
 from core.utils.path import resolve_path
+from core.utils import file_transfer, blob_store
 from pathlib import Path
 import pwd
 import grp
@@ -71,12 +71,13 @@ def resolve_url_from_ref(ref, path):
     return base_url.rstrip("/") + "/" + path.lstrip("/")
 
 
-def download_file(url, dest):
+def download_file(url, dest, expected_sha256=None):
+    # Ya está y coincide el sha256: no se descarga
+    if expected_sha256 and os.path.isfile(dest) and file_transfer.sha256_file(dest) == expected_sha256:
+        skipped_files.append(dest)
+        return True
     try:
-        with urllib.request.urlopen(url) as response:
-            content = response.read()
-            with open(dest, "wb") as f:
-                f.write(content)
+        file_transfer.download(url, dest, expected_sha256, headers=file_transfer.auth_headers(url))
         changed_files.append(dest)
         return True
     except Exception as e:
@@ -85,6 +86,27 @@ def download_file(url, dest):
 
 
 
+def restore_external(file_data, dest, rel_path):
+    """Fichero externo: almacén local de blobs (o /blobs del servidor) o URL/ref."""
+    sha256 = file_data.get("sha256")
+    if blob_store.is_blob_entry(file_data) or blob_store.has_blob(sha256):
+        try:
+            result = blob_store.materialize(sha256, dest)
+        except Exception as e:
+            print(red(f"❌ Failed to restore {rel_path}: {e}"))
+            return False
+        (skipped_files if result == "skipped" else changed_files).append(dest)
+        return True
+
+    url = resolve_url_from_ref(file_data.get("ref", ""), file_data.get("path", "")) \
+          if file_data.get("ref") else file_data.get("path", "")
+    if not url:
+        print(red(f"❌ No URL or ref for external file {rel_path}"))
+        return False
+    return download_file(url, dest, sha256)
+
+
+
 def write_file_from_content(dest, file_data):
     try:
         content = file_data.get("content", "")
@@ -275,7 +297,14 @@ def recreate_from_anchor(anchor_name, target_path):
 
         mode = file_data.get("mode", "replace")
 
-        if mode == "replace":
+        if file_data.get("external") and file_data.get("sha256"):
+            # Se compara el sha256, sin leer el blob
+            try:
+                if file_transfer.sha256_file(dest) != file_data["sha256"]:
+                    preview_changes.append(f"[CHG]  {dest}")
+            except Exception as e:
+                preview_changes.append(f"[???]  {dest} ({e})")
+        elif mode == "replace":
             try:
                 content = file_data.get("content", "")
                 encoding = file_data.get("encoding", "plain")
@@ -329,13 +358,7 @@ def recreate_from_anchor(anchor_name, target_path):
         os.makedirs(os.path.dirname(dest), exist_ok=True)
 
         if file_data.get("external"):
-            url = resolve_url_from_ref(file_data.get("ref", ""), file_data.get("path", "")) \
-                  if file_data.get("ref") else file_data.get("path", "")
-            if url:
-                if not download_file(url, dest):
-                    continue
-            else:
-                print(red(f"❌ No URL or ref for external file {rel_path}"))
+            if not restore_external(file_data, dest, rel_path):
                 continue
         else:
             write_file_from_content(dest, file_data)
@@ -2,6 +2,7 @@ import json
 import requests
 from pathlib import Path
 from core.utils.colors import red, green, yellow
+from core.utils import secret_cache
 
 def run(args):
     if not args.id:
@@ -36,6 +37,7 @@ def run(args):
         return
 
     if response.status_code == 200:
+        secret_cache.invalidate(ref_id)
         print(green(f"✅ Secret '{ref_id}' deleted successfully."))
     elif response.status_code == 403:
         print(red("❌ Access denied: only the creator can delete this secret."))
@@ -1,5 +1,6 @@
 import json
 import requests
+from core.utils.server_utils import get_session
 from pathlib import Path
 from core.utils.colors import red, green
 
@@ -27,7 +28,7 @@ def run(args):
     url = f"{server_url.rstrip('/')}/ref/get/{ref_id}"
 
     try:
-        res = requests.get(url, headers={"Authorization": f"Bearer {token}"}, timeout=5)
+        res = get_session().get(url, headers={"Authorization": f"Bearer {token}"}, timeout=5)
         if res.status_code == 404:
             print(red(f"Secret '{ref_id}' not found."))
             return
@@ -1,5 +1,6 @@
 import json
 import requests
+from core.utils.server_utils import get_session
 from pathlib import Path
 from core.utils.colors import red, green, blue, yellow, gray
 
@@ -22,7 +23,7 @@ def run(args):
     url = f"{server_url.rstrip('/')}/ref/list"
 
     try:
-        response = requests.get(
+        response = get_session().get(
             url,
             headers={"Authorization": f"Bearer {token}"},
             timeout=5
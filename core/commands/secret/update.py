@@ -3,6 +3,7 @@ import requests
 from pathlib import Path
 from getpass import getpass
 from core.utils.colors import red, green, yellow, blue
+from core.utils import secret_cache
 
 def run(args):
     if not args.id:
@@ -122,4 +123,5 @@ def run(args):
         print(red(f"Connection error:\n{e}"))
         return
 
+    secret_cache.invalidate(ref_id)
     print(green(f"\n✅ Secret '{ref_id}' updated successfully."))
@@ -1,4 +1,4 @@
-from . import auth, ls, url, status
+from . import auth, ls, url, status, indexes
 
 def run(action, args):
     if action == "auth":
@@ -9,5 +9,7 @@ def run(action, args):
         return url.run(args)
     elif action == "status":
         return status.run(args)
+    elif action == "indexes":
+        return indexes.run(args)
     else:
         print(f"❌ Unknown server command: {action}")
@@ -0,0 +1,68 @@
+import json
+import requests
+from core.utils.server_utils import get_session
+from pathlib import Path
+from core.utils.colors import red, green, yellow, gray, bold
+
+
+def run(args):
+    info_path = Path.home() / ".anchors" / "server" / "info.json"
+    if not info_path.exists():
+        print(red("No remote server configured. Use: anc server url <url>"))
+        return 1
+
+    with open(info_path) as f:
+        server_info = json.load(f)
+
+    server_url = server_info.get("url")
+    token = server_info.get("token")
+    if not server_url or not token:
+        print(red("Missing server URL or token. Use `anc server auth` to authenticate."))
+        return 1
+
+    # `anc server indexes ensure` crea los que falten
+    method = "post" if args.value == "ensure" else "get"
+    try:
+        response = getattr(get_session(), method)(
+            f"{server_url.rstrip('/')}/admin/indexes",
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=30
+        )
+    except requests.exceptions.RequestException as e:
+        print(red(f"Connection error:\n{e}"))
+        return 1
+
+    if response.status_code == 403:
+        print(red("Only members of 'admins' can inspect indexes."))
+        return 1
+    if response.status_code != 200:
+        print(red(f"Server error: {response.status_code} {response.text}"))
+        return 1
+
+    report = response.json()
+    if method == "post":
+        for collection, results in report.items():
+            print(bold(collection))
+            for name, result in results.items():
+                fmt = red if result.startswith("error") else green
+                print(f"  {name:<16} {fmt(result)}")
+        return 0
+
+    problems = 0
+    for collection, r in report.items():
+        print(bold(collection))
+        for name in r.get("missing", []):
+            print(f"  {red('missing')}     {name}")
+        for name in r.get("undeclared", []):
+            print(f"  {yellow('undeclared')}  {name}")
+        for name in r.get("unused", []):
+            print(f"  {yellow('unused')}      {name}")
+        for name, usage in r.get("usage", {}).items():
+            print(gray(f"  {name:<16} {usage['ops']} ops since {usage['since']}"))
+        problems += len(r.get("missing", []))
+
+    if problems:
+        print(yellow(f"⚠️  {problems} missing index(es). Run `anc server indexes ensure`."))
+    else:
+        print(green("✅ All declared indexes exist"))
+    return 0
@@ -1,5 +1,6 @@
 import json
 import requests
+from core.utils.server_utils import iter_pages
 from pathlib import Path
 from core.utils.colors import red, green, blue, yellow, gray
 
@@ -21,41 +22,40 @@ def run(args):
 
     # 🧠 Añadir filtro si viene
     filter_str = args.filter or ""
-    url = f"{server_url}/db/list"
-    if filter_str:
-        from urllib.parse import quote
-        url += f"?filter={quote(filter_str)}"
+    params = {"filter": filter_str} if filter_str else {}
 
+    # Páginas de /db/list: se imprimen según llegan
+    total = 0
     try:
-        response = requests.get(
-            url,
+        for anchors in iter_pages(
+            f"{server_url}/db/list",
             headers={"Authorization": f"Bearer {token}"},
-            timeout=5
-        )
+            params=params
+        ):
+            if anchors and not total:
+                print(green("Anchors (remote):"))
+            total += len(anchors)
+            for anchor in anchors:
+                print_anchor(anchor)
+    except requests.exceptions.HTTPError as e:
+        print(red(f"Server error: {e.response.status_code} {e.response.text}"))
+        return
     except requests.exceptions.RequestException as e:
         print(red(f"Connection error:\n{e}"))
         return
 
-    if response.status_code != 200:
-        print(red(f"Server error: {response.status_code} {response.text}"))
-        return
-
-    anchors = response.json()
-    if not anchors:
+    if not total:
         print(yellow("No anchors found."))
-        return
-
-    print(green("Anchors (remote):"))
 
-    for anchor in anchors:
-        name = anchor.get("name", "")
-        type_ = anchor.get("type", "")
-        path = anchor.get("path") or anchor.get("endpoint", {}).get("base_url") or "(no path)"
-        updated = anchor.get("last_updated", "")
 
-        type_fmt = f"[{type_}]"
-        path_fmt = gray(path)
-        updated_fmt = gray(updated)
+def print_anchor(anchor):
+    name = anchor.get("name", "")
+    type_ = anchor.get("type", "")
+    path = anchor.get("path") or anchor.get("endpoint", {}).get("base_url") or "(no path)"
+    updated = anchor.get("last_updated", "")
 
-        print(f"  ⚓ {blue(name):<20} {type_fmt:<10} → {path_fmt:<40} {updated_fmt}")
+    type_fmt = f"[{type_}]"
+    path_fmt = gray(path)
+    updated_fmt = gray(updated)
 
+    print(f"  ⚓ {blue(name):<20} {type_fmt:<10} → {path_fmt:<40} {updated_fmt}")
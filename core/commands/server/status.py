@@ -1,5 +1,6 @@
 import json
 import requests
+from core.utils.server_utils import get_session
 from pathlib import Path
 from core.utils.colors import green, red, blue, dim
 
@@ -21,7 +22,7 @@ def run(args):
     print(dim(f"Server: {url}"))
 
     try:
-        response = requests.get(f"{url}/health", timeout=5)
+        response = get_session().get(f"{url}/health", timeout=5)
         if response.status_code != 200:
             print(red("❌ Server responded with an error"))
             print(response.text)
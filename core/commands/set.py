@@ -3,8 +3,9 @@ import json
 import subprocess
 from datetime import datetime, timezone
 from collections import OrderedDict
+from pathlib import Path
 
-from core.utils.colors import red, green, blue, yellow, cyan, bold
+from core.utils.colors import red, green, blue, yellow, cyan, bold, gray
 from core.utils.path import resolve_path
 from core.utils.docker_meta import generate_docker_metadata
 
@@ -343,21 +344,41 @@ def run(args):
 
             confirm = input("Do you want to upload them now? [y/N] ").strip().lower()
             if confirm in ("y", "yes"):
-                upload_url = input("Enter base upload URL (e.g. http://localhost:17017/files): ").strip().rstrip("/")
+                import getpass
+                from core.utils import file_transfer
+                from core.utils.file_transfer import upload, upload_blob
+                info_path = Path.home() / ".anchors" / "server" / "info.json"
+                info = json.loads(info_path.read_text()) if info_path.exists() else {}
+                default_url = info.get("url", "")
+                hint = f" [{default_url}]" if default_url else " (e.g. http://localhost:17017)"
+                server_url = input(f"Enter server URL{hint}: ").strip().rstrip("/") or default_url
+                if server_url.endswith("/files"):
+                    server_url = server_url[:-len("/files")]
+                # /blobs y las subidas de /files exigen usuario: el token configurado
+                # para ese servidor o, si es otro, uno que se pide aquí
+                headers = file_transfer.auth_headers(server_url)
+                if headers is None:
+                    token = getpass.getpass(f"Token for {server_url} (empty = none): ").strip()
+                    headers = {"Authorization": f"Bearer {token}"} if token else None
+                if headers is None:
+                    print(yellow("⚠️  No token: servers that require login will reject the uploads (401)"))
+
                 for relpath in big_files:
                     absf = os.path.join(base_path, relpath)
+                    entry = docker["files"][relpath]
                     print(f"⬆️  Uploading {relpath} ...", end=" ", flush=True)
                     try:
-                        import requests
-                        with open(absf, "rb") as f:
-                            response = requests.post(upload_url + "/upload", files={"file": (os.path.basename(relpath), f)})
-                        if response.status_code == 200:
-                            rj = response.json()
-                            docker["files"][relpath]["path"] = upload_url + "/" + os.path.basename(relpath)
-                            docker["files"][relpath]["ref"] = None
-                            print(green("done"))
-                        else:
-                            print(red(f"❌ failed ({response.status_code})"))
+                        # Almacén por contenido: si el servidor ya tiene ese sha256 no se sube
+                        result = upload_blob(server_url, absf, headers, sha256=entry.get("sha256"))
+                        if result is None:
+                            # Servidor sin /blobs: subida por nombre a /files
+                            result = upload(server_url + "/files", absf, headers)
+                            result["path"] = "/files/" + result.get("filename", os.path.basename(relpath))
+                        entry["path"] = server_url + result["path"]
+                        entry["ref"] = None
+                        if result.get("sha256"):
+                            entry["sha256"] = result["sha256"]
+                        print(green("done") if result.get("uploaded", True) else gray("already on server"))
                     except Exception as e:
                         print(red(f"❌ {e}"))
 
@@ -7,6 +7,7 @@ from tempfile import NamedTemporaryFile
 
 from core.utils.path import resolve_path
 from core.utils import filter as anchor_filter
+from core.utils import blob_store
 
 DATA_DIR = Path(resolve_path("~/.anchors/data"))
 TEMPLATES_DIR = Path(resolve_path("~/.anchors/templates"))
@@ -202,6 +203,22 @@ def expand_from_anchor(anchor_name):
                 "ansible.builtin.copy": copy_task,
                 "become": props.get("become", False)
             })
+
+        elif props.get("mode") == "replace" and blob_store.is_blob_entry(props):
+            # Contenido fuera del anchor (cr --max-inline): se copia desde el blob local
+            src = blob_store.fetch(props.get("sha256"))
+            if src is None:
+                raise FileNotFoundError(f"Blob {props.get('sha256')} de '{raw_path}' no disponible (ni en local ni en el servidor)")
+            tasks.append({
+                "name": f"Write {os.path.basename(raw_path)}",
+                "ansible.builtin.copy": {
+                    "dest": raw_path,
+                    "src": str(src),
+                    "force": True,
+                    "mode": props.get("perm", "0644")
+                },
+                "become": props.get("become", False)
+            })
         
 
     # POSTLOAD scripts
@@ -0,0 +1,180 @@
+import json
+import os
+
+import requests
+
+from core.utils import index as anchor_index
+from core.utils.colors import red, green, blue, yellow, gray, bold
+from core.utils.filter import filter_anchor_names
+from core.utils.server_utils import load_server_info, get_session
+from core.commands import push, pull
+
+# Sincronización incremental con el servidor.
+# Se comparan los hashes de contenido locales (índice) con el manifest del
+# servidor (/db/manifest) y con el hash de la última sincronización (base),
+# guardado en $ANCHOR_DIR/.anc_sync. Solo se transfieren los anchors que
+# difieren; nunca se borra nada en ninguno de los dos lados.
+
+SYNC_FILE = ".anc_sync"
+SYNC_VERSION = 1
+
+
+def _state_path(anchor_dir):
+    return os.path.join(anchor_dir, SYNC_FILE)
+
+
+def load_state(anchor_dir, server_url) -> dict:
+    try:
+        with open(_state_path(anchor_dir), "r") as f:
+            state = json.load(f)
+        if state.get("version") == SYNC_VERSION:
+            return state.get("servers", {}).get(server_url, {})
+    except Exception:
+        pass
+    return {}
+
+
+def save_state(anchor_dir, server_url, base: dict):
+    path = _state_path(anchor_dir)
+    try:
+        with open(path, "r") as f:
+            state = json.load(f)
+        if state.get("version") != SYNC_VERSION:
+            raise ValueError
+    except Exception:
+        state = {"version": SYNC_VERSION, "servers": {}}
+
+    state.setdefault("servers", {})[server_url] = base
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def fetch_manifest(info, filter_str=None) -> dict:
+    params = {"filter": filter_str} if filter_str else {}
+    response = get_session().get(
+        f"{info['url']}/db/manifest",
+        headers={"Authorization": f"Bearer {info['token']}"},
+        params=params,
+        timeout=30
+    )
+    response.raise_for_status()
+    return {name: entry[0] for name, entry in response.json().get("anchors", {}).items()}
+
+
+def plan(local: dict, remote: dict, base: dict, prefer: str = None) -> dict:
+    """
+    Decide qué hacer con cada anchor a partir de los hashes local, remoto
+    y base (última sincronización). Devuelve listas de nombres por acción.
+    """
+    actions = {"push": [], "pull": [], "conflict": [], "same": [], "local_deleted": [], "remote_deleted": []}
+    # Cambiado en los dos lados (o borrado en uno y cambiado en el otro)
+    on_conflict = {"local": "push", "remote": "pull"}.get(prefer, "conflict")
+
+    for name in sorted(set(local) | set(remote)):
+        l, r, b = local.get(name), remote.get(name), base.get(name)
+
+        if l == r:
+            action = "same"
+        elif r is None:
+            if b is None:
+                action = "push"
+            elif b == l:
+                action = "remote_deleted"
+            else:
+                action = "push" if on_conflict == "push" else "conflict"
+        elif l is None:
+            if b is None:
+                action = "pull"
+            elif b == r:
+                action = "local_deleted"
+            else:
+                action = "pull" if on_conflict == "pull" else "conflict"
+        elif b == r:
+            action = "push"
+        elif b == l:
+            action = "pull"
+        else:
+            action = on_conflict
+
+        actions[action].append(name)
+
+    return actions
+
+
+def run(args):
+    info = load_server_info()
+    if not info or not info.get("url") or not info.get("token"):
+        print(red("❌ Server not configured. Use `anc server auth`."))
+        return 1
+
+    anchor_dir = args.anchor_dir
+    server_url = info["url"]
+
+    entries = anchor_index.refresh_index(anchor_dir)
+    names = filter_anchor_names(args.filter, anchor_dir) if args.filter else sorted(entries)
+    local = {name: entries[name]["hash"] for name in names if name in entries}
+
+    try:
+        remote = fetch_manifest(info, args.filter)
+    except requests.exceptions.RequestException as e:
+        print(red(f"❌ Failed to fetch manifest: {e}"))
+        return 1
+
+    base = load_state(anchor_dir, server_url)
+    actions = plan(local, remote, base, args.prefer)
+    if args.push_only:
+        actions["pull"] = []
+    if args.pull_only:
+        actions["push"] = []
+
+    print(blue(f"🔄 {len(local)} local / {len(remote)} remote anchor(s), {len(actions['same'])} in sync"))
+    for label, key, fmt in (
+        ("⬆️  push", "push", green),
+        ("⬇️  pull", "pull", green),
+        ("⚠️  conflict", "conflict", yellow),
+        ("🗑️  deleted locally, unchanged on server (skipped)", "local_deleted", gray),
+        ("🗑️  missing on server, unchanged locally (skipped)", "remote_deleted", gray),
+    ):
+        if actions[key]:
+            print(bold(f"{label}: {len(actions[key])}"))
+            for name in actions[key]:
+                print(f"  ⚓ {fmt(name)}")
+
+    if args.dry_run:
+        print(gray("Dry run: nothing transferred."))
+        return 0
+
+    failures = 0
+    new_base = dict(base)
+    for name in actions["same"]:
+        new_base[name] = local[name]
+
+    for start in range(0, len(actions["push"]), push.BULK_CHUNK):
+        chunk = actions["push"][start:start + push.BULK_CHUNK]
+        failures += push.push_bulk(chunk, info)
+
+    pushed = set(actions["push"])
+    failures += pull.pull_many(actions["pull"], info, args.jobs)
+
+    # Base = hash actual en ambos lados tras transferir
+    entries = anchor_index.refresh_index(anchor_dir)
+    try:
+        remote_after = fetch_manifest(info, args.filter) if pushed else remote
+    except requests.exceptions.RequestException:
+        remote_after = {}
+    for name in pushed | set(actions["pull"]):
+        h = entries.get(name, {}).get("hash")
+        if h and remote_after.get(name) == h:
+            new_base[name] = h
+
+    save_state(anchor_dir, server_url, new_base)
+
+    if actions["conflict"]:
+        print(yellow(f"⚠️  {len(actions['conflict'])} conflict(s) left untouched. Use --prefer local|remote to resolve."))
+    if failures:
+        print(red(f"❌ {failures} anchor(s) failed to sync"))
+    else:
+        print(green("✅ Sync completed"))
+    return 1 if failures or actions["conflict"] else 0
@@ -11,7 +11,7 @@ import tempfile
 import re
 import os
 import sys
-from core.utils.secrets import resolve_secrets
+from core.utils.secrets import resolve_secrets, prefetch_secrets
 
 
 DATA_DIR = Path(resolve_path("~/.anchors/data"))
@@ -545,6 +545,9 @@ def handle_wf(args):
     if data.get("type") != "workflow":
         raise ValueError("Anchor must be of type 'workflow'")
 
+    # Todos los [[secret:id]] del workflow en una sola petición (/ref/get_many)
+    prefetch_secrets(data)
+
     raw_vars = data.get("vars", {})
     global_vars = {k: resolve_secrets(v) if isinstance(v, str) else v for k, v in raw_vars.items()}
 
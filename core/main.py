@@ -1,26 +1,57 @@
 #!/usr/bin/env python3
 import argparse
+import importlib
 import os
 import sys
 
 # Add path root  PYTHONPATH
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-# Import subcommands
-from commands import ls, meta, url
-from commands import set as set_cmd
-from commands import delete
-from commands import ldap as ldap_cmd
-from commands import server as server_cmd  
-from commands import push, pull
-from core.commands.cr import handle_cr
 from argparse import RawTextHelpFormatter
-from core.commands.sible import handle_sible
-from core.commands.edit import handle_edit
-from core.commands.doc import generate_doc
-from core.commands import secret
-from core.commands import rc
-from core.commands import wf
+
+
+def lazy(module, attr):
+    """
+    Resuelve el handler de un subcomando solo cuando se ejecuta, así
+    `anc ls` no paga el import de ldap3, requests, jinja2, yaml...
+    """
+    def handler(*args, **kwargs):
+        return getattr(importlib.import_module(module), attr)(*args, **kwargs)
+    handler.__qualname__ = f"{module}.{attr}"
+    return handler
+
+
+def startup_profile(argv):
+    """
+    Ejecuta el comando con `python -X importtime` y resume en stderr
+    el tiempo de import por módulo y el tiempo total de arranque.
+    """
+    import subprocess
+    import time
+
+    cmd = [sys.executable, "-X", "importtime", os.path.abspath(__file__), *argv]
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, stderr=subprocess.PIPE, text=True)
+    wall = time.perf_counter() - start
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            sys.stderr.write(line + "\n")
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        self_us, cumulative_us, name = int(parts[0]), int(parts[1]), parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((cumulative_us, self_us, depth, name.strip()))
+
+    top_level = sum(c for c, _, depth, _ in rows if depth == 0)
+    print(f"\n⏱️  startup profile: {wall * 1000:.1f} ms wall, {top_level / 1000:.1f} ms in imports", file=sys.stderr)
+    print(f"{'cumulative':>12} {'self':>10}  module", file=sys.stderr)
+    for cumulative, self_us, depth, name in sorted(rows, reverse=True)[:25]:
+        print(f"{cumulative / 1000:10.1f}ms {self_us / 1000:8.1f}ms  {'  ' * depth}{name}", file=sys.stderr)
+    return proc.returncode
 
 
 
@@ -34,8 +65,13 @@ def load_help(command):
 
 
 
-def main():
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if "--startup-profile" in argv:
+        return startup_profile([a for a in argv if a != "--startup-profile"])
+
     parser = argparse.ArgumentParser(prog="anc", description="Anchor CLI")
+    parser.add_argument("--startup-profile", action="store_true", help="Report import time per module (stderr)")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     # ls
@@ -43,7 +79,7 @@ def main():
     ls_parser.add_argument("-f", "--filter", help="Filter in key=value format (supports AND/OR, ~, !=, etc.)")
     ls_parser.add_argument("-u", "--url", action="store_true", help="List anchors of type 'url'")
     ls_parser.add_argument("-e", "--env", action="store_true", help="List anchors of type 'env'")
-    ls_parser.set_defaults(func=ls.run)
+    ls_parser.set_defaults(func=lazy("core.commands.ls", "run"))
 
 
     # set
@@ -75,14 +111,14 @@ def main():
     set_parser.add_argument("--workflow", metavar="NAME", help="Create a workflow anchor")
 
 
-    set_parser.set_defaults(func=set_cmd.run)
+    set_parser.set_defaults(func=lazy("core.commands.set", "run"))
 
 
     # del
     del_parser = subparsers.add_parser("del", help="Delete anchors")
     del_parser.add_argument("name", nargs="?", help="Anchor name")
     del_parser.add_argument("-f", "--filter", help="Filter in key=value format")
-    del_parser.set_defaults(func=delete.run)
+    del_parser.set_defaults(func=lazy("core.commands.delete", "run"))
 
 
     # meta
@@ -90,7 +126,7 @@ def main():
     meta_parser.add_argument("-f", "--filter", help="Filter anchors")
     meta_parser.add_argument("args", nargs="*", help="Anchor name followed by key=value pairs")
     meta_parser.add_argument("--del", nargs="+", dest="delete", help="Keys to delete")
-    meta_parser.set_defaults(func=meta.run)
+    meta_parser.set_defaults(func=lazy("core.commands.meta", "run"))
 
 
     # doc
@@ -98,7 +134,7 @@ def main():
     doc_parser.add_argument("name", help="Anchor name (or anchor filename without .json)")
     doc_parser.add_argument("--out", help="Write to a specific markdown file (default: <name>.md)")
     doc_parser.add_argument("--print", action="store_true", help="Print to stdout instead of writing to a file")
-    doc_parser.set_defaults(func=lambda args: generate_doc(args.name, args.out, args.print))
+    doc_parser.set_defaults(func=lambda args: lazy("core.commands.doc", "generate_doc")(args.name, args.out, args.print))
 
 
     # url
@@ -112,7 +148,7 @@ def main():
     url_parser.add_argument("route_path", nargs="?", help="Route path (e.g. /users)")
     url_parser.add_argument("kv", nargs="*", help="key=value pairs and optional status code")
     url_parser.add_argument("-F", "--files", action="store_true", help="Send files as multipart/form-data") 
-    url_parser.set_defaults(func=url.run)
+    url_parser.set_defaults(func=lazy("core.commands.url", "run"))
 
 
 
@@ -121,15 +157,17 @@ def main():
     rc_parser = subparsers.add_parser("rc", help="Restore environment from anchor files")
     rc_parser.add_argument("anchor", help="Anchor name to restore")
     rc_parser.add_argument("path", nargs="?", help="Target path to restore files into")
-    rc_parser.set_defaults(func=rc.run)
+    rc_parser.set_defaults(func=lazy("core.commands.rc", "run"))
 
     
     # cr
     cr_parser = subparsers.add_parser("cr", help="Create JSON structure from files/directories", description=load_help("cr"), formatter_class=argparse.RawTextHelpFormatter, usage=argparse.SUPPRESS)
     cr_parser.add_argument("name", help="Anchor name")
     cr_parser.add_argument("--mode", help="Default mode if none is specified")
+    cr_parser.add_argument("-j", "--jobs", type=int, help="Files read/encoded in parallel (default: 4 x CPUs, max 32)")
+    cr_parser.add_argument("--max-inline", help="Store files larger than SIZE (e.g. 10M) in ~/.anchors/blobs instead of the anchor")
     cr_parser.add_argument("paths", nargs=argparse.REMAINDER, help="Paths with optional --mode and --blank")
-    cr_parser.set_defaults(func=handle_cr)
+    cr_parser.set_defaults(func=lazy("core.commands.cr", "handle_cr"))
 
     
 
@@ -137,7 +175,7 @@ def main():
     edit_parser = subparsers.add_parser("edit", help="Edit anchor or file (JSON/YAML)", description=load_help("edit"), formatter_class=argparse.RawTextHelpFormatter, usage=argparse.SUPPRESS)
     edit_parser.add_argument("name", help="Anchor name or path to JSON file")
     edit_parser.add_argument("--yml", action="store_true", help="Edit using YAML format")
-    edit_parser.set_defaults(func=handle_edit)
+    edit_parser.set_defaults(func=lazy("core.commands.edit", "handle_edit"))
 
 
     # ldap
@@ -163,18 +201,18 @@ def main():
     ldap_parser.add_argument("--delete", action="store_true", help="Import LDIF entries with delete operation")
 
 
-    ldap_parser.set_defaults(func=ldap_cmd.run)
+    ldap_parser.set_defaults(func=lazy("core.commands.ldap", "run"))
 
 
 
     # server
     server_parser = subparsers.add_parser("server", help="Interact with remote server", description=load_help("server"), formatter_class=argparse.RawTextHelpFormatter, usage=argparse.SUPPRESS)
-    server_parser.add_argument("subcommand", choices=["auth", "ls", "url", "status"], help="Subcommand to run")
+    server_parser.add_argument("subcommand", choices=["auth", "ls", "url", "status", "indexes"], help="Subcommand to run")
     server_parser.add_argument("-u", "--username", help="LDAP username")
     server_parser.add_argument("-p", "--password", help="LDAP password")
     server_parser.add_argument("value", nargs="?", help="Value for the subcommand (e.g., server URL)")
     server_parser.add_argument("-f", "--filter", help="Filter anchors on remote server (e.g. env=prod AND type=url)")
-    server_parser.set_defaults(func=lambda args: server_cmd.run(args.subcommand, args))
+    server_parser.set_defaults(func=lambda args: lazy("core.commands.server", "run")(args.subcommand, args))
 
 
     
@@ -182,7 +220,7 @@ def main():
     push_parser = subparsers.add_parser("push", help="Push anchor(s) to the server", description=load_help("push"), formatter_class=argparse.RawTextHelpFormatter, usage=argparse.SUPPRESS)
     push_parser.add_argument("name", nargs="?", default=None, help="Anchor name (optional if using --filter)")
     push_parser.add_argument("-f", "--filter", dest="filter_str", help="Filter anchors by metadata (e.g. env=prod)")
-    push_parser.set_defaults(func=lambda args: push.push_command(args.name, args.filter_str))
+    push_parser.set_defaults(func=lambda args: lazy("core.commands.push", "push_command")(args.name, args.filter_str))
 
 
     # pull
@@ -191,16 +229,30 @@ def main():
     pull_parser.add_argument("-f", "--filter", help="Metadata filter (e.g. env=prod)")
     pull_parser.add_argument("--all", action="store_true", help="Download all visible anchors")
     pull_parser.add_argument("--yes", action="store_true", help="Skip confirmation prompt")
-    pull_parser.set_defaults(func=lambda args: pull.run(args.anchor, args.filter, args.all, args.yes))
+    pull_parser.add_argument("-j", "--jobs", type=int, default=8, help="Concurrent downloads (default: 8)")
+    pull_parser.set_defaults(func=lambda args: lazy("core.commands.pull", "run")(args.anchor, args.filter, args.all, args.yes, args.jobs))
 
     
 
+    # sync
+    sync_parser = subparsers.add_parser("sync", help="Incremental two-way sync with the server", description=load_help("sync"), formatter_class=argparse.RawTextHelpFormatter, usage=argparse.SUPPRESS)
+    sync_parser.add_argument("-f", "--filter", help="Only sync anchors matching this filter (e.g. env=prod)")
+    sync_parser.add_argument("--prefer", choices=["local", "remote"], help="Resolve conflicts keeping this side")
+    sync_parser.add_argument("--dry-run", action="store_true", help="Show what would be transferred")
+    sync_parser.add_argument("-j", "--jobs", type=int, default=8, help="Concurrent downloads (default: 8)")
+    direction = sync_parser.add_mutually_exclusive_group()
+    direction.add_argument("--push-only", action="store_true", help="Only upload local changes")
+    direction.add_argument("--pull-only", action="store_true", help="Only download remote changes")
+    sync_parser.set_defaults(func=lazy("core.commands.sync", "run"))
+
+
+
     # Sible (Ansible)
     sible_parser = subparsers.add_parser("sible", help="Execute ansible tasks defined in a template anchor", description=load_help("sible"), formatter_class=argparse.RawTextHelpFormatter, usage=argparse.SUPPRESS)
     sible_parser.add_argument("anchor", help="Anchor of type 'ansible' that defines the tasks to run")
     sible_parser.add_argument("host", nargs="?", help="One or more SSH anchors (comma-separated), or use -f to filter by metadata")
     sible_parser.add_argument("-f", "--filter", help="Metadata filter (e.g. env=prod AND project~web)")
-    sible_parser.set_defaults(func=handle_sible)
+    sible_parser.set_defaults(func=lazy("core.commands.sible", "handle_sible"))
 
 
 
@@ -227,22 +279,29 @@ def main():
     secret_parser.add_argument("--gedit", action="store_true", help="Allow group edit")
     secret_parser.add_argument("--secret", help="Literal plaintext value (exclusive with file)")
 
-    secret_parser.set_defaults(func=lambda args: secret.run(args.subcommand, args))    
+    secret_parser.set_defaults(func=lambda args: lazy("core.commands.secret", "run")(args.subcommand, args))    
     
 
 
 
 
 
+    # Daemon
+    daemon_parser = subparsers.add_parser("daemon", help="Long-lived local daemon for the shell functions (Unix socket)")
+    daemon_parser.add_argument("action", choices=["start", "stop", "status", "run"], help="run = foreground")
+    daemon_parser.set_defaults(func=lazy("core.commands.daemon", "run"))
+
+
+
     ## wf
     parser_wf = subparsers.add_parser("wf", description=load_help("wf"), formatter_class=argparse.RawTextHelpFormatter, usage=argparse.SUPPRESS)
     parser_wf.add_argument("anchor")
-    parser_wf.set_defaults(func=wf.handle_wf)
+    parser_wf.set_defaults(func=lazy("core.commands.wf", "handle_wf"))
 
 
 
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # Rutas globales desde entorno
     args.anchor_dir = os.environ.get("ANCHOR_DIR", os.path.expanduser("~/.anchors/data"))
@@ -253,4 +312,4 @@ def main():
     args.func(args)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
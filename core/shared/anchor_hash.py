@@ -0,0 +1,30 @@
+"""
+Content hash of an anchor, shared by the CLI and the server.
+
+The hash covers what the user edits, not bookkeeping: server metadata
+(timestamps, authors, version, blob references) and the name (it is the key) are left
+out, and keys are sorted, so the same anchor hashes the same locally
+and in MongoDB regardless of key order.
+"""
+import hashlib
+import json
+
+__all__ = ["META_KEYS", "content_hash"]
+
+META_KEYS = frozenset({
+    "_id",
+    "name",
+    "created_at",
+    "created_by",
+    "last_updated",
+    "updated_by",
+    "content_hash",
+    "version",
+    "blob_refs",
+})
+
+
+def content_hash(doc: dict) -> str:
+    content = {k: v for k, v in doc.items() if k not in META_KEYS}
+    raw = json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
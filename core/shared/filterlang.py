@@ -0,0 +1,306 @@
+"""
+Filter language shared by the CLI and the server.
+
+    expr       := or_expr
+    or_expr    := and_expr (OR and_expr)*
+    and_expr   := not_expr (AND not_expr)*
+    not_expr   := NOT not_expr | primary
+    primary    := '(' expr ')' | comparison
+    comparison := KEY ('=' | '!=' | '~' | '!~') VALUE
+
+Keywords are case-insensitive. VALUE is a bare word or a quoted string.
+`~`/`!~` test substrings of string values only (as MongoDB's $regex does).
+An expression is parsed once into a small AST of tuples and compiled into
+a closure, so matching a document is a plain function call.
+
+This module only depends on the standard library: the server imports it
+as a top-level module (`filterlang`), the CLI as `core.shared.filterlang`.
+"""
+import re
+from functools import lru_cache
+
+__all__ = [
+    "FilterSyntaxError",
+    "parse",
+    "compile_filter",
+    "compile_ast",
+    "filter_keys",
+    "to_mongo",
+    "get_nested",
+]
+
+
+class FilterSyntaxError(ValueError):
+    pass
+
+
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<lparen>\()
+  | (?P<rparen>\))
+  | (?P<cmp>(?P<key>[A-Za-z0-9_.]+)\s*(?P<op>!=|!~|=|~)\s*
+        (?P<val>"[^"]*"|'[^']*'|[^\s()]+))
+  | (?P<word>[A-Za-z]+)
+""", re.VERBOSE)
+
+_KEYWORDS = {"and": "AND", "or": "OR", "not": "NOT"}
+
+
+def tokenize(expr):
+    tokens = []
+    pos = 0
+    while pos < len(expr):
+        m = _TOKEN_RE.match(expr, pos)
+        if not m:
+            raise FilterSyntaxError(f"Unexpected input at position {pos}: {expr[pos:pos + 20]!r}")
+        kind = m.lastgroup
+        if m.group("cmp"):
+            val = m.group("val")
+            if len(val) >= 2 and val[0] == val[-1] and val[0] in "\"'":
+                val = val[1:-1]
+            tokens.append(("CMP", (m.group("key"), m.group("op"), val)))
+        elif kind == "lparen":
+            tokens.append(("(", None))
+        elif kind == "rparen":
+            tokens.append((")", None))
+        elif kind == "word":
+            word = m.group("word").lower()
+            if word not in _KEYWORDS:
+                raise FilterSyntaxError(f"Unexpected word {m.group('word')!r} at position {pos}")
+            tokens.append((_KEYWORDS[word], None))
+        pos = m.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def take(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self.or_expr()
+        if self.pos != len(self.tokens):
+            raise FilterSyntaxError(f"Unexpected token {self.peek()!r}")
+        return node
+
+    def or_expr(self):
+        node = self.and_expr()
+        while self.peek() == "OR":
+            self.take()
+            node = ("or", node, self.and_expr())
+        return node
+
+    def and_expr(self):
+        node = self.not_expr()
+        while self.peek() == "AND":
+            self.take()
+            node = ("and", node, self.not_expr())
+        return node
+
+    def not_expr(self):
+        if self.peek() == "NOT":
+            self.take()
+            return ("not", self.not_expr())
+        return self.primary()
+
+    def primary(self):
+        kind = self.peek()
+        if kind == "(":
+            self.take()
+            node = self.or_expr()
+            if self.peek() != ")":
+                raise FilterSyntaxError("Missing closing parenthesis")
+            self.take()
+            return node
+        if kind == "CMP":
+            key, op, val = self.take()[1]
+            if op in ("=", "!="):
+                val = normalize_value(val)
+            return ("cmp", key, op, val)
+        if kind is None:
+            raise FilterSyntaxError("Unexpected end of expression")
+        raise FilterSyntaxError(f"Unexpected token {kind!r}")
+
+
+def normalize_value(value):
+    """'true'/'false' become booleans; everything else stays a string."""
+    v = value.lower()
+    if v == "true":
+        return True
+    if v == "false":
+        return False
+    return value
+
+
+@lru_cache(maxsize=256)
+def parse(expr):
+    if not expr or not expr.strip():
+        return None
+    return _Parser(tokenize(expr)).parse()
+
+
+def get_nested(d, key):
+    for part in key.split("."):
+        if not isinstance(d, dict) or part not in d:
+            return None
+        d = d[part]
+    return d
+
+
+def _getter(key):
+    if "." not in key:
+        def get(data):
+            return data.get(key) if isinstance(data, dict) else None
+        return get
+    parts = tuple(key.split("."))
+
+    def get(data):
+        for part in parts:
+            if not isinstance(data, dict) or part not in data:
+                return None
+            data = data[part]
+        return data
+    return get
+
+
+def _equals(actual, expected):
+    if actual == expected:
+        return True
+    # Valores numéricos del documento contra literales numéricos del filtro
+    if isinstance(expected, str) and isinstance(actual, (int, float)) and not isinstance(actual, bool):
+        return str(actual) == expected
+    return False
+
+
+def _compile_cmp(key, op, expected):
+    get = _getter(key)
+
+    if op == "=":
+        def match(data):
+            actual = get(data)
+            if isinstance(actual, list):
+                return any(_equals(a, expected) for a in actual)
+            return _equals(actual, expected)
+    elif op == "!=":
+        def match(data):
+            actual = get(data)
+            if isinstance(actual, list):
+                return not any(_equals(a, expected) for a in actual)
+            return not _equals(actual, expected)
+    elif op in ("~", "!~"):
+        # Solo cadenas (o cadenas de una lista), como $regex en MongoDB:
+        # `version~1` no encuentra el número 1 ni aquí ni en el servidor
+        needle = str(expected)
+
+        def contains(data):
+            actual = get(data)
+            if isinstance(actual, list):
+                return any(isinstance(a, str) and needle in a for a in actual)
+            return isinstance(actual, str) and needle in actual
+
+        if op == "~":
+            match = contains
+        else:
+            def match(data):
+                return not contains(data)
+    else:
+        raise FilterSyntaxError(f"Unknown operator {op!r}")
+    return match
+
+
+def compile_ast(node):
+    if node is None:
+        return lambda data: True
+    kind = node[0]
+    if kind == "cmp":
+        return _compile_cmp(node[1], node[2], node[3])
+    if kind == "not":
+        inner = compile_ast(node[1])
+        return lambda data: not inner(data)
+    if kind == "and":
+        left, right = compile_ast(node[1]), compile_ast(node[2])
+        return lambda data: left(data) and right(data)
+    if kind == "or":
+        left, right = compile_ast(node[1]), compile_ast(node[2])
+        return lambda data: left(data) or right(data)
+    raise FilterSyntaxError(f"Unknown node {kind!r}")
+
+
+@lru_cache(maxsize=256)
+def compile_filter(expr):
+    """
+    Compile an expression into `match(data) -> bool`.
+    Raises FilterSyntaxError on invalid expressions.
+    """
+    return compile_ast(parse(expr))
+
+
+def filter_keys(expr) -> set:
+    """Dotted keys referenced by an expression."""
+    keys = set()
+    stack = [parse(expr)]
+    while stack:
+        node = stack.pop()
+        if node is None:
+            continue
+        if node[0] == "cmp":
+            keys.add(node[1])
+        else:
+            stack.extend(node[1:])
+    return keys
+
+
+# --- MongoDB ---
+
+def _mongo_cmp(key, op, value):
+    if isinstance(value, str) and op in ("=", "!="):
+        # Mismo criterio que _equals: "22" también encuentra el número 22
+        candidates = [value]
+        if re.fullmatch(r"-?\d+", value):
+            candidates.append(int(value))
+        elif re.fullmatch(r"-?\d+\.\d+", value):
+            candidates.append(float(value))
+        if op == "=":
+            return {key: {"$in": candidates}} if len(candidates) > 1 else {key: value}
+        return {key: {"$nin": candidates}}
+    if op == "=":
+        return {key: value}
+    if op == "!=":
+        return {key: {"$ne": value}}
+    pattern = re.escape(str(value))
+    if op == "~":
+        return {key: {"$regex": pattern}}
+    return {key: {"$not": re.compile(pattern)}}
+
+
+def _mongo(node):
+    kind = node[0]
+    if kind == "cmp":
+        return _mongo_cmp(node[1], node[2], node[3])
+    if kind == "not":
+        return {"$nor": [_mongo(node[1])]}
+    clauses = []
+    for child in node[1:]:
+        sub = _mongo(child)
+        # Aplanar (a AND b) AND c
+        if child[0] == kind:
+            clauses.extend(sub[f"${kind}"])
+        else:
+            clauses.append(sub)
+    return {f"${kind}": clauses}
+
+
+def to_mongo(expr) -> dict:
+    """Translate an expression into an equivalent MongoDB query."""
+    node = parse(expr)
+    if node is None:
+        return {}
+    return _mongo(node)
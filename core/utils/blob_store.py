@@ -0,0 +1,146 @@
+# core/utils/blob_store.py
+#
+# Almacén local por contenido para ficheros grandes de `anc cr --max-inline`:
+#   ~/.anchors/blobs/ab/cd/<sha256>
+# (misma estructura que el /blobs del servidor). El anchor solo guarda
+#   {"external": True, "size", "sha256", "ref": None, "path": "/blobs/<sha256>"}
+# y rc / sible lo resuelven aquí; si el blob no está en local se descarga
+# del servidor configurado (/blobs/<sha256>) y queda guardado.
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+
+from core.utils import file_transfer
+
+BLOBS_DIR = Path.home() / ".anchors" / "blobs"
+CHUNK_SIZE = 1024 * 1024
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+_SIZE_RE = re.compile(r"^(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?$", re.IGNORECASE)
+_UNITS = {"": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4}
+
+
+def parse_size(value) -> int:
+    """Tamaño en bytes desde 512K, 10M, 1.5G o un número de bytes."""
+    match = _SIZE_RE.match(str(value).strip())
+    if not match:
+        raise ValueError(f"❌ Invalid size: {value} (use e.g. 512K, 10M, 1G)")
+    return int(float(match.group(1)) * _UNITS[match.group(2).lower()])
+
+
+def blob_path(sha256: str) -> Path:
+    if not _SHA256_RE.match(sha256 or ""):
+        raise ValueError(f"Invalid sha256: {sha256}")
+    return BLOBS_DIR / sha256[:2] / sha256[2:4] / sha256
+
+
+def has_blob(sha256) -> bool:
+    return bool(_SHA256_RE.match(sha256 or "")) and blob_path(sha256).is_file()
+
+
+def blob_url_path(sha256: str) -> str:
+    return f"/blobs/{sha256}"
+
+
+def is_blob_entry(entry: dict) -> bool:
+    return bool(entry.get("external")) and str(entry.get("path", "")).startswith("/blobs/")
+
+
+def store_file(path) -> tuple:
+    """
+    Copia `path` al almacén calculando el sha256 en la misma pasada.
+    Devuelve (sha256, size); si el contenido ya estaba no se duplica.
+    """
+    tmp_dir = BLOBS_DIR / ".tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=tmp_dir)
+    try:
+        with os.fdopen(fd, "wb") as out, open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        sha256 = digest.hexdigest()
+        dest = blob_path(sha256)
+        if dest.is_file():
+            os.unlink(tmp_path)
+        else:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, dest)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return sha256, size
+
+
+def _server_info() -> dict:
+    info_path = Path.home() / ".anchors" / "server" / "info.json"
+    try:
+        return json.loads(info_path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def fetch(sha256: str):
+    """Ruta local del blob; lo descarga del servidor si hace falta. None si no se pudo."""
+    dest = blob_path(sha256)
+    if dest.is_file():
+        return dest
+    server_url = _server_info().get("url")
+    if not server_url:
+        return None
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        file_transfer.download(f"{server_url.rstrip('/')}{blob_url_path(sha256)}", str(dest), sha256,
+                               headers=file_transfer.auth_headers())  # /blobs exige usuario
+    except file_transfer.TransferError:
+        return None
+    return dest
+
+
+def materialize(sha256: str, dest) -> str:
+    """
+    Copia el blob a `dest`. "skipped" si ya tenía ese contenido, "copied"
+    si se escribió; lanza FileNotFoundError si el blob no está disponible.
+    """
+    if os.path.isfile(dest) and file_transfer.sha256_file(dest) == sha256:
+        return "skipped"
+    src = fetch(sha256)
+    if src is None:
+        raise FileNotFoundError(f"blob {sha256} not in {BLOBS_DIR} nor on the server")
+    tmp = f"{dest}.{os.getpid()}.tmp"
+    try:
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return "copied"
+
+
+def upload_local_blobs(data: dict, server_url: str, headers: dict = None) -> int:
+    """
+    Antes de un push: sube al servidor los blobs locales que referencia el
+    anchor, para que otros puedan hacer rc. Devuelve cuántos se subieron;
+    TransferError si el servidor no tiene /blobs (el anchor no se podría restaurar).
+    """
+    uploaded = 0
+    for entry in (data.get("files") or {}).values():
+        if not isinstance(entry, dict) or not is_blob_entry(entry) or not has_blob(entry.get("sha256")):
+            continue
+        path = blob_path(entry["sha256"])
+        result = file_transfer.upload_blob(server_url, str(path), headers, sha256=entry["sha256"])
+        if result is None:
+            raise file_transfer.TransferError(f"server {server_url} has no /blobs; external files cannot be shared")
+        if result.get("uploaded"):
+            uploaded += 1
+    return uploaded
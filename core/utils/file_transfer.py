@@ -0,0 +1,204 @@
+# core/utils/file_transfer.py
+#
+# Transferencias de ficheros externos con el servidor (/files):
+#  - download(): por bloques a <dest>.part, reanuda con Range, verifica
+#    sha256 (el esperado o X-Content-SHA256) y renombra al final
+#  - upload(): sesión de subida reanudable (POST /uploads, PATCH por trozos
+#    con Upload-Offset, /complete); servidores antiguos → POST /upload
+#  - upload_blob(): almacén por contenido (/blobs/<sha256>); si el servidor
+#    ya tiene ese contenido (HEAD 200) no se sube nada, y si no tiene /blobs
+#    (404 sin X-Blob-Store) tampoco se envía el cuerpo
+
+import hashlib
+import json
+import os
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+CHUNK_SIZE = 1024 * 1024
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+RETRIES = 3
+SHA256_HEADER = "X-Content-SHA256"
+BLOB_STORE_HEADER = "X-Blob-Store"
+
+
+class TransferError(Exception):
+    pass
+
+
+def auth_headers(url: str = None) -> dict:
+    """
+    Bearer del servidor configurado (~/.anchors/server/info.json) para
+    /blobs y las subidas de /files; None si `url` es de otro host.
+    """
+    try:
+        info = json.loads((Path.home() / ".anchors" / "server" / "info.json").read_text())
+    except (OSError, ValueError):
+        return None
+    server_url = (info.get("url") or "").rstrip("/")
+    if not info.get("token") or not server_url or (url and not (url + "/").startswith(server_url + "/")):
+        return None
+    return {"Authorization": f"Bearer {info['token']}"}
+
+
+def sha256_file(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fetch(url, part, digest, offset, headers=None):
+    """Descarga (o continúa) en `part`. Devuelve (offset final, digest, sha256 del servidor)."""
+    request = urllib.request.Request(url, headers=headers or {})
+    if offset:
+        request.add_header("Range", f"bytes={offset}-")
+    try:
+        response = urllib.request.urlopen(request, timeout=60)
+    except urllib.error.HTTPError as e:
+        if e.code == 416 and offset:
+            return offset, digest, None  # la parte ya estaba completa
+        raise
+
+    with response:
+        if offset and response.status != 206:
+            # Sin soporte de Range: se empieza de cero
+            offset = 0
+            digest = hashlib.sha256()
+        server_sha = response.headers.get(SHA256_HEADER)
+        with open(part, "ab" if offset else "wb") as f:
+            for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+                f.write(chunk)
+                digest.update(chunk)
+                offset += len(chunk)
+    return offset, digest, server_sha
+
+
+def download(url: str, dest: str, expected_sha256: str = None, retries: int = RETRIES,
+             headers: dict = None) -> int:
+    """
+    Descarga `url` en `dest` sin cargarlo en memoria. Un corte deja
+    <dest>.part y el siguiente intento (o la siguiente ejecución) sigue
+    desde ahí. Devuelve el tamaño descargado.
+    """
+    part = dest + ".part"
+    for attempt in range(1, retries + 1):
+        digest = hashlib.sha256()
+        offset = 0
+        if os.path.exists(part):
+            with open(part, "rb") as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    offset += len(chunk)
+        resumed = offset > 0
+
+        try:
+            offset, digest, server_sha = _fetch(url, part, digest, offset, headers)
+        except urllib.error.HTTPError as e:
+            if e.code < 500 or attempt == retries:
+                raise TransferError(f"HTTP {e.code} downloading {url}")
+            continue
+        except (urllib.error.URLError, OSError) as e:
+            if attempt == retries:
+                raise TransferError(f"{e} (partial data kept in {part})")
+            continue
+
+        expected = expected_sha256 or server_sha
+        if expected and digest.hexdigest() != expected:
+            os.remove(part)
+            if resumed and attempt < retries:
+                continue  # la parte era de otra versión del fichero: de cero
+            raise TransferError(f"sha256 mismatch for {url}: expected {expected}, got {digest.hexdigest()}")
+
+        os.replace(part, dest)
+        return offset
+    raise TransferError(f"Could not download {url}")
+
+
+def upload(files_url: str, path: str, headers: dict = None, chunk_size: int = UPLOAD_CHUNK_SIZE,
+           retries: int = RETRIES) -> dict:
+    """
+    Sube `path` a `files_url` (p. ej. http://host:17017/files) por trozos.
+    Devuelve la respuesta final del servidor ({filename, size, sha256, path}).
+    """
+    import requests
+    from core.utils.server_utils import get_session
+
+    session = get_session()
+    files_url = files_url.rstrip("/")
+    filename = os.path.basename(path)
+    size = os.path.getsize(path)
+    sha256 = sha256_file(path)
+
+    response = session.post(f"{files_url}/uploads", json={"filename": filename, "size": size, "sha256": sha256},
+                            headers=headers, timeout=30)
+    if response.status_code in (404, 405):
+        # Servidor sin sesiones de subida: multipart de una vez
+        with open(path, "rb") as f:
+            response = session.post(f"{files_url}/upload", files={"file": (filename, f)}, headers=headers)
+        response.raise_for_status()
+        return response.json()
+    response.raise_for_status()
+    upload_url = f"{files_url}/uploads/{response.json()['upload_id']}"
+
+    offset = 0
+    failures = 0
+    with open(path, "rb") as f:
+        while offset < size:
+            f.seek(offset)
+            chunk = f.read(chunk_size)
+            try:
+                response = session.patch(upload_url, data=chunk, timeout=300,
+                                         headers={**(headers or {}), "Upload-Offset": str(offset)})
+                if response.status_code == 409 and "Upload-Offset" in response.headers:
+                    offset = int(response.headers["Upload-Offset"])
+                    continue
+                response.raise_for_status()
+                offset = int(response.headers["Upload-Offset"])
+                failures = 0
+            except requests.exceptions.RequestException:
+                failures += 1
+                if failures > retries:
+                    raise
+                # El servidor guarda lo recibido: se sigue desde su offset
+                offset = int(session.head(upload_url, headers=headers, timeout=30).headers["Upload-Offset"])
+
+    response = session.post(f"{upload_url}/complete", headers=headers, timeout=300)
+    response.raise_for_status()
+    result = response.json()
+    if result.get("sha256") != sha256:
+        raise TransferError(f"sha256 mismatch after upload: expected {sha256}, got {result.get('sha256')}")
+    return result
+
+
+def upload_blob(server_url: str, path: str, headers: dict = None, sha256: str = None) -> dict:
+    """
+    Sube `path` a /blobs/<sha256> salvo que el servidor ya lo tenga.
+    Devuelve {sha256, size, uploaded, path}; None si el servidor no tiene /blobs.
+    """
+    from core.utils.server_utils import get_session
+
+    session = get_session()
+    server_url = server_url.rstrip("/")
+    sha256 = sha256 or sha256_file(path)
+    size = os.path.getsize(path)
+    blob_url = f"{server_url}/blobs/{sha256}"
+    result = {"sha256": sha256, "size": size, "uploaded": False, "path": f"/blobs/{sha256}"}
+
+    response = session.head(blob_url, headers=headers, timeout=30)
+    if response.status_code == 200:
+        return result
+    if response.status_code in (404, 405) and BLOB_STORE_HEADER not in response.headers:
+        return None  # servidor sin /blobs: no se envía el fichero para nada
+    if response.status_code != 404:
+        response.raise_for_status()
+
+    with open(path, "rb") as f:
+        # El fichero se envía en streaming, sin cargarlo en memoria
+        response = session.put(blob_url, data=f, headers={**(headers or {}), "Content-Length": str(size)},
+                               timeout=300)
+    response.raise_for_status()
+    result["uploaded"] = response.json().get("created", True)
+    return result
@@ -1,77 +1,34 @@
 import sys
 import json
 import os
-import re
 
-def get_nested(d, key):
-    parts = key.split(".")
-    for part in parts:
-        if not isinstance(d, dict) or part not in d:
-            return None
-        d = d[part]
-    return d
-
-def normalize_value(value):
-    """Convierte valores booleanos, pero no toca strings numéricos."""
-    if isinstance(value, str):
-        v = value.lower()
-        if v == "true":
-            return True
-        if v == "false":
-            return False
-    return value
-
-def expr_to_lambda(expr_str):
-    expr_str = re.sub(r"\s+(AND|and)\s+", " and ", expr_str, flags=re.IGNORECASE)
-    expr_str = re.sub(r"\s+(OR|or)\s+", " or ", expr_str, flags=re.IGNORECASE)
-
-    pattern = re.compile(r'([a-zA-Z0-9_.]+)\s*(!=|=|~|!~)\s*("[^"]+"|\'[^\']+\'|[^\s()]+)')
-    var_map = {}
-    replacements = []
-
-    for i, match in enumerate(pattern.finditer(expr_str)):
-        key, op, val = match.groups()
-        var_name = f"_v{i}"
-        start, end = match.span()
-        replacements.append((start, end, var_name))
-        val = val.strip('"').strip("'")
-        var_map[var_name] = (key.strip(), op.strip(), normalize_value(val))
+if __name__ == "__main__":
+    # Ejecutado como script: python3 core/utils/filter.py "<expr>"
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
-    parts = []
-    last_index = 0
-    for start, end, var_name in replacements:
-        parts.append(expr_str[last_index:start])
-        parts.append(var_name)
-        last_index = end
-    parts.append(expr_str[last_index:])
-    expr_final = "".join(parts)
+from core.utils import index as anchor_index
+from core.shared.filterlang import FilterSyntaxError, compile_filter, get_nested
+from core.shared import filterlang
 
-    def matcher(data):
-        env = {}
-        for var_name, (key, op, expected) in var_map.items():
-            actual = get_nested(data, key)
-            if op == "=":
-                env[var_name] = expected in actual if isinstance(actual, list) else actual == expected
-            elif op == "!=":
-                env[var_name] = expected not in actual if isinstance(actual, list) else actual != expected
-            elif op == "~":
-                env[var_name] = expected in str(actual) if actual is not None else False
-            elif op == "!~":
-                env[var_name] = expected not in str(actual) if actual is not None else True
-        try:
-            return eval(expr_final, {}, env)
-        except Exception as e:
-            print(f"[filter error] {e}")
-            return False
 
-    return matcher
+def get_matcher(filter_str):
+    """
+    Compila el filtro una sola vez. Si la expresión no es válida avisa
+    por stderr y devuelve un matcher que no acepta nada.
+    """
+    if not filter_str:
+        return lambda data: True
+    try:
+        return compile_filter(filter_str)
+    except FilterSyntaxError as e:
+        print(f"[filter error] {e}", file=sys.stderr)
+        return lambda data: False
 
 def matches_filter(data: dict, filter_str: str) -> bool:
     if not filter_str:
         return True
     try:
-        matcher = expr_to_lambda(filter_str)
-        return matcher(data)
+        return compile_filter(filter_str)(data)
     except Exception:
         return False
 
@@ -87,14 +44,57 @@ def load_all_anchors(anchor_dir: str) -> dict:
                 continue
     return anchors
 
+def filter_keys(filter_str: str) -> set:
+    """Claves (notación punto) que usa una expresión de filtro."""
+    if not filter_str:
+        return set()
+    try:
+        return filterlang.filter_keys(filter_str)
+    except FilterSyntaxError:
+        return set()
+
+def _default_anchor_dir():
+    return os.environ.get("ANCHOR_DIR", "./data")
+
+def filter_anchor_summaries(filter_str=None, anchor_dir=None) -> dict:
+    """
+    Resuelve el filtro contra el índice persistente y devuelve
+    {name: documento reducido}. Solo abre el JSON completo de un anchor
+    cuando el índice no contiene las claves que usa el filtro.
+    """
+    anchor_dir = anchor_dir or _default_anchor_dir()
+    entries = anchor_index.refresh_index(anchor_dir)
+    if not filter_str:
+        return {name: e["doc"] for name, e in entries.items()}
+
+    keys = filter_keys(filter_str)
+    matcher = get_matcher(filter_str)
+    matched = {}
+    for name, entry in entries.items():
+        if anchor_index.covers(entry, keys):
+            data = entry["doc"]
+        else:
+            data = anchor_index.load_anchor(anchor_dir, name)
+            if data is None:
+                continue
+        if matcher(data):
+            matched[name] = entry["doc"]
+    return matched
+
+def filter_anchor_names(filter_str=None, anchor_dir=None) -> list:
+    return sorted(filter_anchor_summaries(filter_str, anchor_dir))
+
 def filter_anchors(filter_str=None) -> dict:
-    anchor_dir = os.environ.get("ANCHOR_DIR", "./data")
-    anchors = load_all_anchors(anchor_dir)
-    return {name: data for name, data in anchors.items() if matches_filter(data, filter_str)}
+    anchor_dir = _default_anchor_dir()
+    matched = {}
+    for name in filter_anchor_summaries(filter_str, anchor_dir):
+        data = anchor_index.load_anchor(anchor_dir, name)
+        if data is not None:
+            matched[name] = data
+    return matched
 
 # CLI fallback
 if __name__ == "__main__":
     query = sys.argv[1] if len(sys.argv) > 1 else ""
-    matched = filter_anchors(query)
-    for name in matched:
+    for name in filter_anchor_names(query):
         print(name)
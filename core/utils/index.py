@@ -0,0 +1,190 @@
+import os
+import json
+
+from core.shared.anchor_hash import content_hash
+
+# Índice persistente de metadatos del directorio de anchors.
+# Se guarda junto a los anchors y se refresca de forma incremental
+# comparando (mtime, size) de cada fichero, así que solo se vuelve a
+# parsear el JSON de los anchors que han cambiado.
+
+INDEX_FILE = ".anc_index"
+INDEX_VERSION = 2
+
+# Subárboles que nunca se copian al índice (contenido de ficheros, etc.)
+BULK_KEYS = {"files"}
+MAX_STR_LEN = 512
+MAX_LIST_LEN = 64
+MAX_DICT_KEYS = 64
+MAX_DEPTH = 4
+
+_SCALARS = (str, int, float, bool, type(None))
+
+# Cache en memoria por directorio (útil en procesos de larga duración)
+_cache = {}
+
+
+def _prune(value, prefix, opaque, depth=0):
+    """
+    Copia reducida de un documento: escalares, listas cortas de escalares
+    y dicts pequeños. Lo que se descarta queda registrado en `opaque`.
+    """
+    if isinstance(value, str):
+        if len(value) > MAX_STR_LEN:
+            opaque.append(prefix)
+            return None, False
+        return value, True
+
+    if isinstance(value, _SCALARS):
+        return value, True
+
+    if isinstance(value, list):
+        if len(value) > MAX_LIST_LEN or not all(
+            isinstance(v, _SCALARS) and not (isinstance(v, str) and len(v) > MAX_STR_LEN)
+            for v in value
+        ):
+            opaque.append(prefix)
+            return None, False
+        return list(value), True
+
+    if isinstance(value, dict):
+        if depth and (depth >= MAX_DEPTH or len(value) > MAX_DICT_KEYS):
+            opaque.append(prefix)
+            return None, False
+        pruned = {}
+        for k, v in value.items():
+            key = f"{prefix}.{k}" if prefix else str(k)
+            if k in BULK_KEYS:
+                opaque.append(key)
+                continue
+            kept, ok = _prune(v, key, opaque, depth + 1)
+            if ok:
+                pruned[k] = kept
+        return pruned, True
+
+    opaque.append(prefix)
+    return None, False
+
+
+def summarize(data: dict) -> dict:
+    """Entrada de índice (sin firma) para un anchor ya parseado."""
+    opaque = []
+    doc, _ = _prune(data, "", opaque)
+    return {"doc": doc if isinstance(doc, dict) else {}, "opaque": opaque}
+
+
+def _build_entry(path, sig):
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except Exception:
+        return {"sig": sig, "invalid": True}
+
+    if not isinstance(data, dict):
+        return {"sig": sig, "invalid": True}
+
+    entry = summarize(data)
+    entry["sig"] = sig
+    entry["hash"] = content_hash(data)
+    return entry
+
+
+def index_path(anchor_dir: str) -> str:
+    return os.path.join(anchor_dir, INDEX_FILE)
+
+
+def _read_index(anchor_dir):
+    cached = _cache.get(anchor_dir)
+    if cached is not None:
+        return cached
+    try:
+        with open(index_path(anchor_dir), "r") as f:
+            index = json.load(f)
+        if index.get("version") == INDEX_VERSION and isinstance(index.get("entries"), dict):
+            return index
+    except Exception:
+        pass
+    return {"version": INDEX_VERSION, "entries": {}}
+
+
+def _write_index(anchor_dir, index):
+    target = index_path(anchor_dir)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w") as f:
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(tmp, target)
+    except OSError:
+        # Directorio de solo lectura: el índice sigue sirviendo en memoria
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def refresh_index(anchor_dir: str) -> dict:
+    """
+    Devuelve {name: entry} actualizado. Solo se parsean los anchors cuyo
+    (mtime_ns, size) no coincide con el guardado en el índice.
+    """
+    index = _read_index(anchor_dir)
+    entries = index["entries"]
+    seen = set()
+    dirty = False
+
+    try:
+        it = os.scandir(anchor_dir)
+    except OSError:
+        return {}
+
+    with it:
+        for dirent in it:
+            if not dirent.name.endswith(".json"):
+                continue
+            try:
+                if not dirent.is_file():
+                    continue
+                st = dirent.stat()
+            except OSError:
+                continue
+
+            name = dirent.name[:-5]
+            sig = [st.st_mtime_ns, st.st_size]
+            seen.add(name)
+
+            cached = entries.get(name)
+            if cached is not None and cached.get("sig") == sig:
+                continue
+
+            entries[name] = _build_entry(dirent.path, sig)
+            dirty = True
+
+    for name in [n for n in entries if n not in seen]:
+        del entries[name]
+        dirty = True
+
+    if dirty:
+        _write_index(anchor_dir, index)
+    _cache[anchor_dir] = index
+
+    return {name: e for name, e in entries.items() if not e.get("invalid")}
+
+
+def covers(entry: dict, keys) -> bool:
+    """True si el documento reducido basta para evaluar esas claves."""
+    opaque = entry.get("opaque") or ()
+    if not opaque:
+        return True
+    for key in keys:
+        for o in opaque:
+            if o == key or key.startswith(o + ".") or o.startswith(key + "."):
+                return False
+    return True
+
+
+def load_anchor(anchor_dir: str, name: str):
+    try:
+        with open(os.path.join(anchor_dir, f"{name}.json"), "r") as f:
+            return json.load(f)
+    except Exception:
+        return None
@@ -0,0 +1,50 @@
+# core/utils/json_stream.py
+#
+# Escritura de anchors grandes sin tenerlos enteros en memoria: uno de los
+# campos del dict de primer nivel (p. ej. "files" en `anc cr`) se rellena con
+# un iterable de (clave, valor) que se va escribiendo según llega. La salida
+# es idéntica a json.dump(data, f, indent=2).
+
+import json
+import os
+from pathlib import Path
+
+
+def _indented(value, level: int) -> str:
+    # json no deja saltos de línea dentro de las cadenas: el replace es seguro
+    return json.dumps(value, indent=2).replace("\n", "\n" + "  " * level)
+
+
+def dump_streaming(data: dict, f, stream_key: str, items) -> int:
+    """Escribe `data` en `f` con data[stream_key] sacado de `items`. Devuelve cuántos items."""
+    count = 0
+    f.write("{")
+    for i, (key, value) in enumerate(data.items()):
+        f.write(("," if i else "") + "\n  " + json.dumps(key) + ": ")
+        if key != stream_key:
+            f.write(_indented(value, 1))
+            continue
+        f.write("{")
+        for item_key, item_value in items:
+            f.write(("," if count else "") + "\n    " + json.dumps(item_key) + ": " + _indented(item_value, 2))
+            count += 1
+        f.write("\n  }" if count else "}")
+    f.write("\n}" if data else "}")
+    return count
+
+
+def write_json_streaming(path, data: dict, stream_key: str, items) -> int:
+    """
+    dump_streaming a un temporal junto a `path` y rename al final: si se
+    corta a medias (error, Ctrl+C) no queda un anchor a medio escribir.
+    """
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "w") as f:
+            count = dump_streaming(data, f, stream_key, items)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return count
@@ -0,0 +1,189 @@
+# core/utils/secret_cache.py
+#
+# Cache local de secretos, cifrada en disco (opcional):
+#   ANC_SECRET_CACHE_TTL=<segundos>   activa la cache (0 o sin definir → desactivada)
+#
+# Fichero ~/.anchors/cache/secrets.json (0600):
+#   {"version": 1, "salt", "check", "entries": {id: {"nonce", "value", "expires"}}}
+# Cada valor va cifrado con AES-256-GCM (id como dato asociado) con una clave
+# derivada del token de sesión (HKDF-SHA256 + salt). `check` permite saber si
+# el token cambió: en ese caso la cache entera se descarta.
+#
+# TTL por secreto: el menor entre ANC_SECRET_CACHE_TTL y el `cache_ttl` que
+# devuelva el servidor para ese id (meta.cache_ttl del secreto; 0 → no se guarda).
+
+import base64
+import fcntl
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from core.utils.colors import yellow
+
+CACHE_DIR = Path.home() / ".anchors" / "cache"
+CACHE_FILE = CACHE_DIR / "secrets.json"
+LOCK_FILE = CACHE_DIR / ".secrets.lock"
+VERSION = 1
+
+_warned = False
+
+
+def default_ttl() -> int:
+    try:
+        return max(0, int(os.getenv("ANC_SECRET_CACHE_TTL", "0")))
+    except ValueError:
+        return 0
+
+
+def enabled() -> bool:
+    global _warned
+    if default_ttl() <= 0:
+        return False
+    try:
+        import cryptography  # noqa: F401
+    except ImportError:
+        if not _warned:
+            print(yellow("⚠️  ANC_SECRET_CACHE_TTL is set but `cryptography` is not installed; secret cache disabled."))
+            _warned = True
+        return False
+    return True
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+
+def _derive(token: str, salt: bytes, info: bytes) -> bytes:
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+    return HKDF(algorithm=hashes.SHA256(), length=32, salt=salt, info=info).derive(token.encode())
+
+
+class _Cache:
+    """Contenido del fichero ya validado contra el token actual."""
+
+    def __init__(self, token: str, data: dict = None):
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+        data = data or {}
+        salt = base64.b64decode(data["salt"]) if data.get("salt") else os.urandom(16)
+        self.salt = salt
+        self.check = _b64(_derive(token, salt, b"anc-secret-cache-check"))
+        self.aead = AESGCM(_derive(token, salt, b"anc-secret-cache-key"))
+        valid = data.get("version") == VERSION and data.get("check") == self.check
+        self.entries = dict(data.get("entries", {})) if valid else {}
+
+    def get(self, ref_id: str, now: float):
+        entry = self.entries.get(ref_id)
+        if not entry or entry.get("expires", 0) <= now:
+            return None
+        try:
+            plaintext = self.aead.decrypt(base64.b64decode(entry["nonce"]), base64.b64decode(entry["value"]),
+                                          ref_id.encode())
+        except Exception:
+            return None
+        return plaintext.decode()
+
+    def put(self, ref_id: str, plaintext: str, expires: float):
+        nonce = os.urandom(12)
+        value = self.aead.encrypt(nonce, plaintext.encode(), ref_id.encode())
+        self.entries[ref_id] = {"nonce": _b64(nonce), "value": _b64(value), "expires": expires}
+
+    def prune(self, now: float):
+        self.entries = {k: v for k, v in self.entries.items() if v.get("expires", 0) > now}
+
+    def to_dict(self) -> dict:
+        return {"version": VERSION, "salt": _b64(self.salt), "check": self.check, "entries": self.entries}
+
+
+def _read() -> dict:
+    try:
+        with open(CACHE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write(data: dict):
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    os.chmod(CACHE_DIR, 0o700)
+    fd, tmp_path = tempfile.mkstemp(prefix=".secrets.", suffix=".tmp", dir=CACHE_DIR)
+    try:
+        os.fchmod(fd, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, CACHE_FILE)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class _locked:
+    """Lock entre procesos (varios `anc` de un mismo workflow escriben a la vez)."""
+
+    def __enter__(self):
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        os.chmod(CACHE_DIR, 0o700)
+        self.f = open(LOCK_FILE, "a")
+        fcntl.flock(self.f, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.f, fcntl.LOCK_UN)
+        self.f.close()
+
+
+def load(token: str, ref_ids) -> dict:
+    """Plaintext de los ids que siguen vigentes en la cache."""
+    if not enabled() or not CACHE_FILE.exists():
+        return {}
+    cache = _Cache(token, _read())
+    now = time.time()
+    found = {}
+    for ref_id in ref_ids:
+        plaintext = cache.get(ref_id, now)
+        if plaintext is not None:
+            found[ref_id] = plaintext
+    return found
+
+
+def store(token: str, secrets: dict, ttls: dict = None):
+    """Guarda {id: plaintext}; `ttls` (del servidor) acota el TTL de cada id."""
+    if not enabled() or not secrets:
+        return
+    ttls = ttls or {}
+    now = time.time()
+    with _locked():
+        cache = _Cache(token, _read())
+        cache.prune(now)
+        for ref_id, plaintext in secrets.items():
+            ttl = default_ttl()
+            if ttls.get(ref_id) is not None:
+                ttl = min(ttl, int(ttls[ref_id]))
+            if ttl > 0:
+                cache.put(ref_id, plaintext, now + ttl)
+            else:
+                cache.entries.pop(ref_id, None)
+        _write(cache.to_dict())
+
+
+def invalidate(*ref_ids):
+    """Quita ids concretos (p. ej. tras `anc secret update`). No hace falta el token."""
+    if not CACHE_FILE.exists():
+        return
+    with _locked():
+        data = _read()
+        entries = data.get("entries", {})
+        removed = [entries.pop(ref_id, None) for ref_id in ref_ids]
+        if any(entry is not None for entry in removed):
+            _write(data)
+
+
+def clear():
+    if CACHE_FILE.exists():
+        with _locked():
+            CACHE_FILE.unlink(missing_ok=True)
@@ -1,12 +1,25 @@
 import re
 import json
 import requests
+from core.utils.server_utils import get_session
+from core.utils import secret_cache
 from pathlib import Path
 
 # Cache en memoria para no repetir llamadas
 _secret_cache = {}
+# Ids que el servidor no devolvió (no existe / sin acceso): el error salta al usarlos
+_secret_errors = {}
+_server_info = None
+
+# Acepta tanto [[secret:id]] como [[ secret:id ]]
+SECRET_PATTERN = re.compile(r"\[\[\s*secret\s*:\s*([a-zA-Z0-9_\-]+)\s*\]\]")
+
 
 def get_server_info():
+    global _server_info
+    if _server_info is not None:
+        return _server_info
+
     info_path = Path.home() / ".anchors" / "server" / "info.json"
     if not info_path.exists():
         raise RuntimeError("🔐 No remote server configured. Use: anc server url <url>")
@@ -19,22 +32,30 @@ def get_server_info():
 
     if not url or not token:
         raise RuntimeError("🔐 Missing server URL or token. Use `anc server auth`.")
-    
-    return url.rstrip("/"), token
+
+    _server_info = (url.rstrip("/"), token)
+    return _server_info
 
 
 def fetch_secret(ref_id):
     if not re.fullmatch(r"[a-zA-Z0-9_\-]+", ref_id):
         raise ValueError(f"Invalid secret ID: {ref_id}")
-    
+
     if ref_id in _secret_cache:
         return _secret_cache[ref_id]
+    if ref_id in _secret_errors:
+        raise RuntimeError(_secret_errors[ref_id])
 
     server_url, token = get_server_info()
+    cached = secret_cache.load(token, [ref_id])
+    if ref_id in cached:
+        _secret_cache[ref_id] = cached[ref_id]
+        return cached[ref_id]
+
     url = f"{server_url}/ref/get/{ref_id}"
 
     try:
-        res = requests.get(url, headers={"Authorization": f"Bearer {token}"}, timeout=5)
+        res = get_session().get(url, headers={"Authorization": f"Bearer {token}"}, timeout=5)
         if res.status_code == 404:
             raise RuntimeError(f"🔐 Secret '{ref_id}' not found.")
         if res.status_code == 403:
@@ -42,12 +63,85 @@ def fetch_secret(ref_id):
         res.raise_for_status()
     except requests.exceptions.RequestException as e:
         raise RuntimeError(f"🔐 Connection error while fetching secret '{ref_id}': {e}")
-    
-    plaintext = res.json().get("plaintext", "")
+
+    data = res.json()
+    plaintext = data.get("plaintext", "")
     _secret_cache[ref_id] = plaintext
+    secret_cache.store(token, {ref_id: plaintext}, {ref_id: data.get("cache_ttl")})
     return plaintext
 
 
+def collect_secret_ids(obj) -> set:
+    """Ids de todos los [[secret:id]] de un workflow/anchor (claves y valores, a cualquier profundidad)."""
+    found = set()
+    stack = [obj]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, str):
+            found.update(SECRET_PATTERN.findall(value))
+        elif isinstance(value, dict):
+            stack.extend(value.keys())
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return found
+
+
+def fetch_secrets(ref_ids) -> dict:
+    """
+    Trae de una vez (POST /ref/get_many) los secretos que aún no están en
+    cache (en memoria o, si ANC_SECRET_CACHE_TTL está activo, en disco). Los
+    que no existen o no son visibles no abortan: se recuerdan y
+    fetch_secret/resolve_secrets fallan solo si se llegan a usar.
+    Servidores sin /ref/get_many → un GET por id, como antes.
+    """
+    pending = sorted(i for i in set(ref_ids) if i not in _secret_cache and i not in _secret_errors)
+    for ref_id in pending:
+        if not re.fullmatch(r"[a-zA-Z0-9_\-]+", ref_id):
+            raise ValueError(f"Invalid secret ID: {ref_id}")
+
+    if pending:
+        server_url, token = get_server_info()
+        _secret_cache.update(secret_cache.load(token, pending))
+        pending = [i for i in pending if i not in _secret_cache]
+
+    if pending:
+        try:
+            res = get_session().post(f"{server_url}/ref/get_many", json={"ids": pending},
+                                     headers={"Authorization": f"Bearer {token}"}, timeout=15)
+        except requests.exceptions.RequestException as e:
+            raise RuntimeError(f"🔐 Connection error while fetching secrets: {e}")
+
+        if res.status_code in (404, 405):
+            for ref_id in pending:
+                try:
+                    fetch_secret(ref_id)
+                except RuntimeError as e:
+                    _secret_errors[ref_id] = str(e)
+        else:
+            try:
+                res.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                raise RuntimeError(f"🔐 Error while fetching secrets: {e}")
+            data = res.json()
+            _secret_cache.update(data.get("secrets", {}))
+            secret_cache.store(token, data.get("secrets", {}), data.get("ttls"))
+            for ref_id in data.get("missing", []):
+                _secret_errors[ref_id] = f"🔐 Secret '{ref_id}' not found."
+            for ref_id in data.get("denied", []):
+                _secret_errors[ref_id] = f"🔐 Access denied to secret '{ref_id}'."
+            for ref_id, reason in data.get("errors", {}).items():
+                _secret_errors[ref_id] = f"🔐 Could not read secret '{ref_id}': {reason}"
+
+    return {i: _secret_cache[i] for i in ref_ids if i in _secret_cache}
+
+
+def prefetch_secrets(obj) -> int:
+    """Resuelve en una sola petición todos los secretos que usa `obj`. Devuelve cuántos hay."""
+    ids = collect_secret_ids(obj)
+    if ids:
+        fetch_secrets(ids)
+    return len(ids)
 
 
 def resolve_secrets(text: str) -> str:
@@ -58,13 +152,11 @@ def resolve_secrets(text: str) -> str:
     if not isinstance(text, str):
         return text
 
-    # Acepta tanto [[secret:id]] como [[ secret:id ]]
-    pattern = r"\[\[\s*secret\s*:\s*([a-zA-Z0-9_\-]+)\s*\]\]"
-    matches = re.findall(pattern, text)
-
-    for ref_id in set(matches):
-        secret_value = fetch_secret(ref_id)
-        text = re.sub(rf"\[\[\s*secret\s*:\s*{re.escape(ref_id)}\s*\]\]", secret_value, text)
+    matches = set(SECRET_PATTERN.findall(text))
+    if matches:
+        # Los que falten (no precargados) llegan juntos en una petición
+        fetch_secrets(matches)
+        text = SECRET_PATTERN.sub(lambda m: fetch_secret(m.group(1)), text)
 
     # Detectar cualquier marcador no válido que use [[...]] sin ser secret válido
     leftover = re.findall(r"\[\[\s*\w+\s*:[a-zA-Z0-9_\-]+\s*\]\]", text)
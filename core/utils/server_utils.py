@@ -7,3 +7,45 @@ def load_server_info(path=None):
         return {}
     with open(path, "r") as f:
         return json.load(f)
+
+
+_session = None
+_pool_size = 0
+
+
+def get_session(pool_size: int = None):
+    """
+    requests.Session compartida por el proceso: reutiliza las conexiones
+    (keep-alive) entre peticiones, y entre comandos dentro de `anc daemon`.
+    `pool_size` amplía el pool de conexiones para uso desde varios hilos.
+    """
+    global _session, _pool_size
+    if _session is None:
+        import requests
+        _session = requests.Session()
+    if pool_size and pool_size > _pool_size:
+        from requests.adapters import HTTPAdapter
+        for prefix in ("http://", "https://"):
+            _session.mount(prefix, HTTPAdapter(pool_connections=4, pool_maxsize=pool_size))
+        _pool_size = pool_size
+    return _session
+
+
+PAGE_SIZE = 200
+
+
+def iter_pages(url: str, headers: dict = None, params: dict = None, limit: int = PAGE_SIZE, timeout: int = 30):
+    """
+    Recorre un listado paginado (?limit=&cursor=, cabecera X-Next-Cursor)
+    devolviendo cada página según llega. Un servidor sin paginación
+    responde todo de una vez y sin cabecera: una sola página.
+    """
+    params = dict(params or {}, limit=limit)
+    while True:
+        response = get_session().get(url, headers=headers, params=params, timeout=timeout)
+        response.raise_for_status()
+        yield response.json()
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return
+        params["cursor"] = cursor
@@ -5,6 +5,60 @@ export ANCHOR_DIR="${ANCHOR_DIR:-"$ANCHOR_ROOT/data"}"
 export ENV_DIR="${ENV_DIR:-"$ANCHOR_ROOT/envs"}"
 export URL_DIR="${URL_DIR:-"$ANCHOR_ROOT/urls"}"
 PYTHON_BIN="$ANCHOR_ROOT/venv/bin/python"
+export ANC_DAEMON_SOCK="${ANC_DAEMON_SOCK:-$HOME/.anchors/run/ancd.sock}"
+
+
+# Envía el comando a `anc daemon` (ver core/commands/daemon.py).
+# Devuelve 255 si no hay daemon o si el comando no se sirve desde él.
+_anc_daemon() {
+  [[ -S "$ANC_DAEMON_SOCK" ]] || return 255
+
+  local client
+  if command -v socat >/dev/null 2>&1; then
+    client=(socat -t 60 - "UNIX-CONNECT:$ANC_DAEMON_SOCK")
+  elif command -v nc >/dev/null 2>&1; then
+    client=(nc -U "$ANC_DAEMON_SOCK")
+  else
+    return 255
+  fi
+
+  local out
+  out=$(
+    { printf 'ANC1\0%s\0%s\0%s\0' "$PWD" "$ANCHOR_DIR" "$#"; (( $# )) && printf '%s\0' "$@"; } \
+      | "${client[@]}" 2>/dev/null
+    printf x
+  )
+  out="${out%x}"
+
+  local header="${out%%$'\n'*}"
+  [[ "$header" =~ ^ANC1\ ([0-9]+)$ ]] || return 255
+  local rc="${BASH_REMATCH[1]}"
+  printf '%s' "${out#*$'\n'}"
+  return "$rc"
+}
+
+
+# Lo mismo que daemon.servable(): el resto de comandos (set, edit, cr, rc,
+# push, wf...) va directo a python, sin ida y vuelta inútil al socket
+_anc_servable() {
+  case "$1" in
+    ls|meta|doc|filter|path|ping) return 0 ;;
+    server) [[ "$2" == ls || "$2" == status ]] ;;
+    secret) [[ "$2" == ls || "$2" == get ]] ;;
+    *) return 1 ;;
+  esac
+}
+
+
+# core/main.py vía daemon si está levantado y sirve el comando; si no, proceso nuevo
+_anc_py() {
+  if _anc_servable "$@"; then
+    _anc_daemon "$@"
+    local rc=$?
+    (( rc != 255 )) && return "$rc"
+  fi
+  "$PYTHON_BIN" "$ANCHOR_ROOT/core/main.py" "$@"
+}
 
 
 
@@ -29,7 +83,7 @@ anc() {
         
     set)
       shift
-      "$PYTHON_BIN" "$ANCHOR_ROOT/core/main.py" set "$@"
+      _anc_py set "$@"
       ;;
 
 
@@ -44,7 +98,7 @@ anc() {
 
     edit)
       shift
-      "$PYTHON_BIN" "$ANCHOR_ROOT/core/main.py" edit "$@"
+      _anc_py edit "$@"
       ;;
 
 
@@ -72,7 +126,7 @@ anc() {
 
     meta)
       shift
-      "$PYTHON_BIN" "$ANCHOR_ROOT/core/main.py" meta "$@"
+      _anc_py meta "$@"
       ;;
 
     
@@ -80,7 +134,7 @@ anc() {
 
     ls)
       shift
-      "$PYTHON_BIN" "$ANCHOR_ROOT/core/main.py" ls "$@"
+      _anc_py ls "$@"
       ;;
 
     
@@ -104,7 +158,7 @@ anc() {
  
     wf)
       shift
-      "$PYTHON_BIN" "$ANCHOR_ROOT/core/main.py" wf "$@"
+      _anc_py wf "$@"
       ;;
 
 
@@ -112,7 +166,7 @@ anc() {
         
     del)
       shift
-      "$PYTHON_BIN" "$ANCHOR_ROOT/core/main.py" del "$@"
+      _anc_py del "$@"
       ;;
 
 
@@ -160,7 +214,7 @@ anc() {
 
     url)
       shift
-      "$PYTHON_BIN" "$ANCHOR_ROOT/core/main.py" url "$@"
+      _anc_py url "$@"
       ;;
 
 
@@ -258,13 +312,18 @@ anc() {
 
     push)
       shift
-      "$PYTHON_BIN" "$ANCHOR_ROOT/core/main.py" push "$@"
+      _anc_py push "$@"
       ;;
 
 
     pull)
       shift
-      "$PYTHON_BIN" "$ANCHOR_ROOT/core/main.py" pull "$@"
+      _anc_py pull "$@"
+      ;;
+
+    daemon)
+      shift
+      "$PYTHON_BIN" "$ANCHOR_ROOT/core/main.py" daemon "$@"
       ;;
 
     help)
@@ -288,12 +347,12 @@ anc() {
 
     server)
       shift
-      "$PYTHON_BIN" "$ANCHOR_ROOT/core/main.py" server "$@"
+      _anc_py server "$@"
       ;;
 
     ldap)
       shift
-      "$PYTHON_BIN" "$ANCHOR_ROOT/core/main.py" ldap "$@"
+      _anc_py ldap "$@"
       ;;
 
     env)
@@ -305,32 +364,32 @@ anc() {
 
     rc)
       shift
-      "$PYTHON_BIN" "$ANCHOR_ROOT/core/main.py" rc "$@"
+      _anc_py rc "$@"
       ;;
 
 
     cr)
       shift
-      "$PYTHON_BIN" "$ANCHOR_ROOT/core/main.py" cr "$@"
+      _anc_py cr "$@"
       ;;
 
 
     sible)
       shift
-      "$PYTHON_BIN" "$ANCHOR_ROOT/core/main.py" sible "$@"
+      _anc_py sible "$@"
       ;;
 
 
 
     secret)
       shift
-      "$PYTHON_BIN" "$ANCHOR_ROOT/core/main.py" secret "$@"
+      _anc_py secret "$@"
       ;;
 
 
     doc)
       shift
-      "$PYTHON_BIN" "$ANCHOR_ROOT/core/main.py" doc "$@"
+      _anc_py doc "$@"
       ;;
 
         
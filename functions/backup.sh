@@ -2,6 +2,10 @@
 
 filter_anchors() {
   local query="$1"
+  if declare -F _anc_daemon >/dev/null; then
+    _anc_daemon filter "$query"
+    (( $? != 255 )) && return
+  fi
   ANCHOR_DIR="${ANCHOR_DIR:-$ANCHOR_ROOT/data}" python3 "$ANCHOR_ROOT/core/utils/filter.py" "$query"
 }
 
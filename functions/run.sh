@@ -2,6 +2,10 @@
 
 filter_anchors() {
   local query="$1"
+  if declare -F _anc_daemon >/dev/null; then
+    _anc_daemon filter "$query"
+    (( $? != 255 )) && return
+  fi
   ANCHOR_DIR="$ANCHOR_DIR" python3 "$ANCHOR_ROOT/core/utils/filter.py" "$query"
 }
 
@@ -61,14 +65,28 @@ anc_handle_run() {
     echo -e "${YELLOW}⚠️ Hint:${RESET} If using wildcards, quote your command: anc run <anchor> \"rm -rf *\""
   fi
 
+  # Con `anc daemon` levantado: las rutas de todos los anchors en una llamada
+  local -A daemon_paths=()
+  if declare -F _anc_daemon >/dev/null && (( ${#files[@]} )); then
+    local d_name d_path
+    while IFS=$'\t' read -r d_name d_path; do
+      daemon_paths["$d_name"]="$d_path"
+    done < <(_anc_daemon path "${files[@]}")
+  fi
+
   for name in "${files[@]}"; do
     local meta_file="$anchor_dir/$name.json"
-    local raw_path=$(jq -r '
-      if has("path") then .path
-      elif (.paths | type == "array") then
-        (.paths[] | select(.default == true).path) // .paths[0].path
-      else empty end
-    ' "$meta_file")
+    local raw_path
+    if [[ -v daemon_paths["$name"] ]]; then
+      raw_path="${daemon_paths[$name]}"
+    else
+      raw_path=$(jq -r '
+        if has("path") then .path
+        elif (.paths | type == "array") then
+          (.paths[] | select(.default == true).path) // .paths[0].path
+        else empty end
+      ' "$meta_file")
+    fi
 
     if [[ -z "$raw_path" ]]; then
       echo -e "${RED}⚠️ Anchor '$name' has no usable path, skipping${RESET}"
@@ -1,41 +1,183 @@
-from ldap3 import Server, Connection, ALL, SUBTREE
+# auth/ldap.py
+#
+# Autenticación y grupos contra LDAP.
+#  - Las búsquedas usan un pool de conexiones admin ya enlazadas (LDAP_POOL_SIZE)
+#  - La información de esquema del servidor se lee una sola vez
+#  - uid → dn y dn → grupos se cachean (LDAP_CACHE_TTL segundos, LDAP_CACHE_SIZE
+#    entradas); invalidate_user()/clear_caches() para forzar la relectura
+# En el caso habitual (caché caliente) un login es un único bind del usuario.
+# configure() permite otro Server/estrategia, p. ej. MOCK_SYNC de ldap3 en tests.
+
 import os
+import queue
+import threading
+from contextlib import contextmanager
+
+from ldap3 import Server, Connection, ALL, SUBTREE, SYNC
+from ldap3.core.exceptions import LDAPException
+from ldap3.utils.conv import escape_filter_chars
+
+from code.core.cache import TTLCache
 
 LDAP_SERVER = os.getenv("LDAP_SERVER", "ldap://ldap:389")
 BASE_DN = os.getenv("LDAP_BASE_DN", "dc=anchor,dc=local")
 ADMIN_DN = os.getenv("LDAP_ADMIN_DN", f"cn=admin,{BASE_DN}")
 ADMIN_PASSWORD = os.getenv("LDAP_ADMIN_PASSWORD", "admin")
 
+POOL_SIZE = int(os.getenv("LDAP_POOL_SIZE", "4"))
+POOL_TIMEOUT = float(os.getenv("LDAP_POOL_TIMEOUT", "10"))
+CONNECT_TIMEOUT = int(os.getenv("LDAP_CONNECT_TIMEOUT", "5"))
+CACHE_TTL = float(os.getenv("LDAP_CACHE_TTL", "300"))
+CACHE_SIZE = int(os.getenv("LDAP_CACHE_SIZE", "1024"))
 
-def get_user_dn(username: str) -> str | None:
-    server = Server(LDAP_SERVER, get_info=ALL)
-    conn = Connection(server, user=ADMIN_DN, password=ADMIN_PASSWORD, auto_bind=True)
 
-    conn.search(
-        search_base=f"ou=users,{BASE_DN}",
-        search_filter=f"(uid={username})",
-        search_scope=SUBTREE,
-        attributes=["uid"]
-    )
+class AdminPool:
+    """Conexiones admin enlazadas y reutilizables (máx. `size` a la vez)."""
+
+    def __init__(self, server, size=POOL_SIZE, strategy=SYNC):
+        self.server = server
+        self.strategy = strategy
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.LifoQueue()
+        self._info_lock = threading.Lock()
+        self._info_loaded = False
+
+    def _connect(self):
+        conn = Connection(self.server, user=ADMIN_DN, password=ADMIN_PASSWORD,
+                          client_strategy=self.strategy, raise_exceptions=True)
+        conn.bind(read_server_info=False)
+        # Esquema e info del DSA: una vez por proceso, no en cada bind
+        with self._info_lock:
+            if not self._info_loaded:
+                conn.refresh_server_info()
+                self._info_loaded = True
+        return conn
+
+    @contextmanager
+    def connection(self):
+        if not self._slots.acquire(timeout=POOL_TIMEOUT):
+            raise LDAPException("timed out waiting for an LDAP admin connection")
+        conn = None
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            yield conn
+        except Exception:
+            # Una conexión que ha fallado no vuelve al pool
+            if conn is not None:
+                _unbind(conn)
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                self._idle.put(conn)
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                _unbind(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+def _unbind(conn):
+    try:
+        conn.unbind()
+    except Exception:
+        pass
+
+
+_lock = threading.Lock()
+_server = None
+_strategy = SYNC
+_pool = None
+_dn_cache = TTLCache(CACHE_SIZE, CACHE_TTL)
+_groups_cache = TTLCache(CACHE_SIZE, CACHE_TTL)
+
+
+def configure(server=None, strategy=SYNC, pool_size=POOL_SIZE):
+    """Cambia servidor/estrategia (tests con MOCK_SYNC) y vacía pool y cachés."""
+    global _server, _strategy, _pool
+    with _lock:
+        if _pool is not None:
+            _pool.close()
+        _server = server
+        _strategy = strategy
+        _pool = AdminPool(get_server(), pool_size, strategy)
+    clear_caches()
+
+
+def get_server():
+    global _server
+    if _server is None:
+        _server = Server(LDAP_SERVER, get_info=ALL, connect_timeout=CONNECT_TIMEOUT)
+    return _server
+
 
-    if conn.entries:
-        return conn.entries[0].entry_dn
-    return None
+def get_pool() -> AdminPool:
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = AdminPool(get_server(), POOL_SIZE, _strategy)
+        return _pool
+
+
+def _search(search_base, search_filter, attributes):
+    # Un reintento con conexión nueva: el servidor puede cerrar las inactivas
+    for attempt in (1, 2):
+        try:
+            with get_pool().connection() as conn:
+                conn.search(search_base=search_base, search_filter=search_filter,
+                            search_scope=SUBTREE, attributes=attributes)
+                return list(conn.entries)
+        except LDAPException:
+            if attempt == 2:
+                raise
+
+
+def get_user_dn(username: str) -> str | None:
+    dn = _dn_cache.get(username)
+    if dn:
+        return dn
+
+    entries = _search(f"ou=users,{BASE_DN}", f"(uid={escape_filter_chars(username)})", ["uid"])
+    if not entries:
+        return None
+    dn = entries[0].entry_dn
+    _dn_cache.set(username, dn)
+    return dn
 
 
 def ldap_authenticate(username: str, password: str) -> bool:
-    user_dn = get_user_dn(username)
+    if not password:
+        # Un bind simple sin contraseña es anónimo y "tiene éxito"
+        return False
+
+    try:
+        user_dn = get_user_dn(username)
+    except LDAPException as e:
+        print(f"[LDAP] Error buscando {username}: {e}")
+        return False
     if not user_dn:
         print(f"[LDAP] Usuario {username} no encontrado.")
         return False
 
+    conn = Connection(get_server(), user=user_dn, password=password, client_strategy=_strategy)
     try:
-        server = Server(LDAP_SERVER, get_info=ALL)
-        conn = Connection(server, user=user_dn, password=password, auto_bind=True)
-        return True
-    except Exception as e:
+        if conn.bind(read_server_info=False):
+            return True
+        # Puede que el dn cacheado ya no exista: que el próximo intento lo busque
+        invalidate_user(username)
+        return False
+    except LDAPException as e:
         print(f"[LDAP] Error autenticando {user_dn}: {e}")
+        invalidate_user(username)
         return False
+    finally:
+        _unbind(conn)
 
 
 def get_user_groups(username: str) -> list[str]:
@@ -43,14 +185,27 @@ def get_user_groups(username: str) -> list[str]:
     if not user_dn:
         return []
 
-    server = Server(LDAP_SERVER, get_info=ALL)
-    conn = Connection(server, user=ADMIN_DN, password=ADMIN_PASSWORD, auto_bind=True)
+    groups = _groups_cache.get(user_dn)
+    if groups is not None:
+        return list(groups)
+
+    entries = _search(f"ou=groups,{BASE_DN}", f"(member={escape_filter_chars(user_dn)})", ["cn"])
+    groups = [entry.cn.value for entry in entries]
+    _groups_cache.set(user_dn, groups)
+    return list(groups)
+
+
+def invalidate_user(username: str):
+    """Olvida el dn y los grupos cacheados de un usuario."""
+    dn = _dn_cache.pop(username)
+    if dn:
+        _groups_cache.pop(dn)
+
+
+def clear_caches():
+    _dn_cache.clear()
+    _groups_cache.clear()
 
-    conn.search(
-        search_base=f"ou=groups,{BASE_DN}",
-        search_filter=f"(member={user_dn})",
-        search_scope=SUBTREE,
-        attributes=["cn"]
-    )
 
-    return [entry.cn.value for entry in conn.entries]
+def cache_stats() -> dict:
+    return {"dn": _dn_cache.stats(), "groups": _groups_cache.stats()}
@@ -1,10 +1,13 @@
 from fastapi import Request, HTTPException
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from code.core.utils import now_tz, now_tz_ss
+from code.core.cache import TTLCache
+import hashlib
 import os
+import time
 
 # Clave secreta JWT (usar una variable de entorno en producción)
 SECRET_KEY = os.getenv("JWT_SECRET", "super-secret-key")
@@ -29,22 +32,60 @@ def decode_token(token: str):
         raise HTTPException(status_code=401, detail=f"Invalid token: {e}")
 
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        auth_header = request.headers.get("Authorization")
-        if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header[7:]
-            try:
-                payload = decode_token(token)
-                request.state.user = payload.get("sub")
-                request.state.groups = payload.get("groups", [])
-            except HTTPException:
-                return JSONResponse(status_code=401, content={"detail": "Invalid token"})
-        else:
-            request.state.user = None
-            request.state.groups = []
-
-        return await call_next(request)
+# Rutas que no necesitan identidad: no se mira el token
+PUBLIC_PATHS = {"/health", "/auth/login", "/docs", "/redoc", "/openapi.json"}
+
+# Tokens ya verificados: sha256(token) → (user, groups), hasta su `exp`
+_verified_tokens = TTLCache(int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "1024")), ttl=300)
+
+
+def verify_token_cached(token: str):
+    """(user, groups) del token; jwt.decode solo si no está en caché."""
+    key = hashlib.sha256(token.encode()).digest()
+    cached = _verified_tokens.get(key)
+    if cached is not None:
+        return cached
+
+    payload = decode_token(token)
+    identity = (payload.get("sub"), tuple(payload.get("groups", [])))
+    exp = payload.get("exp")
+    # Sin `exp` el token no caduca: se revalida con el TTL por defecto
+    ttl = exp - time.time() if isinstance(exp, (int, float)) else None
+    if ttl is None or ttl > 0:
+        _verified_tokens.set(key, identity, ttl=ttl)
+    return identity
+
+
+class AuthMiddleware:
+    """
+    Middleware ASGI puro (sin BaseHTTPMiddleware): deja en request.state
+    `user` y `groups`, o responde 401 si el token no es válido.
+    """
+
+    def __init__(self, app, public_paths=PUBLIC_PATHS):
+        self.app = app
+        self.public_paths = set(public_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        state = scope.setdefault("state", {})
+        state["user"] = None
+        state["groups"] = []
+
+        if scope["path"] not in self.public_paths:
+            auth_header = Headers(scope=scope).get("authorization")
+            if auth_header and auth_header.startswith("Bearer "):
+                try:
+                    user, groups = verify_token_cached(auth_header[7:])
+                except HTTPException:
+                    response = JSONResponse(status_code=401, content={"detail": "Invalid token"})
+                    return await response(scope, receive, send)
+                state["user"] = user
+                state["groups"] = list(groups)
+
+        await self.app(scope, receive, send)
 
 
 def get_current_user(request: Request) -> str:
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Módulos compartidos con la CLI (filterlang, ...). En la imagen Docker se
+# copian a /app/shared (PYTHONPATH); ejecutando desde el repo se usan
+# directamente desde core/shared.
+_SHARED_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "core", "shared"))
+if os.path.isdir(_SHARED_DIR) and _SHARED_DIR not in sys.path:
+    sys.path.append(_SHARED_DIR)
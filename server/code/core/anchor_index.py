@@ -0,0 +1,138 @@
+# code/core/anchor_index.py
+#
+# Índice en memoria de un directorio de anchors (*.json): documento ya
+# parseado + firma de stat (mtime_ns, size, inode) por fichero.
+# Los listados recorren el índice en vez de abrir cada fichero. Se
+# revalida como mucho cada ANCHOR_INDEX_REVALIDATE segundos: un scandir
+# y solo se vuelven a parsear los ficheros cuya firma ha cambiado.
+# Las subidas y borrados del router lo actualizan directamente (put/remove).
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+REVALIDATE_INTERVAL = float(os.getenv("ANCHOR_INDEX_REVALIDATE", "2"))
+
+
+def _signature(st):
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _load(path):
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else None
+    except (OSError, ValueError):
+        return None
+
+
+class AnchorIndex:
+    def __init__(self, directory, revalidate_interval=REVALIDATE_INTERVAL):
+        self.directory = Path(directory)
+        self.revalidate_interval = revalidate_interval
+        self._entries = {}  # name → (firma, documento o None si no es JSON válido)
+        self._names = []    # nombres ordenados (con documento válido)
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def _path(self, name):
+        return self.directory / f"{name}.json"
+
+    def _sort(self):
+        self._names = sorted(name for name, (_, data) in self._entries.items() if data is not None)
+
+    def refresh(self, force=False):
+        """Sincroniza con el disco si ha pasado el intervalo (o con force)."""
+        now = time.monotonic()
+        if not force and self._checked_at is not None and now - self._checked_at < self.revalidate_interval:
+            return
+        with self._lock:
+            seen = {}
+            changed = False
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(".json") or not entry.is_file():
+                        continue
+                    name = entry.name[:-5]
+                    try:
+                        signature = _signature(entry.stat())
+                    except OSError:
+                        continue
+                    current = self._entries.get(name)
+                    if current is not None and current[0] == signature:
+                        seen[name] = current
+                    else:
+                        seen[name] = (signature, _load(entry.path))
+                        changed = True
+            if changed or len(seen) != len(self._entries):
+                self._entries = seen
+                self._sort()
+            self._checked_at = time.monotonic()
+
+    def items(self, after=None):
+        """(name, data) ordenados por nombre, opcionalmente tras `after`."""
+        self.refresh()
+        with self._lock:
+            names, entries = self._names, self._entries
+        for name in names:
+            if after is not None and name <= after:
+                continue
+            entry = entries.get(name)
+            if entry is not None and entry[1] is not None:
+                yield name, entry[1]
+
+    def get(self, name):
+        """Documento de un anchor (revalidando solo ese fichero) o None."""
+        path = self._path(name)
+        try:
+            signature = _signature(path.stat())
+        except OSError:
+            self.remove(name)
+            return None
+        with self._lock:
+            current = self._entries.get(name)
+        if current is not None and current[0] == signature:
+            return current[1]
+        data = _load(path)
+        self._store(name, signature, data)
+        return data
+
+    def put(self, name, data):
+        """Tras escribir el fichero: lo registra sin volver a leerlo."""
+        try:
+            signature = _signature(self._path(name).stat())
+        except OSError:
+            return
+        self._store(name, signature, data)
+
+    def _store(self, name, signature, data):
+        with self._lock:
+            is_new = name not in self._entries or (self._entries[name][1] is None) != (data is None)
+            self._entries[name] = (signature, data)
+            if is_new:
+                self._sort()
+
+    def remove(self, name):
+        with self._lock:
+            if self._entries.pop(name, None) is not None:
+                self._sort()
+
+    def __len__(self):
+        self.refresh()
+        return len(self._names)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(directory) -> AnchorIndex:
+    """Un índice por directorio y proceso."""
+    key = str(Path(directory).resolve())
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = AnchorIndex(directory)
+        return _indexes[key]
@@ -0,0 +1,148 @@
+# code/core/blob_store.py
+#
+# Almacén direccionado por contenido para ficheros externos:
+#   <BLOBS_DIR>/ab/cd/<sha256>
+# El mismo contenido se guarda una sola vez, da igual su nombre.
+#
+# Referencias: cada anchor guarda en `blob_refs` los sha256 de sus ficheros
+# externos (cualquier dict con `external` y `sha256`, p. ej. docker.files).
+# Con el índice multikey blob_refs_1, el recuento de referencias de un blob
+# es un count_documents; gc() borra los blobs que ningún anchor referencia
+# y que tienen más de BLOB_GC_GRACE_HOURS (subidos pero aún sin anchor).
+
+import hashlib
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi import HTTPException
+
+CHUNK_SIZE = 1024 * 1024
+MAX_BLOB_SIZE = int(os.getenv("FILES_MAX_SIZE", str(4 * 1024 ** 3)))
+GC_GRACE = float(os.getenv("BLOB_GC_GRACE_HOURS", "24")) * 3600
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def check_sha256(sha256: str) -> str:
+    if not _SHA256_RE.match(sha256 or ""):
+        raise HTTPException(status_code=400, detail="sha256 must be 64 lowercase hex characters")
+    return sha256
+
+
+def referenced_blobs(doc) -> list:
+    """sha256 de los ficheros externos de un anchor, sin repetir y ordenados."""
+    found = set()
+    stack = [doc]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            if value.get("external") and isinstance(value.get("sha256"), str) and _SHA256_RE.match(value["sha256"]):
+                found.add(value["sha256"])
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+    return sorted(found)
+
+
+class BlobStore:
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.tmp = self.directory / ".tmp"
+        self.tmp.mkdir(parents=True, exist_ok=True)
+
+    def path(self, sha256: str) -> Path:
+        check_sha256(sha256)
+        return self.directory / sha256[:2] / sha256[2:4] / sha256
+
+    def exists(self, sha256: str) -> bool:
+        return self.path(sha256).is_file()
+
+    def open_writer(self):
+        """Temporal dentro del almacén (mismo sistema de ficheros para el rename)."""
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.tmp)
+        return os.fdopen(fd, "wb"), tmp_path
+
+    def commit(self, tmp_path: str, sha256: str, actual: str = None) -> bool:
+        """
+        Mueve el temporal a su sitio si su contenido es `sha256` (`actual`
+        si el llamador ya lo calculó al escribir). False si el blob ya
+        existía (el temporal se descarta).
+        """
+        if actual is None:
+            digest = hashlib.sha256()
+            with open(tmp_path, "rb") as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+            actual = digest.hexdigest()
+        if actual != sha256:
+            os.unlink(tmp_path)
+            raise HTTPException(status_code=422, detail=f"Content does not match sha256 (got {actual})")
+
+        dest = self.path(sha256)
+        if dest.is_file():
+            os.unlink(tmp_path)
+            return False
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, dest)
+        return True
+
+    def touch(self, sha256: str):
+        """Renueva el periodo de gracia: alguien acaba de contar con este blob."""
+        try:
+            os.utime(self.path(sha256))
+        except OSError:
+            pass
+
+    def discard(self, tmp_path: str):
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+    def iter_blobs(self):
+        """(sha256, Path) de todos los blobs guardados."""
+        for shard in self.directory.glob("[0-9a-f][0-9a-f]/[0-9a-f][0-9a-f]"):
+            for path in shard.iterdir():
+                if _SHA256_RE.match(path.name):
+                    yield path.name, path
+
+
+def backfill_refs(anchors) -> int:
+    """Calcula blob_refs de los anchors subidos antes de que existiera el campo."""
+    count = 0
+    for doc in anchors.find({"blob_refs": {"$exists": False}}):
+        anchors.update_one({"_id": doc["_id"]}, {"$set": {"blob_refs": referenced_blobs(doc)}})
+        count += 1
+    return count
+
+
+def refcount(anchors, sha256: str) -> int:
+    return anchors.count_documents({"blob_refs": sha256})
+
+
+def gc(store: BlobStore, anchors, grace: float = GC_GRACE, dry_run: bool = False) -> dict:
+    """Borra los blobs sin referencias (y los temporales abandonados)."""
+    report = {"backfilled": backfill_refs(anchors), "referenced": 0, "recent": 0,
+              "deleted": [], "freed_bytes": 0, "dry_run": dry_run}
+    referenced = set(anchors.distinct("blob_refs"))
+    cutoff = time.time() - grace
+
+    for sha256, path in store.iter_blobs():
+        if sha256 in referenced:
+            report["referenced"] += 1
+            continue
+        st = path.stat()
+        if st.st_mtime > cutoff:
+            report["recent"] += 1
+            continue
+        report["deleted"].append(sha256)
+        report["freed_bytes"] += st.st_size
+        if not dry_run:
+            path.unlink(missing_ok=True)
+
+    if not dry_run:
+        for tmp in store.tmp.iterdir():
+            if tmp.stat().st_mtime < cutoff:
+                tmp.unlink(missing_ok=True)
+    return report
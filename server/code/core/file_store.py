@@ -0,0 +1,195 @@
+# code/core/file_store.py
+#
+# Ficheros externos (/files): escritura atómica (temporal + rename), sha256
+# calculado por el servidor y subidas reanudables por sesiones.
+#
+#   <dir>/<nombre>               fichero final
+#   <dir>/.sha256/<nombre>.json  {sha256, size, mtime_ns}: evita releerlo
+#   <dir>/.uploads/<id>.part     datos recibidos hasta ahora (offset = tamaño)
+#   <dir>/.uploads/<id>.json     {filename, size, sha256, owner, created_at}
+
+import hashlib
+import json
+import os
+import re
+import secrets
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi import HTTPException
+
+CHUNK_SIZE = 1024 * 1024
+MAX_FILE_SIZE = int(os.getenv("FILES_MAX_SIZE", str(4 * 1024 ** 3)))
+UPLOAD_TTL = float(os.getenv("FILES_UPLOAD_TTL_HOURS", "24")) * 3600
+
+_FILENAME_RE = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9._\-]*$")
+_UPLOAD_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def safe_filename(name: str) -> str:
+    """Solo el nombre, sin rutas ni ficheros ocultos."""
+    name = os.path.basename(name or "")
+    if not _FILENAME_RE.match(name):
+        raise HTTPException(status_code=400, detail="Invalid file name")
+    return name
+
+
+def check_sha256(value):
+    if value is not None and not _SHA256_RE.match(value):
+        raise HTTPException(status_code=400, detail="sha256 must be 64 lowercase hex characters")
+    return value
+
+
+def sha256_file(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileStore:
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.digests = self.directory / ".sha256"
+        self.uploads = self.directory / ".uploads"
+        for d in (self.directory, self.digests, self.uploads):
+            d.mkdir(parents=True, exist_ok=True)
+
+    def path(self, filename: str) -> Path:
+        return self.directory / safe_filename(filename)
+
+    # --- sha256 ---
+
+    def _record_digest(self, filename, sha256):
+        st = (self.directory / filename).stat()
+        record = {"sha256": sha256, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        tmp = self.digests / f".{filename}.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(record))
+        os.replace(tmp, self.digests / f"{filename}.json")
+
+    def digest(self, filename: str) -> str:
+        """sha256 del fichero; se recalcula solo si cambió tamaño o mtime."""
+        path = self.path(filename)
+        st = path.stat()
+        try:
+            record = json.loads((self.digests / f"{path.name}.json").read_text())
+            if record["size"] == st.st_size and record["mtime_ns"] == st.st_mtime_ns:
+                return record["sha256"]
+        except (OSError, ValueError, KeyError):
+            pass
+        sha256 = sha256_file(path)
+        self._record_digest(path.name, sha256)
+        return sha256
+
+    # --- escritura atómica ---
+
+    def _commit(self, tmp_path, filename, sha256):
+        os.replace(tmp_path, self.directory / filename)
+        self._record_digest(filename, sha256)
+
+    def save_stream(self, filename: str, fileobj) -> dict:
+        """Copia `fileobj` por bloques a un temporal, con límite de tamaño, y lo renombra."""
+        filename = safe_filename(filename)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{filename}.", suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in iter(lambda: fileobj.read(CHUNK_SIZE), b""):
+                    size += len(chunk)
+                    if size > MAX_FILE_SIZE:
+                        raise HTTPException(status_code=413, detail=f"File larger than {MAX_FILE_SIZE} bytes")
+                    digest.update(chunk)
+                    out.write(chunk)
+            self._commit(tmp_path, filename, digest.hexdigest())
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return {"filename": filename, "size": size, "sha256": digest.hexdigest()}
+
+    # --- subidas reanudables ---
+
+    def _session_paths(self, upload_id):
+        if not _UPLOAD_ID_RE.match(upload_id or ""):
+            raise HTTPException(status_code=404, detail="Upload not found")
+        return self.uploads / f"{upload_id}.json", self.uploads / f"{upload_id}.part"
+
+    def create_upload(self, filename: str, size: int = None, sha256: str = None, owner: str = None) -> dict:
+        filename = safe_filename(filename)
+        check_sha256(sha256)
+        if size is not None and (size < 0 or size > MAX_FILE_SIZE):
+            raise HTTPException(status_code=413, detail=f"File larger than {MAX_FILE_SIZE} bytes")
+
+        upload_id = secrets.token_hex(16)
+        meta_path, part_path = self._session_paths(upload_id)
+        part_path.touch()
+        meta = {"filename": filename, "size": size, "sha256": sha256, "owner": owner, "created_at": time.time()}
+        meta_path.write_text(json.dumps(meta))
+        return {"upload_id": upload_id, "offset": 0, **meta}
+
+    def get_upload(self, upload_id: str) -> dict:
+        meta_path, part_path = self._session_paths(upload_id)
+        try:
+            meta = json.loads(meta_path.read_text())
+            offset = part_path.stat().st_size
+        except (OSError, ValueError):
+            raise HTTPException(status_code=404, detail="Upload not found")
+        return {"upload_id": upload_id, "offset": offset, **meta}
+
+    def open_chunk(self, upload_id: str, offset: int):
+        """
+        Abre la parte para añadir en `offset`, que debe ser el tamaño
+        recibido hasta ahora (409 con el offset correcto si no).
+        """
+        session = self.get_upload(upload_id)
+        if offset != session["offset"]:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Offset mismatch: expected {session['offset']}",
+                headers={"Upload-Offset": str(session["offset"])},
+            )
+        limit = session["size"] if session["size"] is not None else MAX_FILE_SIZE
+        return session, open(self._session_paths(upload_id)[1], "ab"), limit
+
+    def complete_upload(self, upload_id: str) -> dict:
+        session = self.get_upload(upload_id)
+        meta_path, part_path = self._session_paths(upload_id)
+        if session["size"] is not None and session["offset"] != session["size"]:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload incomplete: {session['offset']} of {session['size']} bytes",
+                headers={"Upload-Offset": str(session["offset"])},
+            )
+
+        sha256 = sha256_file(part_path)
+        if session["sha256"] and session["sha256"] != sha256:
+            self.abort_upload(upload_id)
+            raise HTTPException(status_code=422, detail=f"sha256 mismatch: got {sha256}")
+
+        self._commit(part_path, session["filename"], sha256)
+        meta_path.unlink(missing_ok=True)
+        return {"filename": session["filename"], "size": session["offset"], "sha256": sha256}
+
+    def abort_upload(self, upload_id: str):
+        for path in self._session_paths(upload_id):
+            path.unlink(missing_ok=True)
+
+    def purge_expired(self) -> list:
+        """Borra sesiones sin actividad desde hace más de FILES_UPLOAD_TTL_HOURS. Devuelve sus ids."""
+        purged = []
+        cutoff = time.time() - UPLOAD_TTL
+        for meta_path in self.uploads.glob("*.json"):
+            part_path = meta_path.with_suffix(".part")
+            try:
+                last = max(meta_path.stat().st_mtime, part_path.stat().st_mtime if part_path.exists() else 0)
+            except OSError:
+                continue
+            if last < cutoff:
+                meta_path.unlink(missing_ok=True)
+                part_path.unlink(missing_ok=True)
+                purged.append(meta_path.stem)
+        return purged
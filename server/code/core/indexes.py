@@ -0,0 +1,106 @@
+# code/core/indexes.py
+#
+# Índices que el servidor necesita. Se declaran aquí y se aseguran al
+# arrancar (lifespan en server.py); GET /admin/indexes compara lo declarado
+# con lo que hay en MongoDB y con su uso ($indexStats).
+
+import os
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure, PyMongoError
+
+
+def log_ttl_seconds():
+    """Retención del log de auditoría (LOG_TTL_DAYS). None = sin caducidad."""
+    days = os.getenv("LOG_TTL_DAYS", "").strip()
+    return int(float(days) * 86400) if days else None
+
+
+def declared_indexes() -> dict:
+    ttl = log_ttl_seconds()
+    log_options = {"expireAfterSeconds": ttl} if ttl else {}
+    return {
+        "anchors": [
+            IndexModel([("name", ASCENDING)], name="name_unique", unique=True),
+            IndexModel([("type", ASCENDING)], name="type_1"),
+            IndexModel([("env", ASCENDING)], name="env_1"),
+            IndexModel([("project", ASCENDING)], name="project_1"),
+            IndexModel([("groups", ASCENDING)], name="groups_1"),
+            # Orden por fecha en /dashboard/data
+            IndexModel([("last_updated", ASCENDING)], name="last_updated_1"),
+            # Referencias a blobs (recuento y GC en code/core/blob_store.py)
+            IndexModel([("blob_refs", ASCENDING)], name="blob_refs_1"),
+        ],
+        "ref": [
+            IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        ],
+        "log": [
+            IndexModel([("timestamp", ASCENDING)], name="timestamp_1", **log_options),
+        ],
+    }
+
+
+def _sync_ttl(db, collection, model, existing):
+    """Ajusta expireAfterSeconds de un índice ya creado (collMod)."""
+    wanted = model.document.get("expireAfterSeconds")
+    current = existing.get("expireAfterSeconds")
+    if wanted == current:
+        return None
+    if wanted is None or current is None:
+        # Poner o quitar el TTL exige recrear el índice
+        db[collection].drop_index(model.document["name"])
+        db[collection].create_indexes([model])
+        return f"ttl set to {wanted}s" if wanted else "ttl removed"
+    db.command("collMod", collection, index={"name": model.document["name"], "expireAfterSeconds": wanted})
+    return f"ttl changed to {wanted}s"
+
+
+def ensure_indexes(db) -> dict:
+    """
+    Crea los índices declarados que falten. Un fallo (p. ej. nombres
+    duplicados que impiden un índice único) se informa y no para el resto.
+    """
+    report = {}
+    for collection, models in declared_indexes().items():
+        existing = db[collection].index_information()
+        results = {}
+        for model in models:
+            name = model.document["name"]
+            try:
+                if name in existing:
+                    results[name] = _sync_ttl(db, collection, model, existing[name]) or "ok"
+                else:
+                    db[collection].create_indexes([model])
+                    results[name] = "created"
+            except (OperationFailure, PyMongoError) as e:
+                results[name] = f"error: {e}"
+                print(f"[ERROR] ensure_indexes {collection}.{name}: {e}")
+        report[collection] = results
+    return report
+
+
+def _usage(db, collection) -> dict:
+    try:
+        stats = db[collection].aggregate([{"$indexStats": {}}])
+        return {s["name"]: {"ops": s["accesses"]["ops"], "since": s["accesses"]["since"].isoformat()} for s in stats}
+    except PyMongoError:
+        return {}
+
+
+def index_report(db) -> dict:
+    """
+    Por colección: índices declarados que faltan, índices que no están
+    declarados y los que no se han usado desde que arrancó mongod.
+    """
+    report = {}
+    for collection, models in declared_indexes().items():
+        declared = {m.document["name"] for m in models}
+        existing = set(db[collection].index_information()) - {"_id_"}
+        usage = _usage(db, collection)
+        report[collection] = {
+            "missing": sorted(declared - existing),
+            "undeclared": sorted(existing - declared),
+            "unused": sorted(name for name in existing if usage.get(name, {}).get("ops") == 0),
+            "usage": {name: usage[name] for name in sorted(existing) if name in usage},
+        }
+    return report
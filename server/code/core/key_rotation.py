@@ -0,0 +1,222 @@
+# code/core/key_rotation.py
+#
+# Rotación de la clave de cifrado de `ref` en segundo plano: re-cifra con la
+# clave activa (SECRET_ENCRYPTION_KEY_ID) todos los documentos con otro key_id.
+#
+#  - Recorre la colección por lotes (KEY_ROTATION_BATCH_SIZE), ordenada por
+#    _id y paginando con `_id > último`, sin un cursor abierto todo el rato
+#  - Descifra/cifra cada lote en un pool de hilos (KEY_ROTATION_WORKERS) y
+#    lo escribe con un solo bulk_write; cada UpdateOne exige el `value`
+#    leído, así que un /ref/update concurrente gana (ya usa la clave activa)
+#  - Tras cada lote guarda el checkpoint en jobs/{_id: "ref_key_rotation"}:
+#    un reinicio (o POST /admin/secrets/rotate) continúa desde ahí
+#  - Corre en su propio hilo, fuera del threadpool de la API; entre lotes
+#    espera KEY_ROTATION_PAUSE_MS para no acaparar MongoDB
+# Importar siempre como `code.core.key_rotation` para no duplicar el singleton.
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pymongo import UpdateOne
+
+from code.core.mongo import get_db
+from code.core.secret_keys import ACTIVE_KEY_ID, decrypt_ref, encrypt_secret
+
+CHECKPOINT_ID = "ref_key_rotation"
+MAX_FAILED_IDS = 100
+
+
+def _int_env(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def rotation_settings() -> dict:
+    return {
+        "batch_size": _int_env("KEY_ROTATION_BATCH_SIZE", 500),
+        "workers": _int_env("KEY_ROTATION_WORKERS", 4),
+        "pause": _int_env("KEY_ROTATION_PAUSE_MS", 0) / 1000,
+    }
+
+
+def _reencrypt(doc, target):
+    """(doc, campos nuevos) o (doc, None) si no se pudo descifrar."""
+    try:
+        plaintext = decrypt_ref(doc)
+    except Exception:
+        return doc, None
+    return doc, encrypt_secret(plaintext, target)
+
+
+class KeyRotation:
+    def __init__(self, target_key_id=ACTIVE_KEY_ID, batch_size=500, workers=4, pause=0.0):
+        self.target = target_key_id
+        self.batch_size = batch_size
+        self.workers = workers
+        self.pause = pause
+        self._stop = threading.Event()
+        self._thread = None
+        self.stop_status = "paused"
+        self.state = {}
+
+    # --- checkpoint ---
+
+    def _jobs(self):
+        return get_db()["jobs"]
+
+    def _save(self):
+        self.state["updated_at"] = time.time()
+        self._jobs().replace_one({"_id": CHECKPOINT_ID}, {"_id": CHECKPOINT_ID, **self.state}, upsert=True)
+
+    def _load(self, restart: bool):
+        checkpoint = self._jobs().find_one({"_id": CHECKPOINT_ID}) or {}
+        checkpoint.pop("_id", None)
+        if (not restart and checkpoint.get("target_key_id") == self.target
+                and checkpoint.get("status") != "done"):
+            self.state = checkpoint
+            return
+        refs = get_db()["ref"]
+        self.state = {
+            "target_key_id": self.target,
+            "total": refs.count_documents({"key_id": {"$ne": self.target}}),
+            "last_id": None,
+            "processed": 0,
+            "rotated": 0,
+            "skipped": 0,
+            "failed": 0,
+            "failed_ids": [],
+            "started_at": time.time(),
+            "error": None,
+        }
+
+    # --- hilo ---
+
+    def start(self, restart: bool = False):
+        self._load(restart)
+        self.state.update(status="running", error=None, run_started_at=time.time(), run_processed=0)
+        self._save()
+        self._thread = threading.Thread(target=self._run, name="ref-key-rotation", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=30.0, status="paused"):
+        self.stop_status = status
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        refs = get_db()["ref"]
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ref-key-rotation") as pool:
+                while not self._stop.is_set():
+                    if not self._rotate_batch(refs, pool):
+                        self.state["status"] = "done"
+                        break
+                    self._save()
+                    if self.pause:
+                        self._stop.wait(self.pause)
+                else:
+                    self.state["status"] = self.stop_status
+        except Exception as e:
+            self.state.update(status="failed", error=str(e))
+            print(f"[ERROR] ref key rotation: {e}")
+        self._save()
+
+    def _rotate_batch(self, refs, pool) -> bool:
+        query = {"key_id": {"$ne": self.target}}
+        if self.state["last_id"] is not None:
+            query["_id"] = {"$gt": self.state["last_id"]}
+        batch = list(refs.find(query, {"_id": 1, "id": 1, "value": 1, "iv": 1, "tag": 1, "key_id": 1})
+                     .sort("_id", 1).limit(self.batch_size))
+        if not batch:
+            return False
+
+        ops = []
+        for doc, fields in pool.map(lambda d: _reencrypt(d, self.target), batch):
+            if fields is None:
+                self.state["failed"] += 1
+                if len(self.state["failed_ids"]) < MAX_FAILED_IDS:
+                    self.state["failed_ids"].append(doc.get("id"))
+                continue
+            ops.append(UpdateOne({"_id": doc["_id"], "value": doc["value"]}, {"$set": fields}))
+
+        if ops:
+            result = refs.bulk_write(ops, ordered=False)
+            self.state["rotated"] += result.modified_count
+            self.state["skipped"] += len(ops) - result.matched_count  # cambiados mientras tanto
+
+        self.state["last_id"] = batch[-1]["_id"]
+        self.state["processed"] += len(batch)
+        self.state["run_processed"] += len(batch)
+        return True
+
+    def progress(self) -> dict:
+        state = {k: v for k, v in self.state.items() if k != "last_id"}
+        state["failed_ids"] = list(state.get("failed_ids", []))
+        return _with_rates(state)
+
+
+def _with_rates(state: dict) -> dict:
+    total, processed = state.get("total") or 0, state.get("processed", 0)
+    state["percent"] = round(100.0 * processed / total, 1) if total else 100.0
+    elapsed = (state.get("updated_at") or time.time()) - (state.get("run_started_at") or time.time())
+    rate = state.get("run_processed", 0) / elapsed if elapsed > 0 else 0.0
+    state["docs_per_second"] = round(rate, 1)
+    state["eta_seconds"] = round(max(total - processed, 0) / rate) if rate and state.get("status") == "running" else None
+    return state
+
+
+_job = None
+_lock = threading.Lock()
+
+
+def start(restart: bool = False, **overrides) -> dict:
+    """Lanza (o continúa) la rotación. None si ya hay una en marcha."""
+    global _job
+    with _lock:
+        if _job is not None and _job.running():
+            return None
+        settings = {**rotation_settings(), **{k: v for k, v in overrides.items() if v}}
+        _job = KeyRotation(ACTIVE_KEY_ID, **settings)
+        _job.start(restart=restart)
+        return _job.progress()
+
+
+def pause() -> dict:
+    with _lock:
+        if _job is not None:
+            _job.stop()
+    return status()
+
+
+def status() -> dict:
+    if _job is not None:
+        return _job.progress()
+    checkpoint = get_db()["jobs"].find_one({"_id": CHECKPOINT_ID}, {"_id": 0, "last_id": 0})
+    if not checkpoint:
+        return {"status": "never_run", "target_key_id": ACTIVE_KEY_ID}
+    return _with_rates(checkpoint)
+
+
+def resume_pending():
+    """Al arrancar: continúa una rotación que quedó a medias por un reinicio."""
+    checkpoint = get_db()["jobs"].find_one({"_id": CHECKPOINT_ID}, {"status": 1, "target_key_id": 1})
+    if (checkpoint and checkpoint.get("status") in ("running", "interrupted")
+            and checkpoint.get("target_key_id") == ACTIVE_KEY_ID):
+        print("[INFO] ref key rotation: resuming from checkpoint")
+        start()
+
+
+def stop():
+    """Al parar el servidor: queda como "interrupted" y resume_pending() la retoma."""
+    global _job
+    with _lock:
+        if _job is not None:
+            if _job.running():
+                _job.stop(status="interrupted")
+            _job = None
@@ -0,0 +1,279 @@
+# code/core/log_sink.py
+#
+# Escritura del log de auditoría en segundo plano. Los handlers solo
+# encolan (LogEntry.save_default); un hilo agrupa las entradas y hace
+# insert_many por tamaño (LOG_BATCH_SIZE) o por tiempo (LOG_FLUSH_INTERVAL_MS).
+#
+# Cola llena (LOG_QUEUE_SIZE), según LOG_OVERFLOW:
+#   block → el handler espera hasta LOG_BLOCK_TIMEOUT_MS y, si sigue llena,
+#           la entrada va al fichero de desbordamiento
+#   spill → la entrada va directamente al fichero (LOG_SPILL_FILE, NDJSON)
+# Los lotes que MongoDB rechaza también van al fichero, y se reintentan
+# al arrancar el sink; las entradas que no se pueden escribir nunca (línea
+# corrupta, documento inválido) se descartan y se cuentan en "dropped".
+# Ningún error para el hilo. Se inicia y se vacía en el lifespan (server.py).
+# Importar siempre como `code.core.log_sink` para no duplicar el singleton.
+
+import os
+import queue
+import threading
+import time
+
+from bson import json_util
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from code.core.mongo import get_db
+
+_STOP = object()
+DUPLICATE_KEY = 11000
+
+
+def _int_env(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def sink_settings() -> dict:
+    overflow = os.getenv("LOG_OVERFLOW", "block").strip().lower()
+    if overflow not in ("block", "spill"):
+        raise ValueError(f"LOG_OVERFLOW must be 'block' or 'spill', not {overflow!r}")
+    return {
+        "queue_size": _int_env("LOG_QUEUE_SIZE", 10000),
+        "batch_size": _int_env("LOG_BATCH_SIZE", 500),
+        "flush_interval": _int_env("LOG_FLUSH_INTERVAL_MS", 1000) / 1000,
+        "overflow": overflow,
+        "block_timeout": _int_env("LOG_BLOCK_TIMEOUT_MS", 5000) / 1000,
+        "spill_path": os.getenv("LOG_SPILL_FILE", "/tmp/anc-audit-spill.ndjson"),
+    }
+
+
+class LogSink:
+    def __init__(self, collection_name="log", queue_size=10000, batch_size=500,
+                 flush_interval=1.0, overflow="block", block_timeout=5.0,
+                 spill_path="/tmp/anc-audit-spill.ndjson"):
+        self.collection_name = collection_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.spill_path = spill_path
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._spill_lock = threading.Lock()
+        self._counters_lock = threading.Lock()
+        self._thread = None
+        self.counters = {"enqueued": 0, "written": 0, "spilled": 0, "dropped": 0, "batches": 0}
+
+    def _count(self, **increments):
+        # Los handlers se ejecutan en varios hilos: `+=` sobre el dict no es atómico
+        with self._counters_lock:
+            for name, n in increments.items():
+                self.counters[name] += n
+
+    # --- lado de los handlers ---
+
+    def enqueue(self, doc: dict):
+        try:
+            if self.overflow == "block":
+                self._queue.put(doc, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(doc)
+            self._count(enqueued=1)
+        except queue.Full:
+            self._spill_or_drop([doc])
+
+    # --- hilo de escritura ---
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="audit-log-sink", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=10.0):
+        """
+        Escribe lo pendiente y para el hilo. Si el hilo ya no está, lo que
+        quede en la cola va al fichero; si no termina a tiempo, no se toca.
+        """
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            print("[ERROR] audit log: writer not draining the queue, spilling pending entries")
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            # Sigue escribiendo (o atascado en MongoDB): vaciar la cola ahora le
+            # robaría entradas o el _STOP; se deja tal cual y se avisa
+            print(f"[ERROR] audit log: writer still running after {timeout}s, "
+                  f"shutdown incomplete ({self._queue.qsize()} entries queued)")
+            return
+        self._thread = None
+
+        pending = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                pending.append(item)
+        if pending:
+            self._spill_or_drop(pending)
+
+    def _run(self):
+        try:
+            self._replay_spill()
+        except Exception as e:
+            print(f"[ERROR] audit log: replay of {self.spill_path} failed ({e!r})")
+        stopping = False
+        while not stopping:
+            batch = []
+            try:
+                batch, stopping = self._next_batch()
+                if batch:
+                    self._write(batch)
+            except Exception as e:
+                print(f"[ERROR] audit log writer: {e!r}")
+                self._spill_or_drop(batch)
+
+    def _next_batch(self):
+        """Hasta batch_size entradas, o las que lleguen en flush_interval desde la primera."""
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            timeout = None if deadline is None else deadline - time.monotonic()
+            if timeout is not None and timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+        return batch, False
+
+    def _insert(self, docs):
+        try:
+            get_db()[self.collection_name].insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # Al reintentar un lote ya escrito en parte, los _id repetidos no son error
+            if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])):
+                raise
+
+    def _insert_valid(self, docs) -> int:
+        """
+        _insert; si el lote trae documentos que no se pueden codificar
+        (bson.InvalidDocument...), se insertan uno a uno y se descartan esos.
+        Los PyMongoError (MongoDB caído, etc.) se propagan. Devuelve los escritos.
+        """
+        try:
+            self._insert(docs)
+            return len(docs)
+        except PyMongoError:
+            raise
+        except Exception:
+            pass
+        written = 0
+        for doc in docs:
+            try:
+                self._insert([doc])
+                written += 1
+            except PyMongoError:
+                raise
+            except Exception as e:
+                print(f"[ERROR] audit log: dropping invalid entry ({e!r})")
+                self._count(dropped=1)
+        return written
+
+    def _write(self, batch):
+        try:
+            self._count(written=self._insert_valid(batch), batches=1)
+        except PyMongoError as e:
+            print(f"[ERROR] audit log: {len(batch)} entries not written ({e}), spilling to {self.spill_path}")
+            self._spill_or_drop(batch)
+
+    # --- fichero de desbordamiento ---
+
+    def _spill(self, docs):
+        with self._spill_lock:
+            with open(self.spill_path, "a") as f:
+                for doc in docs:
+                    f.write(json_util.dumps(doc) + "\n")
+        self._count(spilled=len(docs))
+
+    def _spill_or_drop(self, docs):
+        """_spill sin propagar errores de disco a los handlers ni al hilo."""
+        if not docs:
+            return
+        try:
+            self._spill(docs)
+        except Exception as e:
+            print(f"[ERROR] audit log: {len(docs)} entries lost, cannot write {self.spill_path} ({e!r})")
+            self._count(dropped=len(docs))
+
+    def _replay_spill(self):
+        """Reintenta las entradas que quedaron en el fichero."""
+        replay_path = self.spill_path + ".replay"
+        with self._spill_lock:
+            if os.path.exists(self.spill_path) and not os.path.exists(replay_path):
+                os.replace(self.spill_path, replay_path)
+        if not os.path.exists(replay_path):
+            return
+
+        docs = []
+        bad_lines = 0
+        with open(replay_path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    docs.append(json_util.loads(line))
+                except Exception:
+                    bad_lines += 1
+        if bad_lines:
+            print(f"[ERROR] audit log: skipped {bad_lines} malformed lines in {replay_path}")
+            self._count(dropped=bad_lines)
+
+        for i in range(0, len(docs), self.batch_size):
+            chunk = docs[i:i + self.batch_size]
+            try:
+                self._count(written=self._insert_valid(chunk))
+            except PyMongoError as e:
+                print(f"[ERROR] audit log: replay of {self.spill_path} failed ({e})")
+                self._spill_or_drop(docs[i:])
+                break
+        os.remove(replay_path)
+        print(f"[INFO] audit log: replayed {len(docs)} spilled entries")
+
+    def stats(self) -> dict:
+        with self._counters_lock:
+            counters = dict(self.counters)
+        return {**counters, "queued": self._queue.qsize(), "overflow": self.overflow}
+
+
+_sink = None
+
+
+def start() -> LogSink:
+    global _sink
+    if _sink is None:
+        _sink = LogSink(**sink_settings())
+        _sink.start()
+    return _sink
+
+
+def stop():
+    global _sink
+    if _sink is not None:
+        _sink.stop()
+        _sink = None
+
+
+def get_sink():
+    return _sink
+
+
+def stats() -> dict:
+    return _sink.stats() if _sink else {"running": False}
@@ -2,8 +2,9 @@
 
 from typing import Optional, Dict, Any
 from fastapi import Request, Response
-from code.core.utils import now_tz
-from code.core.ancdb import ancDB
+from code.core.utils import now_tz_ss
+from code.core import log_sink
+from code.core.mongo import get_db
 
 
 class LogEntry:
@@ -19,7 +20,8 @@ class LogEntry:
         status_code: int,
         extra: Optional[Dict[str, Any]] = None
     ):
-        self.timestamp = now_tz()
+        # datetime (no string) para que el índice TTL de log.timestamp funcione
+        self.timestamp = now_tz_ss()
         self.resource = resource
         self.resource_id = resource_id
         self.action = action
@@ -48,7 +50,25 @@ class LogEntry:
         collection.insert_one(self.to_dict())
 
     def save_default(self):
-        self.save(ancDB().get_collection("log"))
+        # Con el sink en marcha (servidor) solo se encola; fuera de él, directo
+        sink = log_sink.get_sink()
+        if sink is not None:
+            sink.enqueue(self.to_dict())
+        else:
+            self.save(get_db()["log"])
+
+    @staticmethod
+    def save_many_default(entries):
+        """Varias entradas de una petición (p. ej. /ref/get_many) en una sola escritura."""
+        docs = [entry.to_dict() for entry in entries]
+        if not docs:
+            return
+        sink = log_sink.get_sink()
+        if sink is not None:
+            for doc in docs:
+                sink.enqueue(doc)
+        else:
+            get_db()["log"].insert_many(docs, ordered=False)
 
     @classmethod
     def from_request(
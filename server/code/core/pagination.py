@@ -0,0 +1,80 @@
+# code/core/pagination.py
+#
+# Paginación por cursor opaco y respuestas NDJSON para los listados.
+# Los listados se ordenan por nombre (único), así que el cursor es
+# simplemente el último nombre entregado, codificado en base64url.
+#
+#   ?limit=N            → página de N elementos; si quedan más, la
+#                         cabecera X-Next-Cursor trae el cursor siguiente
+#   ?cursor=...         → continúa tras ese cursor
+#   ?stream=true        → NDJSON, un elemento por línea según se leen; si
+#                         se cortó por `limit`, la última línea es
+#                         {"next_cursor": "..."}
+# Sin parámetros la respuesta es la misma lista JSON de siempre.
+
+import base64
+import json
+from itertools import islice
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+
+MAX_LIMIT = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_name: str) -> str:
+    raw = json.dumps({"after": last_name}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Último nombre entregado, o None sin cursor. 400 si no es válido."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        after = json.loads(raw)["after"]
+        if not isinstance(after, str):
+            raise ValueError
+        return after
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def check_limit(limit):
+    if limit is None:
+        return None
+    if limit < 1 or limit > MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_LIMIT}")
+    return limit
+
+
+def paginated_response(items, limit=None, stream=False, key=lambda item: item["name"]):
+    """
+    Respuesta para un iterable de elementos ya ordenados por `key`.
+    Se consume de forma perezosa: con `limit` se lee un elemento de más
+    para saber si hay página siguiente.
+    """
+    items = iter(items)
+
+    if stream:
+        def generate():
+            last = None
+            for count, item in enumerate(items):
+                if limit is not None and count == limit:
+                    yield json.dumps({"next_cursor": encode_cursor(key(last))}) + "\n"
+                    return
+                last = item
+                yield json.dumps(item, default=str) + "\n"
+        return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+    if limit is None:
+        return JSONResponse(content=list(items))
+
+    page = list(islice(items, limit + 1))
+    headers = {}
+    if len(page) > limit:
+        page = page[:limit]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(key(page[-1]))
+    return JSONResponse(content=page, headers=headers)
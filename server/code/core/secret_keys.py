@@ -0,0 +1,76 @@
+# code/core/secret_keys.py
+#
+# Cifrado de los secretos de `ref` con claves versionadas. Cada documento
+# guarda el `key_id` con el que se cifró, así que conviven varias claves
+# mientras dura una rotación (code/core/key_rotation.py).
+#
+#   SECRET_ENCRYPTION_KEY       clave "default" (32 bytes base64); es la de
+#                               los documentos anteriores a `key_id`
+#   SECRET_ENCRYPTION_KEYS      más claves: "k2:<base64>,k3:<base64>"
+#   SECRET_ENCRYPTION_KEY_ID    clave activa para cifrar (por defecto "default")
+
+import base64
+import os
+
+from Crypto.Cipher import AES
+from Crypto.Random import get_random_bytes
+
+LEGACY_KEY_ID = "default"
+ENCODING = "aes256-gcm"
+
+
+def _load_keys() -> dict:
+    keys = {LEGACY_KEY_ID: base64.b64decode(os.getenv(
+        "SECRET_ENCRYPTION_KEY",
+        "HhYXbo7Nbp3fKU7xvku0tkgZ524k40AFY3NjzK+szoU="  # valor de prueba, reemplazar en prod
+    ))}
+    for item in os.getenv("SECRET_ENCRYPTION_KEYS", "").split(","):
+        if not item.strip():
+            continue
+        key_id, _, value = item.strip().partition(":")
+        keys[key_id] = base64.b64decode(value)
+    for key_id, key in keys.items():
+        if len(key) != 32:
+            raise RuntimeError(f"Secret encryption key '{key_id}' must be 32 bytes (base64)")
+    return keys
+
+
+KEYS = _load_keys()
+ACTIVE_KEY_ID = os.getenv("SECRET_ENCRYPTION_KEY_ID", LEGACY_KEY_ID)
+if ACTIVE_KEY_ID not in KEYS:
+    raise RuntimeError(f"SECRET_ENCRYPTION_KEY_ID '{ACTIVE_KEY_ID}' is not a configured key")
+
+
+def get_key(key_id: str) -> bytes:
+    try:
+        return KEYS[key_id or LEGACY_KEY_ID]
+    except KeyError:
+        raise KeyError(f"Unknown secret encryption key '{key_id}'")
+
+
+def encrypt_secret(plaintext: str, key_id: str = None) -> dict:
+    key_id = key_id or ACTIVE_KEY_ID
+    iv = get_random_bytes(12)
+    cipher = AES.new(get_key(key_id), AES.MODE_GCM, nonce=iv)
+    ciphertext, tag = cipher.encrypt_and_digest(plaintext.encode())
+
+    return {
+        "value": base64.b64encode(ciphertext).decode(),
+        "iv": base64.b64encode(iv).decode(),
+        "tag": base64.b64encode(tag).decode(),
+        "encoding": ENCODING,
+        "key_id": key_id,
+    }
+
+
+def decrypt_secret(value_b64: str, iv_b64: str, tag_b64: str, key_id: str = None) -> str:
+    cipher = AES.new(get_key(key_id), AES.MODE_GCM, nonce=base64.b64decode(iv_b64))
+    return cipher.decrypt_and_verify(
+        base64.b64decode(value_b64),
+        base64.b64decode(tag_b64)
+    ).decode()
+
+
+def decrypt_ref(ref: dict) -> str:
+    """Descifra un documento de `ref` con la clave que indique su key_id."""
+    return decrypt_secret(ref["value"], ref["iv"], ref["tag"], ref.get("key_id"))
@@ -1,97 +1,37 @@
 from zoneinfo import ZoneInfo
 import os
 from datetime import datetime
-import re
 import pytz
 
-def get_nested(d, key):
-    """
-    Permite acceder a claves anidadas usando notación punto, ej: endpoint.base_url
-    """
-    parts = key.split(".")
-    for part in parts:
-        if not isinstance(d, dict) or part not in d:
-            return None
-        d = d[part]
-    return d
+from filterlang import FilterSyntaxError, compile_filter, get_nested
 
-def normalize_value(value):
-    """
-    Convierte strings comunes a tipos útiles: bool, int, etc.
-    """
-    if isinstance(value, str):
-        v = value.lower()
-        if v == "true":
-            return True
-        if v == "false":
-            return False
-        if v.isdigit():
-            return int(v)
-    return value
 
-def expr_to_lambda(expr_str):
+def get_matcher(filter_str: str):
     """
-    Convierte una expresión tipo: env=prod AND project~web
-    en una función que evalúa un dict.
+    Matcher compilado para una expresión. Una expresión inválida no
+    acepta ningún documento (mismo comportamiento que matches_filter).
     """
-    expr_str = expr_str.replace(" AND ", " and ").replace(" OR ", " or ")
-    pattern = re.compile(r'([a-zA-Z0-9_.]+)\s*(!=|=|~|!~)\s*("[^"]+"|[^\s()]+)')
-    var_map = {}
-
-    for i, (key, op, val) in enumerate(pattern.findall(expr_str)):
-        var_name = f"_v{i}"
-        full_expr = f"{key}{op}{val}"
-        expr_str = expr_str.replace(full_expr, var_name)
-        var_map[var_name] = (key.strip(), op.strip(), normalize_value(val.strip('"')))
-
-    def matcher(data):
-        env = {}
-        for var_name, (key, op, expected) in var_map.items():
-            actual = get_nested(data, key)
-            if op == "=":
-                if isinstance(actual, list):
-                    env[var_name] = expected in actual
-                else:
-                    env[var_name] = (actual == expected)
-            elif op == "!=":
-                if isinstance(actual, list):
-                    env[var_name] = expected not in actual
-                else:
-                    env[var_name] = (actual != expected)
-            elif op == "~":
-                if isinstance(actual, list):
-                    env[var_name] = any(expected in str(item) for item in actual)
-                else:
-                    env[var_name] = expected in str(actual) if actual is not None else False
-            elif op == "!~":
-                if isinstance(actual, list):
-                    env[var_name] = all(expected not in str(item) for item in actual)
-                else:
-                    env[var_name] = expected not in str(actual) if actual is not None else True
-        try:
-            return eval(expr_str, {}, env)
-        except Exception:
-            return False
+    if not filter_str:
+        return lambda data: True
+    try:
+        return compile_filter(filter_str)
+    except FilterSyntaxError:
+        return lambda data: False
 
-    return matcher
 
 def matches_filter(data: dict, filter_str: str) -> bool:
     """
     Evalúa si un diccionario cumple con una expresión de filtro.
+    El filtro se compila una vez (cache en filterlang) y se reutiliza.
     """
     if not filter_str:
         return True
     try:
-        matcher = expr_to_lambda(filter_str)
-        return matcher(data)
+        return compile_filter(filter_str)(data)
     except Exception:
         return False
 
 
-
-
-
-
 TIMEZONE = os.getenv("TZ", "Europe/Madrid")
 
 def now_tz():
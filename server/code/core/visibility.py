@@ -0,0 +1,68 @@
+# code/core/visibility.py
+#
+# Reglas de visibilidad como queries de MongoDB, para filtrar en la base
+# de datos (con índices) en lugar de traer todo y descartar en Python.
+# Deben devolver lo mismo que is_visible (dbsync) e is_ref_visible (ref):
+#  - `groups`/`users` como lista → pertenencia exacta de un elemento
+#  - como string → lo que haga `in` de Python en cada función
+
+import re
+
+
+def _is_empty(field: str) -> list:
+    """`not doc.get(field)` para los valores que se dan en la práctica."""
+    return [
+        {field: None},  # null o ausente
+        {field: []},
+        {field: {"$eq": "", "$not": {"$type": "array"}}},
+    ]
+
+
+def _matches(field: str, exact: list, substrings: list) -> list:
+    """
+    Elemento de la lista igual a alguno de `exact`, o bien, si el campo es
+    un string, que contenga alguna de `substrings`.
+    """
+    clauses = []
+    exact = [v for v in exact if isinstance(v, str)]
+    if exact:
+        clauses.append({field: {"$in": exact, "$type": "array"}})
+    substrings = [v for v in substrings if isinstance(v, str)]
+    if substrings:
+        pattern = "|".join(re.escape(v) for v in substrings)
+        clauses.append({field: {"$regex": pattern, "$not": {"$type": "array"}}})
+    return clauses
+
+
+def anchor_visibility_query(user_groups: list) -> dict:
+    """
+    Equivalente a dbsync.is_visible. Devuelve {} si no hay restricción (admins).
+    """
+    if "admins" in user_groups:
+        return {}
+    # is_visible recorre `groups`: con un string recorre sus caracteres,
+    # así que solo cuentan los grupos de una letra
+    chars = [g for g in user_groups if isinstance(g, str) and len(g) == 1]
+    return {"$or": _is_empty("groups") + _matches("groups", ["all", *user_groups], ["all", *chars])}
+
+
+def ref_visibility_query(user: str, groups: list) -> dict:
+    """
+    Equivalente a ref.is_ref_visible: el creador siempre; si hay `users`,
+    solo ellos; si no, cualquiera de los grupos del usuario.
+    """
+    clauses = [{"created_by": user}, *_matches("users", [user], [user])]
+    by_group = _matches("groups", list(groups), list(groups))
+    if by_group:
+        clauses.append({"$and": [{"$or": _is_empty("users")}, {"$or": by_group}]})
+    return {"$or": clauses}
+
+
+def merge_queries(*queries) -> dict:
+    """AND de varias queries, omitiendo las vacías."""
+    queries = [q for q in queries if q]
+    if not queries:
+        return {}
+    if len(queries) == 1:
+        return queries[0]
+    return {"$and": queries}
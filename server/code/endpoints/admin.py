@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Body, Depends, HTTPException
+from auth import ldap
+from auth.session import require_group
+from code.core import key_rotation
+from code.core.ancdb import ancDB, get_ancdb
+from code.core.indexes import ensure_indexes, index_report
+
+router = APIRouter()
+
+
+# GET /admin/indexes → índices que faltan, no declarados o sin uso
+@router.get("/admin/indexes", tags=["admin"])
+def get_indexes(
+    _=Depends(require_group("admins")),
+    db: ancDB = Depends(get_ancdb)
+):
+    return index_report(db.db)
+
+
+# POST /admin/indexes → crea los que falten (lo mismo que al arrancar)
+@router.post("/admin/indexes", tags=["admin"])
+def create_indexes(
+    _=Depends(require_group("admins")),
+    db: ancDB = Depends(get_ancdb)
+):
+    return ensure_indexes(db.db)
+
+
+# GET /admin/ldap/cache → tamaño y aciertos de las cachés de LDAP
+@router.get("/admin/ldap/cache", tags=["admin"])
+def get_ldap_cache(_=Depends(require_group("admins"))):
+    return ldap.cache_stats()
+
+
+# DELETE /admin/ldap/cache[?username=...] → relee de LDAP dn y grupos
+@router.delete("/admin/ldap/cache", tags=["admin"])
+def clear_ldap_cache(
+    username: str | None = None,
+    _=Depends(require_group("admins"))
+):
+    if username:
+        ldap.invalidate_user(username)
+    else:
+        ldap.clear_caches()
+    return {"status": "ok", "cleared": username or "all"}
+
+
+# POST /admin/secrets/rotate {"restart"?, "batch_size"?, "workers"?}
+#   → re-cifra `ref` con la clave activa en segundo plano (continúa el checkpoint)
+@router.post("/admin/secrets/rotate", tags=["admin"], status_code=202)
+def start_key_rotation(
+    data: dict = Body(default={}),
+    _=Depends(require_group("admins"))
+):
+    progress = key_rotation.start(
+        restart=bool(data.get("restart")),
+        batch_size=data.get("batch_size"),
+        workers=data.get("workers"),
+    )
+    if progress is None:
+        raise HTTPException(status_code=409, detail="A key rotation is already running")
+    return progress
+
+
+# GET /admin/secrets/rotate → progreso (procesados, %, docs/s, ETA, fallos)
+@router.get("/admin/secrets/rotate", tags=["admin"])
+def get_key_rotation(_=Depends(require_group("admins"))):
+    return key_rotation.status()
+
+
+# DELETE /admin/secrets/rotate → pausa tras el lote actual (POST la continúa)
+@router.delete("/admin/secrets/rotate", tags=["admin"])
+def pause_key_rotation(_=Depends(require_group("admins"))):
+    return key_rotation.pause()
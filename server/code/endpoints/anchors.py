@@ -8,7 +8,9 @@ import json
 import re
 import os
 from code.auth.session import get_current_user, require_group
-from core.utils import matches_filter
+from core.utils import get_matcher
+from code.core.pagination import check_limit, decode_cursor, paginated_response
+from code.core.anchor_index import get_index
 from code.core.auth_checker_user_groups import check_anchor_access
 
 
@@ -17,22 +19,26 @@ router = APIRouter()
 BASE_DIR = Path(__file__).resolve().parent.parent.parent  # Sube desde /code/endpoints/ a la raíz
 ANCHORS_DIR = BASE_DIR / "anchors"
 ANCHORS_DIR.mkdir(parents=True, exist_ok=True)
+index = get_index(ANCHORS_DIR)
 
 @router.get("")
-def list_anchors(filter: List[str] = Query(default=[])):
-    anchors = []
-    for file in ANCHORS_DIR.glob("*.json"):
-        try:
-            with open(file) as f:
-                data = json.load(f)
+def list_anchors(
+    filter: List[str] = Query(default=[]),
+    limit: int | None = None,
+    cursor: str | None = None,
+    stream: bool = False
+):
+    matchers = [get_matcher(f_expr) for f_expr in filter]
+    limit = check_limit(limit)
+    after = decode_cursor(cursor)
 
-            matched = all(matches_filter(data, f_expr) for f_expr in filter)
-            if matched:
-                anchors.append(file.stem)
+    def matching_names():
+        # Índice en memoria, ya ordenado por nombre (cursor estable)
+        for name, data in index.items(after=after):
+            if all(match(data) for match in matchers):
+                yield name
 
-        except Exception:
-            continue
-    return anchors
+    return paginated_response(matching_names(), limit=limit, stream=stream, key=lambda name: name)
 
 
 @router.get("/{name}")
@@ -64,6 +70,7 @@ def upload_anchor(file: UploadFile = File(...)):
             json.dump(data, f, indent=2)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save: {e}")
+    index.put(anchor_name, data)
 
     return {
         "status": "ok",
@@ -78,6 +85,7 @@ def delete_anchor(name: str):
     path = ANCHORS_DIR / f"{name}.json"
     if path.exists():
         path.unlink()
+        index.remove(name)
         return {"status": "deleted"}
     else:
         raise HTTPException(status_code=404, detail="Anchor not found")
@@ -90,11 +98,9 @@ def get_anchor_raw(name: str, request: Request, user: str = Depends(get_current_
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="Anchor not found")
 
-    try:
-        with open(file_path) as f:
-            data = json.load(f)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Invalid JSON or read error: {e}")
+    data = index.get(name)
+    if data is None:
+        raise HTTPException(status_code=500, detail="Invalid JSON or read error")
 
     check_anchor_access(data, request)
     return data
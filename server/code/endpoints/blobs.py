@@ -0,0 +1,112 @@
+import hashlib
+import os
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response
+from code.auth.session import get_current_groups, get_current_user, require_group
+from code.core.ancdb import ancDB, get_ancdb
+from code.core.blob_store import BlobStore, MAX_BLOB_SIZE, gc, refcount
+from code.core.visibility import anchor_visibility_query, merge_queries
+
+router = APIRouter()
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent  # Sube desde /code/endpoints/ a la raíz
+BLOBS_DIR = Path(os.getenv("BLOBS_DIR", BASE_DIR / "blobs"))
+store = BlobStore(BLOBS_DIR)
+
+SHA256_HEADER = "X-Content-SHA256"
+# En el 404 de HEAD: distingue "blob que falta" de "servidor sin /blobs"
+BLOB_STORE_HEADER = "X-Blob-Store"
+
+# Lectura: solo si algún anchor visible para el usuario referencia el blob
+# (blob_refs); si no, 404 como si no existiera, para que HEAD/GET no digan a
+# nadie si un contenido está guardado ni den acceso a blobs ajenos por hash.
+
+
+def _visible(db: ancDB, sha256: str, groups: list) -> bool:
+    query = merge_queries({"blob_refs": sha256}, anchor_visibility_query(groups))
+    return db.get_collection("anchors").count_documents(query, limit=1) > 0
+
+
+# HEAD /blobs/{sha256} → 200 si el servidor ya lo tiene (el cliente no lo sube)
+@router.head("/{sha256}")
+def blob_exists(
+    sha256: str,
+    user: str = Depends(get_current_user),
+    groups: list = Depends(get_current_groups),
+    db: ancDB = Depends(get_ancdb)
+):
+    path = store.path(sha256)
+    if not path.is_file() or not _visible(db, sha256, groups):
+        return Response(status_code=404, headers={BLOB_STORE_HEADER: "1"})
+    store.touch(sha256)
+    return Response(headers={"Content-Length": str(path.stat().st_size), SHA256_HEADER: sha256})
+
+
+# GET /blobs/{sha256} → contenido (Range); inmutable, se puede cachear siempre
+@router.get("/{sha256}")
+def get_blob(
+    sha256: str,
+    user: str = Depends(get_current_user),
+    groups: list = Depends(get_current_groups),
+    db: ancDB = Depends(get_ancdb)
+):
+    path = store.path(sha256)
+    if not path.is_file() or not _visible(db, sha256, groups):
+        raise HTTPException(status_code=404, detail="Blob not found")
+    return FileResponse(path, headers={
+        SHA256_HEADER: sha256,
+        "ETag": f'"{sha256}"',
+        "Cache-Control": "private, max-age=31536000, immutable",
+    })
+
+
+# PUT /blobs/{sha256} → cuerpo en streaming; se verifica el sha256 antes de publicarlo
+@router.put("/{sha256}")
+async def put_blob(sha256: str, request: Request, user: str = Depends(get_current_user)):
+    if await run_in_threadpool(store.exists, sha256):
+        return JSONResponse({"sha256": sha256, "created": False})
+
+    out, tmp_path = await run_in_threadpool(store.open_writer)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with out:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > MAX_BLOB_SIZE:
+                    raise HTTPException(status_code=413, detail=f"Blob larger than {MAX_BLOB_SIZE} bytes")
+                digest.update(chunk)
+                await run_in_threadpool(out.write, chunk)
+        created = await run_in_threadpool(store.commit, tmp_path, sha256, digest.hexdigest())
+    except BaseException:
+        await run_in_threadpool(store.discard, tmp_path)
+        raise
+    return JSONResponse(
+        status_code=201 if created else 200,
+        content={"sha256": sha256, "size": size, "created": created},
+        headers={SHA256_HEADER: sha256},
+    )
+
+
+# GET /blobs/{sha256}/refs → nº de anchors que lo referencian (admins)
+@router.get("/{sha256}/refs")
+def blob_refs(
+    sha256: str,
+    _=Depends(require_group("admins")),
+    db: ancDB = Depends(get_ancdb)
+):
+    store.path(sha256)  # valida el formato
+    return {"sha256": sha256, "refs": refcount(db.get_collection("anchors"), sha256)}
+
+
+# POST /blobs/gc[?dry_run=true] → borra los blobs que ningún anchor referencia (admins)
+@router.post("/gc")
+def collect_garbage(
+    dry_run: bool = False,
+    _=Depends(require_group("admins")),
+    db: ancDB = Depends(get_ancdb)
+):
+    return gc(store, db.get_collection("anchors"), dry_run=dry_run)
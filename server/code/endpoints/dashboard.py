@@ -1,93 +1,248 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import HTMLResponse
-from pymongo.collection import Collection
-from core.ancdb import ancDB
+from pymongo import ASCENDING, DESCENDING
+from code.auth.session import get_current_groups
+from code.core.ancdb import ancDB, get_ancdb
+from code.core.pagination import check_limit
+from code.core.visibility import anchor_visibility_query, merge_queries
+from core.filter import parse_to_mongo_query
 
 router = APIRouter()
-db = ancDB()
 
+DASHBOARD_PROJECTION = {
+    "_id": 0,
+    "name": 1,
+    "type": 1,
+    "env": 1,
+    "project": 1,
+    "note": 1,
+    "path": 1,
+    "endpoint.base_url": 1,
+    "last_updated": 1,
+    "groups": 1,
+    "external": 1
+}
+
+SORT_FIELDS = {"name", "type", "env", "project", "last_updated"}
+
+
+# GET /dashboard/data?filter=&sort=&order=&offset=&limit=
+# Ventana de anchors visibles para el usuario, con el total para el scroll
+@router.get("/dashboard/data", tags=["dashboard"])
+def dashboard_data(
+    filter: str = "",
+    sort: str = "name",
+    order: str = "asc",
+    offset: int = 0,
+    limit: int = 100,
+    user_groups: list[str] = Depends(get_current_groups),
+    db: ancDB = Depends(get_ancdb)
+):
+    if sort not in SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(sorted(SORT_FIELDS))}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="offset must be >= 0")
+    limit = check_limit(limit)
+
+    query = parse_to_mongo_query(filter)
+    if query is None:
+        raise HTTPException(status_code=400, detail="Invalid filter expression")
+    query = merge_queries(query, anchor_visibility_query(user_groups))
+
+    # name desempata para que el orden (y por tanto el offset) sea estable
+    direction = ASCENDING if order == "asc" else DESCENDING
+    sort_spec = [(sort, direction)] + ([("name", ASCENDING)] if sort != "name" else [])
+
+    collection = db.get_collection("anchors")
+    total = collection.count_documents(query)
+    items = list(collection.find(query, DASHBOARD_PROJECTION).sort(sort_spec).skip(offset).limit(limit))
+
+    return {"total": total, "offset": offset, "limit": limit, "items": items}
+
+
+# GET /dashboard → página estática; los datos se piden por ventanas a /dashboard/data
 @router.get("/dashboard", response_class=HTMLResponse)
-def dashboard(request: Request):
-    collection: Collection = db.get_collection("anchors")
-
-    projection = {
-        "_id": 0,
-        "name": 1,
-        "type": 1,
-        "env": 1,
-        "project": 1,
-        "note": 1,
-        "path": 1,
-        "endpoint": 1,
-        "last_updated": 1,
-        "groups": 1,
-        "external": 1
+def dashboard():
+    return DASHBOARD_HTML
+
+
+DASHBOARD_HTML = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>Anchor Server Dashboard</title>
+    <style>
+        body { font-family: sans-serif; padding: 2rem; margin: 0; }
+        .toolbar { display: flex; gap: 0.5rem; margin-bottom: 1rem; }
+        .toolbar input { padding: 0.4rem; border: 1px solid #ccc; }
+        #filter { flex: 1; }
+        #status { color: #666; align-self: center; }
+        .grid { border: 1px solid #ccc; }
+        .row { display: grid; grid-template-columns: 14% 7% 7% 10% 18% 10% 5% 17% 12%;
+               height: 32px; line-height: 32px; border-bottom: 1px solid #eee; }
+        .row div { padding: 0 0.5rem; overflow: hidden; white-space: nowrap; text-overflow: ellipsis; }
+        .head { background-color: #f4f4f4; font-weight: bold; border-bottom: 1px solid #ccc; }
+        .head div { cursor: pointer; user-select: none; }
+        #viewport { height: 70vh; overflow-y: auto; position: relative; }
+        #spacer { position: relative; }
+        #spacer .row { position: absolute; left: 0; right: 0; }
+        .loading { color: #aaa; }
+        a { text-decoration: none; color: #0366d6; }
+        a:hover { text-decoration: underline; }
+    </style>
+</head>
+<body>
+    <h1>⚓ Anchor Server Dashboard</h1>
+    <div class="toolbar">
+        <input id="filter" placeholder='Filter, e.g. env=prod AND project~web'>
+        <input id="token" type="password" placeholder="Bearer token (optional)">
+        <span id="status"></span>
+    </div>
+    <div class="grid">
+        <div class="row head" id="head">
+            <div data-sort="name">Name</div>
+            <div data-sort="type">Type</div>
+            <div data-sort="env">Env</div>
+            <div data-sort="project">Project</div>
+            <div>Note</div>
+            <div>Groups</div>
+            <div>External</div>
+            <div>Path / URL</div>
+            <div data-sort="last_updated">Last Updated</div>
+        </div>
+        <div id="viewport"><div id="spacer"></div></div>
+    </div>
+<script>
+const ROW_HEIGHT = 32, PAGE_SIZE = 200, OVERSCAN = 10;
+const viewport = document.getElementById("viewport");
+const spacer = document.getElementById("spacer");
+const statusEl = document.getElementById("status");
+const filterEl = document.getElementById("filter");
+const tokenEl = document.getElementById("token");
+
+let state = { filter: "", sort: "name", order: "asc", total: 0, generation: 0 };
+let pages = new Map();   // nº de página → array de anchors | "loading"
+
+tokenEl.value = sessionStorage.getItem("ancToken") || "";
+
+function cell(text) {
+    const div = document.createElement("div");
+    div.textContent = text == null ? "" : String(text);
+    div.title = div.textContent;
+    return div;
+}
+
+function renderRow(index, anchor) {
+    const row = document.createElement("div");
+    row.className = "row";
+    row.style.top = (index * ROW_HEIGHT) + "px";
+    if (!anchor) {
+        row.classList.add("loading");
+        row.appendChild(cell("…"));
+        return row;
+    }
+    const nameCell = document.createElement("div");
+    const link = document.createElement("a");
+    link.href = "/anchors/" + encodeURIComponent(anchor.name) + "/raw";
+    link.target = "_blank";
+    link.textContent = anchor.name;
+    nameCell.appendChild(link);
+    row.appendChild(nameCell);
+    const groups = Array.isArray(anchor.groups) && anchor.groups.length ? anchor.groups.join(", ") : (anchor.groups || "all");
+    const pathOrUrl = anchor.path || (anchor.endpoint && anchor.endpoint.base_url) || "";
+    [anchor.type, anchor.env, anchor.project, anchor.note, groups,
+     anchor.external ? "✅" : "", pathOrUrl, anchor.last_updated].forEach(v => row.appendChild(cell(v)));
+    return row;
+}
+
+// Solo se pintan las filas de la ventana visible (más un margen)
+function render() {
+    const first = Math.max(0, Math.floor(viewport.scrollTop / ROW_HEIGHT) - OVERSCAN);
+    const last = Math.min(state.total, Math.ceil((viewport.scrollTop + viewport.clientHeight) / ROW_HEIGHT) + OVERSCAN);
+    const fragment = document.createDocumentFragment();
+    for (let i = first; i < last; i++) {
+        const page = pages.get(Math.floor(i / PAGE_SIZE));
+        if (!page) loadPage(Math.floor(i / PAGE_SIZE));
+        fragment.appendChild(renderRow(i, Array.isArray(page) ? page[i % PAGE_SIZE] : null));
+    }
+    spacer.replaceChildren(fragment);
+}
+
+async function loadPage(number) {
+    if (pages.has(number)) return;
+    pages.set(number, "loading");
+    const generation = state.generation;
+    const params = new URLSearchParams({
+        filter: state.filter, sort: state.sort, order: state.order,
+        offset: number * PAGE_SIZE, limit: PAGE_SIZE
+    });
+    const headers = tokenEl.value ? { "Authorization": "Bearer " + tokenEl.value } : {};
+    try {
+        const response = await fetch("/dashboard/data?" + params, { headers });
+        const body = await response.json();
+        if (generation !== state.generation) return;  // respuesta de una consulta anterior
+        if (!response.ok) {
+            pages.delete(number);
+            statusEl.textContent = "⚠️ " + (body.detail || response.status);
+            return;
+        }
+        pages.set(number, body.items);
+        if (body.total !== state.total) {
+            state.total = body.total;
+            spacer.style.height = (state.total * ROW_HEIGHT) + "px";
+        }
+        statusEl.textContent = state.total + " anchors";
+        render();
+    } catch (e) {
+        pages.delete(number);
+        statusEl.textContent = "⚠️ " + e;
     }
+}
+
+function reload() {
+    state.generation++;
+    state.total = 0;
+    pages = new Map();
+    viewport.scrollTop = 0;
+    spacer.style.height = "0px";
+    spacer.replaceChildren();
+    statusEl.textContent = "Loading…";
+    loadPage(0);
+}
+
+let scheduled = false;
+viewport.addEventListener("scroll", () => {
+    if (scheduled) return;
+    scheduled = true;
+    requestAnimationFrame(() => { scheduled = false; render(); });
+});
+
+let debounce;
+filterEl.addEventListener("input", () => {
+    clearTimeout(debounce);
+    debounce = setTimeout(() => { state.filter = filterEl.value.trim(); reload(); }, 300);
+});
+
+tokenEl.addEventListener("change", () => {
+    sessionStorage.setItem("ancToken", tokenEl.value);
+    reload();
+});
+
+document.querySelectorAll("#head [data-sort]").forEach(el => {
+    el.addEventListener("click", () => {
+        const field = el.dataset.sort;
+        state.order = state.sort === field && state.order === "asc" ? "desc" : "asc";
+        state.sort = field;
+        document.querySelectorAll("#head [data-sort]").forEach(h => h.textContent = h.textContent.replace(/ [▲▼]$/, ""));
+        el.textContent += state.order === "asc" ? " ▲" : " ▼";
+        reload();
+    });
+});
 
-    anchors = list(collection.find({}, projection))
-
-    rows = []
-    for anchor in anchors:
-        name = anchor.get("name", "")
-        type_ = anchor.get("type", "")
-        env = anchor.get("env", "")
-        project = anchor.get("project", "")
-        note = anchor.get("note", "")
-        updated = anchor.get("last_updated", "")
-        groups = ", ".join(anchor.get("groups", [])) if anchor.get("groups") else "all"
-        path_or_url = anchor.get("path") or anchor.get("endpoint", {}).get("base_url", "")
-        external = "✅" if anchor.get("external") else ""
-
-        row = f"""
-            <tr>
-                <td><a href="/anchors/{name}/raw" target="_blank">{name}</a></td>
-                <td>{type_}</td>
-                <td>{env}</td>
-                <td>{project}</td>
-                <td>{note}</td>
-                <td>{groups}</td>
-                <td>{external}</td>
-                <td>{path_or_url}</td>
-                <td>{updated}</td>
-            </tr>
-        """
-        rows.append(row)
-
-    html = f"""
-    <html>
-    <head>
-        <title>Anchor Server Dashboard</title>
-        <style>
-            body {{ font-family: sans-serif; padding: 2rem; }}
-            table {{ border-collapse: collapse; width: 100%; }}
-            th, td {{ border: 1px solid #ccc; padding: 0.5rem; text-align: left; }}
-            th {{ background-color: #f4f4f4; }}
-            a {{ text-decoration: none; color: #0366d6; }}
-            a:hover {{ text-decoration: underline; }}
-        </style>
-    </head>
-    <body>
-        <h1>⚓ Anchor Server Dashboard</h1>
-        <table>
-            <thead>
-                <tr>
-                    <th>Name</th>
-                    <th>Type</th>
-                    <th>Env</th>
-                    <th>Project</th>
-                    <th>Note</th>
-                    <th>Groups</th>
-                    <th>External</th>
-                    <th>Path / URL</th>
-                    <th>Last Updated</th>
-                </tr>
-            </thead>
-            <tbody>
-                {''.join(rows)}
-            </tbody>
-        </table>
-    </body>
-    </html>
-    """
-
-    return html
+reload();
+</script>
+</body>
+</html>
+"""
@@ -1,11 +1,15 @@
-from fastapi import APIRouter, HTTPException, Request, Depends
+import json
+import os
+from fastapi import APIRouter, Body, HTTPException, Request, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 from code.auth.session import get_current_groups, get_current_user
-from code.core.ancdb import ancDB
-from core.filter import query_collection
+from code.core.ancdb import ancDB, get_ancdb
+from code.core.visibility import anchor_visibility_query, merge_queries
+from core.filter import iter_collection, parse_to_mongo_query
+from code.core.pagination import check_limit, decode_cursor, paginated_response
 
 router = APIRouter()
-db = ancDB()
 
 def is_visible(anchor: dict, user_groups: list[str]) -> bool:
     if "admins" in user_groups:
@@ -15,21 +19,64 @@ def is_visible(anchor: dict, user_groups: list[str]) -> bool:
 
 # POST /db/upload/<name>
 @router.post("/db/upload/{filename}", tags=["db"])
-async def upload_anchor_to_db(
+def upload_anchor_to_db(
     filename: str,
-    request: Request,
-    user: str = Depends(get_current_user)
+    data: dict = Body(...),
+    user: str = Depends(get_current_user),
+    db: ancDB = Depends(get_ancdb)
 ):
-    data = await request.json()
     result = db.upload_anchor(filename, data, user)
     return JSONResponse(result)
 
+# POST /db/upload_bulk  (JSON array o NDJSON)
+MAX_BULK_ANCHORS = int(os.getenv("ANC_MAX_BULK_ANCHORS", "5000"))
+
+def parse_bulk_body(body: bytes, content_type: str) -> list:
+    try:
+        text = body.decode("utf-8")
+    except UnicodeDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Body is not valid UTF-8: {e}")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        items = []
+        for lineno, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                items.append(ValueError(f"line {lineno}: invalid JSON ({e})"))
+        return items
+
+    try:
+        items = json.loads(text)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array or NDJSON")
+    return items
+
+@router.post("/db/upload_bulk", tags=["db"])
+async def upload_anchors_bulk(
+    request: Request,
+    user: str = Depends(get_current_user),
+    db: ancDB = Depends(get_ancdb)
+):
+    items = parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
+    if len(items) > MAX_BULK_ANCHORS:
+        raise HTTPException(status_code=413, detail=f"Too many anchors in one request (max {MAX_BULK_ANCHORS})")
+    # bulk_write es bloqueante: al threadpool, fuera del event loop
+    result = await run_in_threadpool(db.upload_anchors_bulk, items, user)
+    return JSONResponse(result)
+
 # GET /db/list
 @router.get("/db/list", tags=["db"])
 def list_anchors_from_db(
     request: Request,
     user_groups: list[str] = Depends(get_current_groups),
-    filter: str = ""
+    filter: str = "",
+    limit: int | None = None,
+    cursor: str | None = None,
+    stream: bool = False
 ):
     projection = {
         "_id": 0,
@@ -45,15 +92,38 @@ def list_anchors_from_db(
         "updated_by": 1
     }
 
-    anchors = query_collection("anchors", filter, projection)
-    visibles = [a for a in anchors if is_visible(a, user_groups)]
-    return JSONResponse(content=visibles)
+    limit = check_limit(limit)
+    # Visibilidad resuelta en MongoDB (misma semántica que is_visible)
+    visibles = iter_collection(
+        "anchors", filter, projection, anchor_visibility_query(user_groups),
+        after=decode_cursor(cursor), limit=limit
+    )
+    return paginated_response(visibles, limit=limit, stream=stream)
+
+# GET /db/manifest  → {name: [content_hash, last_updated, version]}
+@router.get("/db/manifest", tags=["db"])
+def anchors_manifest(
+    user_groups: list[str] = Depends(get_current_groups),
+    filter: str = "",
+    db: ancDB = Depends(get_ancdb)
+):
+    query = parse_to_mongo_query(filter) if filter else {}
+    if query is None:
+        raise HTTPException(status_code=400, detail="Invalid filter")
+
+    docs = db.manifest(merge_queries(query, anchor_visibility_query(user_groups)))
+    manifest = {
+        name: [d.get("content_hash"), d.get("last_updated"), d.get("version")]
+        for name, d in docs.items()
+    }
+    return JSONResponse(content={"count": len(manifest), "anchors": manifest})
 
 # GET /db/pull/<name>
 @router.get("/db/pull/{name}", tags=["db"])
 def pull_anchor(
     name: str,
-    user_groups: list[str] = Depends(get_current_groups)
+    user_groups: list[str] = Depends(get_current_groups),
+    db: ancDB = Depends(get_ancdb)
 ):
     collection = db.get_collection("anchors")
     anchor = collection.find_one({"name": name}, {"_id": 0})
@@ -1,7 +1,138 @@
-from fastapi import APIRouter
+import asyncio
+from collections import defaultdict
+from pathlib import Path
+
+from fastapi import APIRouter, Body, Depends, File, Header, HTTPException, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse
+from code.auth.session import get_current_user
+from code.core.file_store import FileStore
 
 router = APIRouter()
 
+BASE_DIR = Path(__file__).resolve().parent.parent.parent  # Sube desde /code/endpoints/ a la raíz
+EXTERNAL_DIR = BASE_DIR / "external_files"
+store = FileStore(EXTERNAL_DIR)
+
+SHA256_HEADER = "X-Content-SHA256"
+
+# Un PATCH/complete/abort a la vez por sesión: si ya hay uno en curso, 409.
+# Se quitan al completar/cancelar la sesión o cuando purge_expired la borra.
+_upload_locks = defaultdict(asyncio.Lock)
+
+
+def _busy(upload_id: str, session: dict):
+    """409 si hay un PATCH (o un complete) en curso sobre la sesión."""
+    if _upload_locks[upload_id].locked():
+        raise HTTPException(
+            status_code=409,
+            detail="Another request is in progress for this upload",
+            headers={"Upload-Offset": str(session["offset"])},
+        )
+
+
+def _own_upload(upload_id: str, user: str) -> dict:
+    """La sesión, si es de `user` (404 si no existe, 403 si es de otro)."""
+    session = store.get_upload(upload_id)
+    if session.get("owner") not in (None, user):
+        raise HTTPException(status_code=403, detail="Upload belongs to another user")
+    return session
+
+
 @router.get("/")
 def list_files():
     return {"status": "ok"}
+
+
+# POST /files/upload  (multipart, de una vez) → temporal + rename, con sha256
+@router.post("/upload")
+def upload_file(file: UploadFile = File(...), user: str = Depends(get_current_user)):
+    result = store.save_stream(file.filename, file.file)
+    return JSONResponse(
+        {"status": "ok", **result, "path": f"/files/{result['filename']}"},
+        headers={SHA256_HEADER: result["sha256"]},
+    )
+
+
+# --- Subidas reanudables ---
+#   POST   /files/uploads               {"filename", "size"?, "sha256"?} → upload_id
+#   HEAD   /files/uploads/{id}          cabecera Upload-Offset (bytes recibidos)
+#   PATCH  /files/uploads/{id}          Upload-Offset: N + bytes del trozo
+#   POST   /files/uploads/{id}/complete verifica tamaño/sha256 y publica el fichero
+#   DELETE /files/uploads/{id}          cancela
+# Todas salvo HEAD/GET exigen usuario; cada sesión solo la usa quien la creó.
+
+@router.post("/uploads", status_code=201)
+def create_upload(data: dict = Body(...), user: str = Depends(get_current_user)):
+    for upload_id in store.purge_expired():
+        _upload_locks.pop(upload_id, None)
+    session = store.create_upload(data.get("filename"), data.get("size"), data.get("sha256"), owner=user)
+    return JSONResponse(status_code=201, content=session, headers={"Upload-Offset": "0"})
+
+
+@router.api_route("/uploads/{upload_id}", methods=["GET", "HEAD"])
+def get_upload(upload_id: str):
+    session = store.get_upload(upload_id)
+    return JSONResponse(session, headers={"Upload-Offset": str(session["offset"])})
+
+
+@router.patch("/uploads/{upload_id}")
+async def append_upload(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    user: str = Depends(get_current_user),
+):
+    session = await run_in_threadpool(_own_upload, upload_id, user)  # 404/403 antes de crear el lock
+    _busy(upload_id, session)
+    async with _upload_locks[upload_id]:
+        session, part, limit = await run_in_threadpool(store.open_chunk, upload_id, upload_offset)
+        offset = session["offset"]
+        try:
+            # El cuerpo se escribe según llega; un corte deja lo ya recibido
+            async for chunk in request.stream():
+                if offset + len(chunk) > limit:
+                    raise HTTPException(status_code=413, detail=f"Upload exceeds {limit} bytes")
+                await run_in_threadpool(part.write, chunk)
+                offset += len(chunk)
+        finally:
+            await run_in_threadpool(part.close)
+    return JSONResponse({"upload_id": upload_id, "offset": offset}, headers={"Upload-Offset": str(offset)})
+
+
+@router.post("/uploads/{upload_id}/complete")
+async def complete_upload(upload_id: str, user: str = Depends(get_current_user)):
+    session = await run_in_threadpool(_own_upload, upload_id, user)
+    _busy(upload_id, session)
+    # Con el lock: un PATCH que llegue mientras se verifica y publica recibe 409
+    async with _upload_locks[upload_id]:
+        result = await run_in_threadpool(store.complete_upload, upload_id)
+    _upload_locks.pop(upload_id, None)
+    return JSONResponse(
+        {"status": "ok", **result, "path": f"/files/{result['filename']}"},
+        headers={SHA256_HEADER: result["sha256"]},
+    )
+
+
+@router.delete("/uploads/{upload_id}")
+async def abort_upload(upload_id: str, user: str = Depends(get_current_user)):
+    session = await run_in_threadpool(_own_upload, upload_id, user)
+    _busy(upload_id, session)
+    async with _upload_locks[upload_id]:
+        await run_in_threadpool(store.abort_upload, upload_id)
+    _upload_locks.pop(upload_id, None)
+    return {"status": "aborted"}
+
+
+# GET /files/{filename} → soporta Range (206) y HEAD; sha256 en cabecera y ETag
+@router.api_route("/{filename}", methods=["GET", "HEAD"])
+def download_file(filename: str):
+    path = store.path(filename)
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="File not found")
+    sha256 = store.digest(filename)
+    return FileResponse(
+        path,
+        filename=path.name,
+        headers={SHA256_HEADER: sha256, "ETag": f'"{sha256}"'},
+    )
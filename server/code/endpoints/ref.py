@@ -1,44 +1,33 @@
-from fastapi import APIRouter, Request, HTTPException, Depends
+from fastapi import APIRouter, Body, Request, HTTPException, Depends
 from fastapi.responses import JSONResponse
-from code.core.ancdb import ancDB
+from code.core.ancdb import ancDB, get_ancdb
+from code.core.visibility import ref_visibility_query
 from code.core.utils import now_tz
+from code.core.secret_keys import encrypt_secret, decrypt_ref
 from auth.session import get_current_user, get_current_groups
 from core.logger import LogEntry
 
-from Crypto.Cipher import AES
-from Crypto.Random import get_random_bytes
-import base64
 import os
 
 router = APIRouter()
 
-# Clave de cifrado (32 bytes base64)
-ENC_KEY = base64.b64decode(os.getenv(
-    "SECRET_ENCRYPTION_KEY",
-    "HhYXbo7Nbp3fKU7xvku0tkgZ524k40AFY3NjzK+szoU="  # valor de prueba, reemplazar en prod
-))
-
-def encrypt_secret(plaintext: str) -> dict:
-    iv = get_random_bytes(12)
-    cipher = AES.new(ENC_KEY, AES.MODE_GCM, nonce=iv)
-    ciphertext, tag = cipher.encrypt_and_digest(plaintext.encode())
-
-    return {
-        "value": base64.b64encode(ciphertext).decode(),
-        "iv": base64.b64encode(iv).decode(),
-        "tag": base64.b64encode(tag).decode(),
-        "encoding": "aes256-gcm"
-    }
+GET_MANY_MAX = int(os.getenv("REF_GET_MANY_MAX", "500"))
+
+# Handlers síncronos a propósito: pymongo y LogEntry.save_default() bloquean,
+# así que Starlette los ejecuta en su threadpool y no en el event loop.
+
+# Cifrado con claves versionadas (key_id en cada documento): code/core/secret_keys.py
 
 
 
 @router.post("/set", tags=["ref"])
-async def set_secret_ref(
+def set_secret_ref(
     request: Request,
+    data: dict = Body(...),
     current_user: str = Depends(get_current_user),
     current_groups: list[str] = Depends(get_current_groups),
+    db: ancDB = Depends(get_ancdb),
 ):
-    data = await request.json()
     required = ["id", "plaintext", "description"]
 
     for field in required:
@@ -46,7 +35,6 @@ async def set_secret_ref(
             raise HTTPException(status_code=400, detail=f"Missing field: {field}")
 
     ref_id = data["id"]
-    db = ancDB()
     collection = db.get_collection("ref")
 
     if collection.find_one({"id": ref_id}):
@@ -62,6 +50,7 @@ async def set_secret_ref(
         "value": encrypted["value"],
         "iv": encrypted["iv"],
         "tag": encrypted["tag"],
+        "key_id": encrypted["key_id"],
         "created_at": now_tz(),
         "last_updated": now_tz(),
         "created_by": current_user,
@@ -117,25 +106,24 @@ def is_ref_visible(ref: dict, user: str, groups: list[str]) -> bool:
     return any(group in ref.get("groups", []) for group in groups)
 
 
-def decrypt_secret(value_b64: str, iv_b64: str, tag_b64: str) -> str:
-    cipher = AES.new(ENC_KEY, AES.MODE_GCM, nonce=base64.b64decode(iv_b64))
-    return cipher.decrypt_and_verify(
-        base64.b64decode(value_b64),
-        base64.b64decode(tag_b64)
-    ).decode()
+def cache_ttl(ref: dict):
+    """meta.cache_ttl: segundos que el cliente puede guardar el secreto en su cache (0 = nunca)."""
+    value = (ref.get("meta") or {}).get("cache_ttl")
+    return value if isinstance(value, int) and not isinstance(value, bool) and value >= 0 else None
+
 
 
 
 
 
 @router.get("/get/{ref_id}", tags=["ref"])
-async def get_secret_ref(
+def get_secret_ref(
     ref_id: str,
     request: Request,
     current_user: str = Depends(get_current_user),
     current_groups: list[str] = Depends(get_current_groups),
+    db: ancDB = Depends(get_ancdb),
 ):
-    db = ancDB()
     collection = db.get_collection("ref")
     ref = collection.find_one({"id": ref_id})
 
@@ -169,7 +157,7 @@ async def get_secret_ref(
         return response
 
     try:
-        plaintext = decrypt_secret(ref["value"], ref["iv"], ref["tag"])
+        plaintext = decrypt_ref(ref)
     except Exception as e:
         response = JSONResponse(status_code=500, content={"detail": f"Decryption failed: {e}"})
         LogEntry.from_request(
@@ -186,7 +174,8 @@ async def get_secret_ref(
     response = JSONResponse(status_code=200, content={
         "id": ref_id,
         "plaintext": plaintext,
-        "description": ref.get("description", "")
+        "description": ref.get("description", ""),
+        "cache_ttl": cache_ttl(ref)
     })
 
     LogEntry.from_request(
@@ -201,16 +190,84 @@ async def get_secret_ref(
     return response
 
 
+# POST /ref/get_many {"ids": [...]} → todos los secretos visibles de la lista
+# con una sola consulta a MongoDB y una sola escritura en el log de auditoría
+# (una entrada por id, como /ref/get). Lo no visible no aborta el lote: va
+# en "missing" / "denied" / "errors" y el cliente decide.
+@router.post("/get_many", tags=["ref"])
+def get_many_secret_refs(
+    request: Request,
+    data: dict = Body(...),
+    current_user: str = Depends(get_current_user),
+    current_groups: list[str] = Depends(get_current_groups),
+    db: ancDB = Depends(get_ancdb),
+):
+    ids = data.get("ids")
+    if not isinstance(ids, list) or not all(isinstance(i, str) for i in ids):
+        raise HTTPException(status_code=400, detail="Field 'ids' must be a list of strings")
+    ids = list(dict.fromkeys(ids))  # sin repetidos, en el orden pedido
+    if len(ids) > GET_MANY_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {GET_MANY_MAX} ids per request")
+
+    refs = {ref["id"]: ref for ref in db.get_collection("ref").find({"id": {"$in": ids}})}
+
+    secrets, ttls, missing, denied, errors = {}, {}, [], [], {}
+    outcomes = []  # (id, success, extra) para el log
+    for ref_id in ids:
+        ref = refs.get(ref_id)
+        if not ref:
+            missing.append(ref_id)
+            outcomes.append((ref_id, False, {"reason": "not_found"}))
+            continue
+        if not is_ref_visible(ref, current_user, current_groups):
+            denied.append(ref_id)
+            reason = "user_restricted" if ref.get("users") else "group_restricted"
+            outcomes.append((ref_id, False, {"reason": reason}))
+            continue
+        try:
+            secrets[ref_id] = decrypt_ref(ref)
+        except Exception:
+            errors[ref_id] = "decryption_failed"
+            outcomes.append((ref_id, False, {"reason": "decryption_failed"}))
+            continue
+        if cache_ttl(ref) is not None:
+            ttls[ref_id] = cache_ttl(ref)
+        outcomes.append((ref_id, True, {}))
+
+    response = JSONResponse(content={
+        "secrets": secrets,
+        "ttls": ttls,
+        "missing": missing,
+        "denied": denied,
+        "errors": errors,
+    })
+
+    LogEntry.save_many_default([
+        LogEntry.from_request(
+            request=request,
+            response=response,
+            resource="secret",
+            resource_id=ref_id,
+            action="get",
+            success=success,
+            extra={"batch": True, **extra}
+        )
+        for ref_id, success, extra in outcomes
+    ])
+
+    return response
+
+
 @router.get("/list", tags=["ref"])
-async def list_visible_refs(
+def list_visible_refs(
     current_user: str = Depends(get_current_user),
     current_groups: list[str] = Depends(get_current_groups),
+    db: ancDB = Depends(get_ancdb),
 ):
-    db = ancDB()
     collection = db.get_collection("ref")
 
-    # ruquested
-    docs = collection.find({}, {
+    # ruquested (visibilidad resuelta en MongoDB, misma semántica que is_ref_visible)
+    docs = collection.find(ref_visibility_query(current_user, current_groups), {
         "_id": 0,
         "id": 1,
         "description": 1,
@@ -221,25 +278,24 @@ async def list_visible_refs(
 
     visibles = []
     for ref in docs:
-        if is_ref_visible(ref, current_user, current_groups):
-            visibles.append({
-                "id": ref["id"],
-                "description": ref.get("description", ""),
-                "owned": ref.get("created_by") == current_user
-            })
+        visibles.append({
+            "id": ref["id"],
+            "description": ref.get("description", ""),
+            "owned": ref.get("created_by") == current_user
+        })
 
     return JSONResponse(status_code=200, content=visibles)
 
 
 
 @router.get("/pull/{ref_id}", tags=["ref"])
-async def pull_ref_json(
+def pull_ref_json(
     ref_id: str,
     request: Request,
     current_user: str = Depends(get_current_user),
     current_groups: list[str] = Depends(get_current_groups),
+    db: ancDB = Depends(get_ancdb),
 ):
-    db = ancDB()
     collection = db.get_collection("ref")
     ref = collection.find_one({"id": ref_id}, {"_id": 0})
 
@@ -293,12 +349,13 @@ async def pull_ref_json(
 
 
 @router.post("/update", tags=["ref"])
-async def update_ref(
+def update_ref(
     request: Request,
+    data: dict = Body(...),
     current_user: str = Depends(get_current_user),
-    current_groups: list[str] = Depends(get_current_groups)
+    current_groups: list[str] = Depends(get_current_groups),
+    db: ancDB = Depends(get_ancdb),
 ):
-    data = await request.json()
     ref_id = data.get("id")
 
     if not ref_id:
@@ -314,7 +371,6 @@ async def update_ref(
         ).save_default()
         return response
 
-    db = ancDB()
     collection = db.get_collection("ref")
     ref = collection.find_one({"id": ref_id})
 
@@ -459,12 +515,12 @@ async def update_ref(
 
 
 @router.delete("/delete/{ref_id}", tags=["ref"])
-async def delete_ref(
+def delete_ref(
     ref_id: str,
     request: Request,
     current_user: str = Depends(get_current_user),
+    db: ancDB = Depends(get_ancdb),
 ):
-    db = ancDB()
     collection = db.get_collection("ref")
     ref = collection.find_one({"id": ref_id})
 
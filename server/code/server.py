@@ -1,32 +1,69 @@
+import os
+from contextlib import asynccontextmanager
+import anyio.to_thread
 from fastapi import FastAPI, Depends
-from endpoints import anchors, users, files, dashboard, admin, dbsync, ref
+from endpoints import anchors, users, files, blobs, dashboard, admin, dbsync, ref
 from auth.session import AuthMiddleware, get_current_user, require_group
-from code.core.ancdb import ancDB
-
-
-
-app = FastAPI()
+from code.core import key_rotation, log_sink, mongo
+from code.core.ancdb import ancDB, get_ancdb
+from code.core.indexes import ensure_indexes
+
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Un solo MongoClient (con su pool) para todo el proceso
+    app.state.mongo = mongo.connect()
+    # Threadpool de Starlette (handlers síncronos y run_in_threadpool):
+    # acotado, y por debajo de MONGO_MAX_POOL_SIZE para no esperar conexión
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = int(os.getenv("SERVER_THREADPOOL_SIZE", "40"))
+    if os.getenv("MONGO_ENSURE_INDEXES", "1") != "0":
+        try:
+            ensure_indexes(mongo.get_db())
+        except Exception as e:
+            print(f"[ERROR] Could not ensure MongoDB indexes: {e}")
+    log_sink.start()
+    try:
+        key_rotation.resume_pending()
+    except Exception as e:
+        print(f"[ERROR] Could not resume ref key rotation: {e}")
+    yield
+    # Checkpoint de la rotación y vaciado del log de auditoría antes de cerrar el cliente
+    key_rotation.stop()
+    log_sink.stop()
+    mongo.close()
+
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(AuthMiddleware)
 
 # Carga de endpoints principales
 app.include_router(anchors.router, prefix="/anchors")
 app.include_router(files.router, prefix="/files")
+app.include_router(blobs.router, prefix="/blobs")
 app.include_router(dashboard.router)
 app.include_router(users.router) 
 app.include_router(dbsync.router)
 app.include_router(ref.router, prefix="/ref")
+app.include_router(admin.router)
 
 
 # PHealt
 @app.get("/health")
-def health():
-    db = ancDB()
+def health(db: ancDB = Depends(get_ancdb)):
     if db.test_connection():
         return {"status": "ok"}
     else:
         return {"status": "error", "message": "Database connection failed"}
 
 
+# Estadísticas del pool de MongoDB y del log de auditoría (monitorización)
+@app.get("/health/pool")
+def health_pool(_=Depends(require_group("admins"))):
+    return {**mongo.pool_stats(), "audit_log": log_sink.stats()}
+
+
 
 
 
@@ -1,3 +1,4 @@
-db.createCollection("anchor");
+db.createCollection("anchors");
 db.createCollection("ref");
 db.createCollection("log");
+// Los índices los declara y crea el servidor al arrancar (code/core/indexes.py)
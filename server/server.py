@@ -3,99 +3,58 @@ from fastapi.responses import FileResponse, HTMLResponse
 from pathlib import Path
 from typing import List
 from datetime import datetime, timezone
-import shutil
 import json
 import re
 import os
+import sys
 
 app = FastAPI()
 ANCHORS_DIR = Path("anchors")
-EXTERNAL_DIR = Path("external_files")
 ANCHORS_DIR.mkdir(parents=True, exist_ok=True)
-EXTERNAL_DIR.mkdir(parents=True, exist_ok=True)
 
 # --- Filtros compatibles con la app ---
+# Misma gramática que la CLI: core/shared/filterlang.py (en Docker, /app/shared)
 
-def get_nested(d, key):
-    parts = key.split(".")
-    for part in parts:
-        if not isinstance(d, dict) or part not in d:
-            return None
-        d = d[part]
-    return d
-
-def normalize_value(value):
-    if isinstance(value, str):
-        v = value.lower()
-        if v == "true":
-            return True
-        if v == "false":
-            return False
-        if v.isdigit():
-            return int(v)
-    return value
-
-def expr_to_lambda(expr_str):
-    expr_str = expr_str.replace(" AND ", " and ").replace(" OR ", " or ")
-    pattern = re.compile(r'([a-zA-Z0-9_.]+)\s*(!=|=|~|!~)\s*("[^"]+"|[^\s()]+)')
-    var_map = {}
-
-    for i, (key, op, val) in enumerate(pattern.findall(expr_str)):
-        var_name = f"_v{i}"
-        full_expr = f"{key}{op}{val}"
-        expr_str = expr_str.replace(full_expr, var_name)
-        var_map[var_name] = (key.strip(), op.strip(), normalize_value(val.strip('"')))
-
-    def matcher(data):
-        env = {}
-        for var_name, (key, op, expected) in var_map.items():
-            actual = get_nested(data, key)
-            if op == "=":
-                env[var_name] = (actual == expected)
-            elif op == "!=":
-                env[var_name] = (actual != expected)
-            elif op == "~":
-                env[var_name] = expected in str(actual) if actual is not None else False
-            elif op == "!~":
-                env[var_name] = expected not in str(actual) if actual is not None else True
-        try:
-            return eval(expr_str, {}, env)
-        except Exception:
-            return False
+_SHARED_DIR = Path(__file__).resolve().parent.parent / "core" / "shared"
+if _SHARED_DIR.is_dir() and str(_SHARED_DIR) not in sys.path:
+    sys.path.append(str(_SHARED_DIR))
 
-    return matcher
+from filterlang import FilterSyntaxError, compile_filter
 
-def matches_filter(data: dict, filter_str: str) -> bool:
+# Paquete `code` de este mismo directorio (no el módulo `code` de la stdlib),
+# aunque el servidor se arranque desde otro directorio
+_SERVER_DIR = str(Path(__file__).resolve().parent)
+if _SERVER_DIR not in sys.path:
+    sys.path.insert(0, _SERVER_DIR)
+if "code" in sys.modules and not hasattr(sys.modules["code"], "__path__"):
+    del sys.modules["code"]
+
+# Índice en memoria de ANCHORS_DIR y router de /files: los mismos que en code/
+from code.core.anchor_index import get_index
+from code.auth.session import AuthMiddleware
+from code.endpoints.files import router as files_router
+
+index = get_index(ANCHORS_DIR)
+app.add_middleware(AuthMiddleware)
+
+
+def get_matcher(filter_str: str):
     if not filter_str:
-        return True
+        return lambda data: True
     try:
-        matcher = expr_to_lambda(filter_str)
-        return matcher(data)
-    except Exception:
-        return False
+        return compile_filter(filter_str)
+    except FilterSyntaxError:
+        return lambda data: False
+
+def matches_filter(data: dict, filter_str: str) -> bool:
+    return get_matcher(filter_str)(data)
 
 # --- Endpoints ---
 
 @app.get("/anchors")
 def list_anchors(filter: List[str] = Query(default=[])):
-    anchors = []
-    for file in ANCHORS_DIR.glob("*.json"):
-        try:
-            with open(file) as f:
-                data = json.load(f)
-
-            matched = True
-            for f_expr in filter:
-                if not matches_filter(data, f_expr):
-                    matched = False
-                    break
-
-            if matched:
-                anchors.append(file.stem)
-
-        except Exception:
-            continue
-    return anchors
+    matchers = [get_matcher(f_expr) for f_expr in filter]
+    return [name for name, data in index.items() if all(match(data) for match in matchers)]
 
 
 @app.get("/anchors/{name}")
@@ -127,6 +86,7 @@ def upload_anchor(file: UploadFile = File(...)):
             json.dump(data, f, indent=2)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save: {e}")
+    index.put(anchor_name, data)
 
     return {
         "status": "ok",
@@ -140,6 +100,7 @@ def delete_anchor(name: str):
     path = ANCHORS_DIR / f"{name}.json"
     if path.exists():
         path.unlink()
+        index.remove(name)
         return {"status": "deleted"}
     else:
         raise HTTPException(status_code=404, detail="Anchor not found")
@@ -150,46 +111,24 @@ def get_anchor_raw(name: str):
     file_path = ANCHORS_DIR / f"{name}.json"
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="Anchor not found")
-    try:
-        with open(file_path) as f:
-            return json.load(f)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Invalid JSON or read error: {e}")
-
-
-@app.get("/files/{filename}")
-def download_file(filename: str):
-    file_path = EXTERNAL_DIR / filename
-    if not file_path.exists():
-        raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(file_path)
+    data = index.get(name)
+    if data is None:
+        raise HTTPException(status_code=500, detail="Invalid JSON or read error")
+    return data
 
 
-@app.post("/files/upload")
-def upload_external_file(file: UploadFile = File(...)):
-    dest_path = EXTERNAL_DIR / file.filename
-    try:
-        with open(dest_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
-        return {
-            "status": "ok",
-            "filename": file.filename,
-            "path": f"/files/{file.filename}"
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Upload failed: {e}")
+# /files: subidas reanudables, Range y sha256 (mismo router que code/). Las
+# escrituras exigen usuario: el middleware deja request.state.user a partir
+# del Bearer (sin token el resto de rutas sigue igual, abierto)
+app.include_router(files_router, prefix="/files")
 
 
 @app.get("/dashboard", response_class=HTMLResponse)
 def dashboard():
     rows = []
 
-    for file in ANCHORS_DIR.glob("*.json"):
+    for name, data in index.items():
         try:
-            with open(file) as f:
-                data = json.load(f)
-
-            name = file.stem
             type_ = data.get("type", "")
             note = data.get("note", "")
             env = data.get("env", "")